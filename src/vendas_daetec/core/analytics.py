@@ -0,0 +1,341 @@
+import itertools
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+
+from . import sales_logic
+
+# O NumPy é opcional: o restante da aplicação funciona sem ele
+try:
+    import numpy as np
+
+except ImportError:
+    np = None
+
+def _require_numpy():
+    """
+    Garante que o NumPy esteja disponível antes de qualquer cálculo.
+    """
+
+    # Mensagem clara em vez de um AttributeError em 'None'
+    if np is None:
+        raise ImportError("O módulo de análises requer o NumPy. Instale com: pip install numpy")
+
+def _fetch_columns(cursor, sql, params, n_columns, dtype):
+    """
+    Executa a consulta e copia o resultado diretamente para uma matriz NumPy (linhas x colunas).
+    """
+
+    # np.fromiter consome o cursor em uma passada, sem criar a lista de tuplas intermediária;
+    # NULL não tem valor numérico, então as consultas já filtram as linhas com colunas nulas
+    cursor.execute(sql, params)
+    flat = np.fromiter(itertools.chain.from_iterable(cursor), dtype=dtype)
+    return flat.reshape(-1, n_columns)
+
+class SalesData:
+    """
+    Vendas, itens e pagamentos carregados em arrays colunares.
+    Produtos e vendedores são representados pelos códigos inteiros já existentes no banco
+    (PROD-0042 -> 42, vendedores.id).
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Carrega os dados do banco informado (padrão: DB_PATH).
+        """
+
+        # Garante que o NumPy esteja disponível
+        _require_numpy()
+        conn = None
+
+        try:
+            conn = sales_logic._connect(db_path)
+            cursor = conn.cursor()
+
+            # Vendas: id, vendedor, valor total e horário (segundos desde a época); datas ilegíveis ficam de fora
+            sales = _fetch_columns(cursor, """
+                SELECT id, vendedor_id, valor_total, CAST(strftime('%s', data_venda) AS INTEGER)
+                FROM vendas
+                WHERE vendedor_id IS NOT NULL AND strftime('%s', data_venda) IS NOT NULL
+                ORDER BY id
+            """, (), 4, np.float64)
+            self.sale_id = sales[:, 0].astype(np.int64)
+            self.sale_seller = sales[:, 1].astype(np.int64)
+            self.sale_value = sales[:, 2]
+            self.sale_time = sales[:, 3].astype(np.int64)
+
+            # Itens: venda, código do produto, vendedor, quantidade e preço unitário (linhas sem vendedor ficam de fora)
+            items = _fetch_columns(cursor, """
+                SELECT venda_id, CAST(substr(produto_id, 6) AS INTEGER), vendedor_id,
+                       quantidade, preco_unitario_na_venda
+                FROM venda_itens
+                WHERE vendedor_id IS NOT NULL
+            """, (), 5, np.float64)
+            self.item_sale = items[:, 0].astype(np.int64)
+            self.item_product = items[:, 1].astype(np.int64)
+            self.item_seller = items[:, 2].astype(np.int64)
+            self.item_quantity = items[:, 3].astype(np.int64)
+            self.item_value = items[:, 3] * items[:, 4]
+
+            # Métodos de pagamento viram códigos inteiros (índice em self.methods)
+            cursor.execute("SELECT DISTINCT metodo FROM venda_pagamentos ORDER BY metodo")
+            self.methods = [row[0] for row in cursor.fetchall()]
+            method_case = " ".join("WHEN ? THEN %d" % i for i in range(len(self.methods))) or "WHEN NULL THEN 0"
+
+            # Pagamentos: venda, vendedor, método, valor e horário
+            payments = _fetch_columns(cursor, f"""
+                SELECT vp.venda_id, v.vendedor_id, CASE vp.metodo {method_case} ELSE -1 END,
+                       vp.valor, CAST(strftime('%s', v.data_venda) AS INTEGER)
+                FROM venda_pagamentos vp
+                JOIN vendas v ON v.id = vp.venda_id
+                WHERE v.vendedor_id IS NOT NULL AND strftime('%s', v.data_venda) IS NOT NULL
+            """, tuple(self.methods), 5, np.float64)
+            self.payment_sale = payments[:, 0].astype(np.int64)
+            self.payment_seller = payments[:, 1].astype(np.int64)
+            self.payment_method = payments[:, 2].astype(np.int64)
+            self.payment_value = payments[:, 3]
+            self.payment_time = payments[:, 4].astype(np.int64)
+
+            # Nomes, usados apenas para apresentar os resultados
+            cursor.execute("SELECT id, nome FROM vendedores")
+            self.seller_names = dict(cursor.fetchall())
+            cursor.execute("SELECT DISTINCT produto_id, produto_nome FROM venda_itens")
+            self.product_names = dict(cursor.fetchall())
+
+        finally:
+            if conn:
+                conn.close()
+
+def _product_id(code):
+    """
+    Converte o código inteiro de volta para o ID do produto (42 -> PROD-0042).
+    """
+
+    # Mesmo formato usado em add_product
+    return f"PROD-{int(code):04d}"
+
+def sales_per_hour(data):
+    """
+    Curva de vendas por hora do dia: quantidade de vendas e receita para cada hora (0-23).
+    """
+
+    # A hora é extraída do horário em segundos, sem converter datas em Python
+    hours = (data.sale_time // 3600) % 24
+    counts = np.bincount(hours, minlength=24)
+    revenue = np.bincount(hours, weights=data.sale_value, minlength=24)
+
+    return [
+        {"hora": hour, "vendas": int(counts[hour]), "receita": float(revenue[hour])}
+        for hour in range(24)
+    ]
+
+def top_products(data, n=10, by="quantidade"):
+    """
+    Os N produtos mais vendidos, por quantidade ('quantidade') ou por receita ('receita').
+    """
+
+    # Soma por código de produto com bincount
+    if data.item_product.size == 0:
+        return []
+
+    quantity = np.bincount(data.item_product, weights=data.item_quantity)
+    revenue = np.bincount(data.item_product, weights=data.item_value)
+    ranking = quantity if by == "quantidade" else revenue
+
+    # Seleciona os N maiores sem ordenar o vetor inteiro
+    sold = np.flatnonzero(quantity)
+    n = min(n, sold.size)
+
+    if n <= 0:
+        return []
+
+    top = sold[np.argpartition(-ranking[sold], n - 1)[:n]]
+    top = top[np.argsort(-ranking[top], kind="stable")]
+
+    return [
+        {
+            "produto_id": _product_id(code),
+            "nome": data.product_names.get(_product_id(code), _product_id(code)),
+            "quantidade": int(quantity[code]),
+            "receita": float(revenue[code])
+        }
+        for code in top
+    ]
+
+def basket_stats(data):
+    """
+    Tamanho e valor médio da cesta (por venda registrada).
+    """
+
+    # Sem vendas não há médias
+    if data.sale_id.size == 0:
+        return {"vendas": 0, "itens_medio": 0.0, "unidades_medio": 0.0, "valor_medio": 0.0}
+
+    # Linhas e unidades por venda, agregadas pelo ID da venda
+    lines = np.bincount(data.item_sale, minlength=int(data.sale_id.max()) + 1)[data.sale_id]
+    units = np.bincount(data.item_sale, weights=data.item_quantity, minlength=int(data.sale_id.max()) + 1)[data.sale_id]
+
+    return {
+        "vendas": int(data.sale_id.size),
+        "itens_medio": float(lines.mean()),
+        "unidades_medio": float(units.mean()),
+        "valor_medio": float(data.sale_value.mean())
+    }
+
+def payment_mix_over_time(data, bucket_seconds=3600):
+    """
+    Total recebido por método de pagamento em janelas de tempo (padrão: 1 hora).
+    """
+
+    # Sem pagamentos não há série
+    if data.payment_value.size == 0:
+        return []
+
+    # Índice da janela e do método combinados em um único bincount 2D
+    start = (data.payment_time.min() // bucket_seconds) * bucket_seconds
+    buckets = (data.payment_time - start) // bucket_seconds
+    n_methods = len(data.methods)
+    valid = data.payment_method >= 0
+    flat = buckets[valid] * n_methods + data.payment_method[valid]
+    n_buckets = int(buckets.max()) + 1
+    totals = np.bincount(flat, weights=data.payment_value[valid], minlength=n_buckets * n_methods).reshape(n_buckets, n_methods)
+
+    return [
+        {
+            "inicio": int(start + bucket * bucket_seconds),
+            "metodos": {method: float(totals[bucket, i]) for i, method in enumerate(data.methods)}
+        }
+        for bucket in range(n_buckets)
+    ]
+
+def seller_comparison(data):
+    """
+    Comparativo de vendedores: receita, vendas, unidades, ticket médio e participação na receita.
+    """
+
+    # Sem vendas não há comparação
+    if data.sale_id.size == 0:
+        return []
+
+    # Agregados por ID de vendedor
+    size = int(max(data.sale_seller.max(), data.item_seller.max() if data.item_seller.size else 0)) + 1
+    revenue = np.bincount(data.sale_seller, weights=data.sale_value, minlength=size)
+    sales = np.bincount(data.sale_seller, minlength=size)
+    units = np.bincount(data.item_seller, weights=data.item_quantity, minlength=size)
+    total_revenue = revenue.sum()
+
+    # Ordena pela receita
+    sellers = np.flatnonzero(sales)
+    sellers = sellers[np.argsort(-revenue[sellers], kind="stable")]
+
+    return [
+        {
+            "vendedor_id": int(seller),
+            "nome": data.seller_names.get(int(seller), f"Vendedor {seller}"),
+            "receita": float(revenue[seller]),
+            "vendas": int(sales[seller]),
+            "unidades": int(units[seller]),
+            "ticket_medio": float(revenue[seller] / sales[seller]),
+            "participacao": float(revenue[seller] / total_revenue) if total_revenue else 0.0
+        }
+        for seller in sellers
+    ]
+
+def compute_all(data=None, top_n=10, bucket_seconds=3600):
+    """
+    Calcula todas as análises de uma vez e retorna um dicionário serializável.
+    """
+
+    # Carrega os dados se não foram informados
+    if data is None:
+        data = SalesData()
+
+    return {
+        "vendas_por_hora": sales_per_hour(data),
+        "top_produtos": top_products(data, n=top_n),
+        "cesta": basket_stats(data),
+        "pagamentos_no_tempo": payment_mix_over_time(data, bucket_seconds),
+        "vendedores": seller_comparison(data)
+    }
+
+def export_results(results, output_path):
+    """
+    Exporta os resultados de compute_all para um arquivo JSON.
+    """
+
+    # Grava em UTF-8 mantendo os acentos legíveis
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+    return output_path
+
+def format_summary(results):
+    """
+    Resumo em texto dos resultados de compute_all (cesta, vendedores e produtos mais vendidos).
+    """
+
+    # Valores em reais, com vírgula decimal como no relatório de vendas
+    def money(value):
+        return f"R$ {value:.2f}".replace(".", ",")
+
+    basket = results["cesta"]
+    lines = [f"Vendas: {basket['vendas']} | Itens por venda: {basket['itens_medio']:.2f} | "
+             f"Unidades por venda: {basket['unidades_medio']:.2f} | Valor médio: {money(basket['valor_medio'])}"]
+
+    if results["vendedores"]:
+        lines += ["", "Vendedores (por receita):"]
+        lines += [f"  {seller['nome']}: {money(seller['receita'])} em {seller['vendas']} venda(s), "
+                  f"{seller['participacao'] * 100:.1f}% da receita" for seller in results["vendedores"]]
+
+    if results["top_produtos"]:
+        lines += ["", "Produtos mais vendidos:"]
+        lines += [f"  {product['produto_id']} {product['nome']}: {product['quantidade']} un., {money(product['receita'])}"
+                  for product in results["top_produtos"]]
+
+    return "\n".join(lines)
+
+def main(argv=None):
+    """
+    Linha de comando: calcula as análises de vendas e exporta o JSON usado pelas telas de relatório e painel.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Análises de vendas (curva por hora, produtos, cesta, pagamentos e vendedores).")
+    parser.add_argument("--db", help="Banco de dados (padrão: data/planilhas.db).")
+    parser.add_argument("--saida", help="Arquivo JSON onde salvar os resultados completos.")
+    parser.add_argument("--top", type=int, default=10, help="Quantidade de produtos no ranking (padrão: 10).")
+    args = parser.parse_args(argv)
+
+    if args.top < 1:
+        parser.error("--top deve ser pelo menos 1")
+
+    # Sem NumPy a análise não roda; o erro é mostrado sem traceback
+    try:
+        _require_numpy()
+    except ImportError as e:
+        print(e)
+        return 2
+
+    db_path = Path(args.db) if args.db else sales_logic.DB_PATH
+    sales_logic.initialize_database(db_path)
+
+    try:
+        results = compute_all(SalesData(db_path), top_n=args.top)
+    except sqlite3.Error as e:
+        print(f"Erro ao ler as vendas: {e}")
+        return 2
+
+    print(format_summary(results))
+
+    if args.saida:
+        export_results(results, args.saida)
+        print(f"Análises salvas em: {args.saida}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
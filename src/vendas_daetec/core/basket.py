@@ -0,0 +1,274 @@
+import sqlite3
+import heapq
+import logging
+import argparse
+import itertools
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+from . import sales_logic, events
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Atendimentos recentes cujas cestas ainda podem receber vendas (um carrinho vira uma venda por vendedor)
+OPEN_BASKETS = 32
+
+class CoOccurrenceIndex:
+    """
+    Índice esparso de produtos comprados juntos (análise de cesta).
+    Cada atendimento (checkout) é uma cesta, mesmo quando o carrinho foi dividido em uma venda por vendedor;
+    vendas sem atendimento (anteriores à coluna) são cestas isoladas. Apenas os pares que realmente ocorreram são armazenados.
+    """
+
+    def __init__(self):
+        """
+        Inicializa o índice vazio.
+        """
+
+        # Contagens protegidas por lock, pois vendas podem chegar de outras threads
+        self._lock = threading.Lock()
+        self._pairs = {}
+        self._item_counts = {}
+        self._open = OrderedDict()
+        self.baskets = 0
+
+    def _count_pair(self, a, b):
+        """
+        Conta o par (a, b) nos dois sentidos, para consultas diretas por produto (chamado com o lock).
+        """
+
+        # Linhas esparsas: só os pares que ocorreram
+        row_a = self._pairs.setdefault(a, {})
+        row_a[b] = row_a.get(b, 0) + 1
+        row_b = self._pairs.setdefault(b, {})
+        row_b[a] = row_b.get(a, 0) + 1
+
+    def add_basket(self, product_ids, basket_id=None):
+        """
+        Adiciona uma cesta (lista de IDs de produto) ao índice.
+        Com 'basket_id' (o atendimento), produtos de vendas seguintes do mesmo atendimento entram na mesma cesta.
+        """
+
+        # Quantidades repetidas do mesmo produto contam uma única vez por cesta
+        products = set(product_ids)
+
+        if not products:
+            return
+
+        with self._lock:
+            existing = self._open.get(basket_id, set()) if basket_id is not None else set()
+            new = sorted(products - existing)
+
+            if not existing:
+                self.baskets += 1
+
+            for product_id in new:
+                self._item_counts[product_id] = self._item_counts.get(product_id, 0) + 1
+
+            # Pares entre os produtos novos e entre eles e os que a cesta já tinha
+            for a, b in itertools.combinations(new, 2):
+                self._count_pair(a, b)
+
+            for a in new:
+                for b in existing:
+                    self._count_pair(a, b)
+
+            # Mantém só os atendimentos mais recentes abertos
+            if basket_id is not None:
+                self._open[basket_id] = existing | products
+                self._open.move_to_end(basket_id)
+
+                while len(self._open) > OPEN_BASKETS:
+                    self._open.popitem(last=False)
+
+    def handle_event(self, event):
+        """
+        Aplica um evento do barramento: nova venda, histórico apagado ou troca de armazenamento.
+        """
+
+        # Só vendas, a limpeza do histórico e a troca de banco afetam as cestas
+        if event.kind == events.SALE_REGISTERED:
+            self.add_basket((item["produto_id"] for item in event.data["cart_items"]), event.data.get("atendimento"))
+
+        elif event.kind == events.SALES_CLEARED:
+            self.reset()
+
+        elif event.kind == events.BACKEND_CHANGED:
+            self.rebuild()
+
+    def reset(self):
+        """
+        Descarta todas as contagens.
+        """
+
+        # Volta ao estado inicial
+        with self._lock:
+            self._pairs = {}
+            self._item_counts = {}
+            self._open = OrderedDict()
+            self.baskets = 0
+
+    def rebuild(self, db_path=None):
+        """
+        Reconstrói o índice a partir de todo o histórico de 'venda_itens', agrupando as vendas por atendimento.
+        """
+
+        # Lê os itens agrupados por cesta em uma única consulta (vendas sem atendimento são cestas próprias)
+        conn = None
+
+        try:
+            conn = sales_logic._connect(db_path)
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COALESCE(v.atendimento, 'venda:' || v.id) AS cesta, vi.produto_id
+                FROM venda_itens vi
+                JOIN vendas v ON v.id = vi.venda_id
+                ORDER BY cesta
+            """)
+
+            self.reset()
+
+            for _, rows in itertools.groupby(cursor, key=lambda row: row[0]):
+                self.add_basket(row[1] for row in rows)
+
+            return True
+
+        except sqlite3.Error as e:
+            logger.error("Erro ao reconstruir o índice de cestas: %s", e)
+            return False
+
+        finally:
+            if conn:
+                conn.close()
+
+    def support(self, a, b=None):
+        """
+        Suporte: fração das cestas que contêm 'a' (ou 'a' e 'b' juntos).
+        """
+
+        # Sem cestas o suporte é zero
+        if not self.baskets:
+            return 0.0
+
+        if b is None:
+            return self._item_counts.get(a, 0) / self.baskets
+
+        return self._pairs.get(a, {}).get(b, 0) / self.baskets
+
+    def confidence(self, a, b):
+        """
+        Confiança da regra a -> b: das cestas com 'a', a fração que também tem 'b'.
+        """
+
+        # Evita divisão por zero quando 'a' nunca foi vendido
+        count_a = self._item_counts.get(a, 0)
+
+        if not count_a:
+            return 0.0
+
+        return self._pairs.get(a, {}).get(b, 0) / count_a
+
+    def lift(self, a, b):
+        """
+        Lift da regra a -> b: quanto a presença de 'a' aumenta a chance de 'b' (1.0 = independente).
+        """
+
+        # Lift = confiança(a -> b) / suporte(b)
+        support_b = self.support(b)
+
+        if not support_b:
+            return 0.0
+
+        return self.confidence(a, b) / support_b
+
+    def frequently_bought_with(self, product_id, n=5, min_count=1):
+        """
+        Produtos mais comprados junto com 'product_id'.
+        Retorna uma lista de dicionários com produto, contagem, suporte, confiança e lift.
+        """
+
+        # Copia a linha do produto para consultar sem segurar o lock
+        with self._lock:
+            row = dict(self._pairs.get(product_id, {}))
+
+        # Seleciona os N pares mais frequentes sem ordenar a linha inteira
+        top = heapq.nlargest(n, ((count, other) for other, count in row.items() if count >= min_count))
+
+        return [
+            {
+                "produto_id": other,
+                "contagem": count,
+                "suporte": self.support(product_id, other),
+                "confianca": self.confidence(product_id, other),
+                "lift": self.lift(product_id, other)
+            }
+            for count, other in top
+        ]
+
+# Instância compartilhada pela aplicação
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """
+    Retorna o índice compartilhado, reconstruindo-o do histórico na primeira chamada.
+    """
+
+    # Constrói uma única vez e passa a ouvir os eventos do barramento
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = CoOccurrenceIndex()
+            _index.rebuild()
+            events.subscribe(_index.handle_event, events.SALE_REGISTERED, events.SALES_CLEARED, events.BACKEND_CHANGED)
+
+    return _index
+
+def format_bought_with(index, product_id, n=5, min_count=1):
+    """
+    Tabela de texto com os produtos mais comprados junto com 'product_id'.
+    """
+
+    # Uma linha por produto, na ordem de frequently_bought_with
+    lines = [f"Comprados com {product_id} (suporte {index.support(product_id):.1%}):",
+             f"{'Produto':<12} {'Vezes':>6} {'Confiança':>10} {'Lift':>6}"]
+
+    for entry in index.frequently_bought_with(product_id, n, min_count):
+        lines.append(f"{entry['produto_id']:<12} {entry['contagem']:>6} {entry['confianca']:>10.1%} {entry['lift']:>6.2f}")
+
+    return "\n".join(lines)
+
+def main(argv=None):
+    """
+    Linha de comando: produtos mais comprados junto com os produtos informados.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Produtos comprados juntos (análise de cesta por atendimento).")
+    parser.add_argument("produtos", nargs="+", metavar="PRODUTO", help="ID do produto (ex: PROD-0001).")
+    parser.add_argument("--db", help="Banco de dados (padrão: data/planilhas.db).")
+    parser.add_argument("-n", type=int, default=5, help="Quantidade de produtos listados por consulta (padrão: 5).")
+    parser.add_argument("--minimo", type=int, default=1, help="Contagem mínima do par (padrão: 1).")
+    args = parser.parse_args(argv)
+
+    # Índice próprio, construído do banco informado (bancos antigos ganham a coluna de atendimento)
+    db_path = Path(args.db) if args.db else sales_logic.DB_PATH
+    sales_logic.initialize_database(db_path)
+    index = CoOccurrenceIndex()
+
+    if not index.rebuild(db_path):
+        return 2
+
+    print(f"{index.baskets} cesta(s) no histórico")
+
+    for product_id in args.produtos:
+        print()
+        print(format_bought_with(index, product_id, args.n, args.minimo))
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,178 @@
+import sqlite3
+import logging
+import argparse
+from pathlib import Path
+
+from . import sales_logic
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Chave da tabela 'configuracoes' com o maior vendas.id já verificado
+CHECK_WATERMARK_KEY = "consistency_watermark"
+
+# Diferença máxima aceita entre o total da venda e as somas (mesma folga do diálogo de venda)
+DEFAULT_TOLERANCE = 0.01
+
+def _check_batch(cursor, first_id, last_id, tolerance, result):
+    """
+    Verifica as vendas, itens e pagamentos com venda_id no intervalo (first_id, last_id].
+    Acrescenta os problemas encontrados em 'result'.
+    """
+
+    # Vendas cujo total não bate com a soma dos itens (ou que não têm itens)
+    cursor.execute("""
+        SELECT v.id, v.valor_total, COALESCE(i.soma, 0)
+        FROM vendas v
+        LEFT JOIN (
+            SELECT venda_id, SUM(quantidade * preco_unitario_na_venda) AS soma
+            FROM venda_itens
+            WHERE venda_id > ? AND venda_id <= ?
+            GROUP BY venda_id
+        ) i ON i.venda_id = v.id
+        WHERE v.id > ? AND v.id <= ? AND (i.venda_id IS NULL OR ABS(v.valor_total - i.soma) > ?)
+    """, (first_id, last_id, first_id, last_id, tolerance))
+    result["divergencias_itens"].extend(cursor.fetchall())
+
+    # Vendas cujo total não bate com a soma dos pagamentos (ou que não têm pagamentos)
+    cursor.execute("""
+        SELECT v.id, v.valor_total, COALESCE(p.soma, 0)
+        FROM vendas v
+        LEFT JOIN (
+            SELECT venda_id, SUM(valor) AS soma
+            FROM venda_pagamentos
+            WHERE venda_id > ? AND venda_id <= ?
+            GROUP BY venda_id
+        ) p ON p.venda_id = v.id
+        WHERE v.id > ? AND v.id <= ? AND (p.venda_id IS NULL OR ABS(v.valor_total - p.soma) > ?)
+    """, (first_id, last_id, first_id, last_id, tolerance))
+    result["divergencias_pagamentos"].extend(cursor.fetchall())
+
+    # Itens e pagamentos que apontam para uma venda inexistente
+    cursor.execute("""
+        SELECT vi.id, vi.venda_id
+        FROM venda_itens vi
+        WHERE vi.venda_id > ? AND vi.venda_id <= ?
+          AND NOT EXISTS (SELECT 1 FROM vendas v WHERE v.id = vi.venda_id)
+    """, (first_id, last_id))
+    result["itens_orfaos"].extend(cursor.fetchall())
+
+    cursor.execute("""
+        SELECT vp.id, vp.venda_id
+        FROM venda_pagamentos vp
+        WHERE vp.venda_id > ? AND vp.venda_id <= ?
+          AND NOT EXISTS (SELECT 1 FROM vendas v WHERE v.id = vp.venda_id)
+    """, (first_id, last_id))
+    result["pagamentos_orfaos"].extend(cursor.fetchall())
+
+    # Quantidade de vendas verificadas no lote
+    cursor.execute("SELECT COUNT(*) FROM vendas WHERE id > ? AND id <= ?", (first_id, last_id))
+    result["verificadas"] += cursor.fetchone()[0]
+
+def check_consistency(db_path=None, full=False, batch_size=5000, tolerance=DEFAULT_TOLERANCE):
+    """
+    Confere se o total de cada venda bate com seus itens e pagamentos e procura linhas órfãs.
+    Por padrão verifica apenas as vendas acima da marca d'água salva; 'full' refaz a verificação desde o início.
+
+    Retorna um dicionário com:
+      'verificadas': quantidade de vendas verificadas;
+      'divergencias_itens' / 'divergencias_pagamentos': [(venda_id, valor_total, soma)];
+      'itens_orfaos' / 'pagamentos_orfaos': [(id, venda_id)];
+      'marca_dagua': maior venda_id verificado.
+    Retorna None em caso de erro.
+    """
+
+    # Garante que o banco esteja inicializado
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    sales_logic.initialize_database(db_path)
+    conn = None
+    result = {
+        "verificadas": 0,
+        "divergencias_itens": [],
+        "divergencias_pagamentos": [],
+        "itens_orfaos": [],
+        "pagamentos_orfaos": []
+    }
+
+    try:
+        conn = sales_logic._connect(db_path)
+        cursor = conn.cursor()
+        watermark = 0 if full else int(sales_logic.read_config(cursor, CHECK_WATERMARK_KEY, 0))
+
+        # Limite superior: a maior venda confirmada
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM vendas")
+        last_id = cursor.fetchone()[0]
+
+        # Um lote por transação; a marca d'água avança a cada lote, então uma execução interrompida não recomeça do zero
+        while watermark < last_id:
+            batch_end = min(watermark + batch_size, last_id)
+            cursor.execute("BEGIN")
+            _check_batch(cursor, watermark, batch_end, tolerance, result)
+            sales_logic.write_config(cursor, CHECK_WATERMARK_KEY, batch_end)
+            conn.commit()
+            watermark = batch_end
+
+        # Itens e pagamentos acima da maior venda são órfãos por definição; não movem a marca d'água
+        cursor.execute("SELECT id, venda_id FROM venda_itens WHERE venda_id > ?", (last_id,))
+        result["itens_orfaos"].extend(cursor.fetchall())
+        cursor.execute("SELECT id, venda_id FROM venda_pagamentos WHERE venda_id > ?", (last_id,))
+        result["pagamentos_orfaos"].extend(cursor.fetchall())
+
+        result["marca_dagua"] = watermark
+        return result
+
+    except sqlite3.Error as e:
+        logger.error("Erro ao verificar a consistência das vendas: %s", e)
+        return None
+
+    finally:
+        if conn:
+            conn.close()
+
+def print_consistency_report(result):
+    """
+    Mostra o resultado de check_consistency de forma legível.
+    """
+
+    # Resumo e detalhes de cada tipo de problema
+    print(f"Vendas verificadas: {result['verificadas']} (marca d'água: {result['marca_dagua']})")
+
+    for venda_id, valor_total, soma in result["divergencias_itens"]:
+        print(f"  Venda {venda_id}: total R$ {valor_total:.2f}, itens somam R$ {soma:.2f}")
+
+    for venda_id, valor_total, soma in result["divergencias_pagamentos"]:
+        print(f"  Venda {venda_id}: total R$ {valor_total:.2f}, pagamentos somam R$ {soma:.2f}")
+
+    for item_id, venda_id in result["itens_orfaos"]:
+        print(f"  Item {item_id} aponta para a venda inexistente {venda_id}")
+
+    for pagamento_id, venda_id in result["pagamentos_orfaos"]:
+        print(f"  Pagamento {pagamento_id} aponta para a venda inexistente {venda_id}")
+
+    problems = sum(len(result[key]) for key in ("divergencias_itens", "divergencias_pagamentos", "itens_orfaos", "pagamentos_orfaos"))
+    print("Nenhum problema encontrado." if not problems else f"{problems} problema(s) encontrado(s).")
+
+def main(argv=None):
+    """
+    Linha de comando: verificação incremental (padrão) ou completa do histórico de vendas.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Verificação de consistência de vendas, itens e pagamentos.")
+    parser.add_argument("--db", help="Banco de dados (padrão: data/planilhas.db).")
+    parser.add_argument("--completa", action="store_true", help="Verifica todo o histórico, ignorando a marca d'água.")
+    parser.add_argument("--lote", type=int, default=5000, help="Vendas por lote (padrão: 5000).")
+    parser.add_argument("--tolerancia", type=float, default=DEFAULT_TOLERANCE, help="Diferença aceita em reais (padrão: 0,01).")
+    args = parser.parse_args(argv)
+
+    # Sai com código 1 se houver problemas, para uso em tarefas agendadas
+    result = check_consistency(args.db, args.completa, args.lote, args.tolerancia)
+
+    if result is None:
+        return 2
+
+    print_consistency_report(result)
+    return 1 if any(result[key] for key in ("divergencias_itens", "divergencias_pagamentos", "itens_orfaos", "pagamentos_orfaos")) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,391 @@
+import os
+import atexit
+import sqlite3
+import tempfile
+import time
+import threading
+import argparse
+import functools
+from pathlib import Path
+
+# Chave da tabela 'configuracoes' que guarda o perfil escolhido
+PROFILE_CONFIG_KEY = "perf_profile"
+DEFAULT_PROFILE = "safe"
+
+# Perfis de desempenho do SQLite.
+# 'durabilidade': 2 = nenhuma venda confirmada se perde, nem em queda de energia;
+#                 1 = sobrevive a travamentos do programa, mas uma queda de energia pode perder as últimas vendas;
+#                 0 = uma queda de energia ou travamento do sistema pode corromper ou perder dados recentes.
+PROFILES = {
+    "safe": {
+        "descricao": "Padrão do SQLite: máxima segurança, menor velocidade.",
+        "durabilidade": 2,
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "synchronous": "FULL",
+        "temp_store": "DEFAULT",
+        "journal_mode": "DELETE"
+    },
+    "balanced": {
+        "descricao": "WAL com sincronização normal: bom equilíbrio para o dia a dia.",
+        "durabilidade": 1,
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "journal_mode": "WAL",
+        "journal_size_limit": 64 * 1024 * 1024
+    },
+    "rush-hour": {
+        "descricao": "Velocidade máxima para picos de movimento; depende de energia estável.",
+        "durabilidade": 0,
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "synchronous": "OFF",
+        "temp_store": "MEMORY",
+        "journal_mode": "WAL",
+        "journal_size_limit": 64 * 1024 * 1024
+    }
+}
+
+# Perfil ativo de cada arquivo de banco, lido uma única vez por processo
+_active_profiles = {}
+_active_lock = threading.Lock()
+
+# Bancos cujo modo de journal já foi conferido neste processo (o modo fica gravado no arquivo)
+_journal_checked = set()
+
+# Conexão ociosa mantida aberta em cada banco WAL: sem ela, fechar a última conexão de cada operação
+# faz checkpoint e apaga o arquivo -wal, e a próxima abertura recomeça do zero
+_keepalive = {}
+
+def _connection_pragmas(profile):
+    """
+    PRAGMAs válidos apenas para a conexão, em um único script.
+    """
+
+    # journal_size_limit só existe nos perfis WAL (limita o -wal que a conexão mantida aberta deixa crescer)
+    pragmas = [
+        f"PRAGMA cache_size = {int(profile['cache_size'])}",
+        f"PRAGMA mmap_size = {int(profile['mmap_size'])}",
+        f"PRAGMA synchronous = {profile['synchronous']}",
+        f"PRAGMA temp_store = {profile['temp_store']}"
+    ]
+
+    if "journal_size_limit" in profile:
+        pragmas.append(f"PRAGMA journal_size_limit = {int(profile['journal_size_limit'])}")
+
+    return "; ".join(pragmas) + ";"
+
+def apply_profile(conn, name, check_journal=True):
+    """
+    Aplica os PRAGMAs do perfil informado em uma conexão aberta.
+    Com check_journal=False o modo de journal (gravado no arquivo) não é consultado nem alterado.
+    Retorna o modo de journal em uso, ou None se não foi consultado.
+    """
+
+    # Perfis desconhecidos caem no padrão
+    profile = PROFILES.get(name, PROFILES[DEFAULT_PROFILE])
+
+    # Configurações válidas apenas para esta conexão (fora de transação: executescript não confirma nada pendente)
+    conn.executescript(_connection_pragmas(profile))
+
+    if not check_journal:
+        return None
+
+    # O modo de journal é gravado no arquivo; só é alterado quando for diferente
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode")
+    current = cursor.fetchone()[0]
+
+    if current.upper() != profile["journal_mode"] and current.lower() != "memory":
+        try:
+            cursor.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+            current = cursor.fetchone()[0]
+
+        # Outra conexão ocupada ou banco somente leitura: mantém o modo atual
+        except sqlite3.OperationalError:
+            pass
+
+    return current
+
+def _db_key(conn):
+    """
+    Identifica o arquivo de banco de uma conexão (chave do cache de perfis).
+    """
+
+    # O nome do arquivo principal vem do próprio SQLite
+    return os.path.realpath(conn.execute("PRAGMA database_list").fetchone()[2])
+
+@functools.lru_cache(maxsize=64)
+def db_key(db_path):
+    """
+    Chave do cache de perfis para um caminho de arquivo (a mesma que _db_key obtém de uma conexão).
+    """
+
+    # Caminho absoluto, sem links simbólicos
+    return os.path.realpath(db_path)
+
+def configure_connection(conn, key=None, keep_alive=False):
+    """
+    Aplica o perfil ativo do banco na conexão, lendo-o de 'configuracoes' e conferindo o modo de journal
+    apenas na primeira vez. 'key' identifica o banco (padrão: consultado na conexão).
+    Com keep_alive, bancos em WAL ganham uma conexão ociosa que fica aberta até release_connections.
+    """
+
+    # Descobre o perfil salvo para este arquivo
+    key = key or _db_key(conn)
+
+    with _active_lock:
+        name = _active_profiles.get(key)
+        check_journal = key not in _journal_checked
+
+    if name is None:
+        try:
+            row = conn.execute("SELECT valor FROM configuracoes WHERE chave = ?", (PROFILE_CONFIG_KEY,)).fetchone()
+
+        # Banco ainda sem tabelas (antes de initialize_database)
+        except sqlite3.OperationalError:
+            row = None
+
+        name = row[0] if row and row[0] in PROFILES else DEFAULT_PROFILE
+
+        with _active_lock:
+            _active_profiles[key] = name
+
+    journal_mode = apply_profile(conn, name, check_journal)
+
+    # Primeira conexão ao banco neste processo: registra a conferência e, em WAL, abre a conexão ociosa
+    if check_journal:
+        with _active_lock:
+            _journal_checked.add(key)
+
+            if keep_alive and journal_mode and journal_mode.lower() == "wal" and key not in _keepalive:
+                # Uma leitura abre o índice do WAL; só assim a conexão conta como aberta no banco
+                keeper = sqlite3.connect(key, check_same_thread=False)
+                keeper.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                _keepalive[key] = keeper
+
+    return name
+
+def release_connections(db_path=None):
+    """
+    Fecha as conexões ociosas (de um banco ou de todos), fazendo o checkpoint final do WAL.
+    Necessário antes de apagar ou trocar o modo de journal de um banco (ex: cópias temporárias).
+    """
+
+    # A próxima conexão volta a conferir o modo de journal
+    with _active_lock:
+        keys = [db_key(db_path)] if db_path else list(_keepalive)
+
+        for key in keys:
+            conn = _keepalive.pop(key, None)
+            _journal_checked.discard(key)
+
+            if conn is not None:
+                conn.close()
+
+# Checkpoint final quando o processo termina
+atexit.register(release_connections)
+
+def get_active_profile(conn):
+    """
+    Retorna o nome do perfil ativo do banco da conexão.
+    """
+
+    # Reaproveita a leitura feita por configure_connection
+    key = _db_key(conn)
+
+    with _active_lock:
+        name = _active_profiles.get(key)
+
+    return name or configure_connection(conn)
+
+def set_active_profile(conn, name):
+    """
+    Salva o perfil em 'configuracoes' e passa a aplicá-lo nas próximas conexões.
+    """
+
+    # Valida o nome antes de gravar
+    if name not in PROFILES:
+        raise ValueError(f"Perfil desconhecido: {name}. Opções: {', '.join(PROFILES)}")
+
+    conn.execute("REPLACE INTO configuracoes (chave, valor) VALUES (?, ?)", (PROFILE_CONFIG_KEY, name))
+    conn.commit()
+    key = _db_key(conn)
+
+    # Sair do WAL exige que nenhuma outra conexão esteja aberta (inclusive a ociosa)
+    release_connections(key)
+
+    with _active_lock:
+        _active_profiles[key] = name
+
+    # A conexão atual também passa a usar o novo perfil
+    apply_profile(conn, name)
+
+def _run_workload(db_path, profile_name, sales, reads):
+    """
+    Executa uma carga curta com as mesmas transações da aplicação (as inserções de register_sale, a leitura do
+    catálogo e o relatório), cada operação com a sua conexão ao banco informado, e retorna o tempo em segundos.
+    """
+
+    # Importação tardia: sales_logic importa este módulo
+    from . import sales_logic
+
+    # O perfil fica gravado na cópia; as conexões de _connect passam a aplicá-lo
+    conn = sales_logic._connect(db_path)
+
+    try:
+        set_active_profile(conn, profile_name)
+        cursor = conn.cursor()
+
+        # Usa um produto existente ou cria um apenas na cópia
+        cursor.execute("SELECT id, nome, preco, vendedor_id FROM produtos LIMIT 1")
+        product = cursor.fetchone()
+
+        if product is None:
+            cursor.execute("INSERT OR IGNORE INTO vendedores (nome) VALUES ('Calibração')")
+            cursor.execute("SELECT id FROM vendedores WHERE nome = 'Calibração'")
+            seller_id = cursor.fetchone()[0]
+            cursor.execute("INSERT INTO produtos (id, nome, preco, vendedor_id) VALUES ('PROD-9999', 'Calibração', 1.0, ?)", (seller_id,))
+            conn.commit()
+            product = ("PROD-9999", "Calibração", 1.0, seller_id)
+
+    finally:
+        conn.close()
+
+    product_id, product_name, price, seller_id = product
+    cart = [{"produto_id": product_id, "nome": product_name, "quantidade": 2, "preco_unitario": price}]
+    payments = [{"metodo": "Pix", "valor": 2 * price}]
+
+    # Tudo sobre a cópia, sem trocar o DB_PATH do processo (nem avisar a interface de vendas que não são dela)
+    start = time.perf_counter()
+
+    # Vendas: uma conexão e uma transação por venda, com as mesmas inserções de register_sale
+    for _ in range(sales):
+        conn = sales_logic._connect(db_path)
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA foreign_keys = ON")
+            venda_id = sales_logic._insert_sale(cursor, seller_id, 2 * price, cart, payments)
+            sales_logic._sale_row(cursor, venda_id)
+            conn.commit()
+
+        finally:
+            conn.close()
+
+    # Leituras de catálogo, como ao abrir o diálogo de venda (a consulta de iter_products_by_seller, sem o cache)
+    for _ in range(reads):
+        conn = sales_logic._connect(db_path)
+
+        try:
+            conn.execute("SELECT id, nome, preco FROM produtos WHERE vendedor_id = ? ORDER BY nome", (seller_id,)).fetchall()
+
+        finally:
+            conn.close()
+
+    # Uma passada de relatório
+    sales_logic.generate_sales_report(db_path=db_path)
+    return time.perf_counter() - start
+
+def calibrate(min_durability=1, db_path=None, sales=200, reads=200):
+    """
+    Mede cada perfil em uma cópia do banco e recomenda o mais rápido que respeita a durabilidade mínima.
+    Retorna (perfil_recomendado, {perfil: segundos}).
+    """
+
+    # Importação tardia: sales_logic importa este módulo
+    from . import sales_logic
+
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    timings = {}
+
+    with tempfile.TemporaryDirectory(prefix="vendas_calibracao_") as temp_dir:
+        for name, profile in PROFILES.items():
+
+            # Cada perfil roda em uma cópia nova, para não herdar o modo de journal do anterior
+            copy_path = Path(temp_dir) / f"{name}.db"
+
+            if db_path.exists():
+                source = sqlite3.connect(db_path)
+                target = sqlite3.connect(copy_path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                    source.close()
+
+            # A conexão ociosa da cópia é fechada antes de o diretório temporário ser apagado
+            try:
+                sales_logic.initialize_database(copy_path)
+                timings[name] = _run_workload(copy_path, name, sales, reads)
+
+            finally:
+                release_connections(copy_path)
+
+    # Mais rápido entre os perfis aceitáveis
+    eligible = [name for name, profile in PROFILES.items() if profile["durabilidade"] >= min_durability]
+    recommended = min(eligible, key=timings.get) if eligible else DEFAULT_PROFILE
+
+    return recommended, timings
+
+def main(argv=None):
+    """
+    Linha de comando: listar, escolher e calibrar perfis de desempenho.
+    """
+
+    # Importação tardia: sales_logic importa este módulo
+    from . import sales_logic
+
+    parser = argparse.ArgumentParser(description="Perfis de desempenho do banco de dados.")
+    parser.add_argument("--db", help="Banco de dados (padrão: data/planilhas.db).")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    subparsers.add_parser("listar", help="Lista os perfis e mostra o ativo.")
+
+    use_parser = subparsers.add_parser("usar", help="Define o perfil ativo.")
+    use_parser.add_argument("perfil", choices=list(PROFILES))
+
+    calibrate_parser = subparsers.add_parser("calibrar", help="Mede os perfis em uma cópia do banco.")
+    calibrate_parser.add_argument("--durabilidade", type=int, choices=(0, 1, 2), default=1,
+                                  help="Durabilidade mínima exigida (padrão: 1).")
+    calibrate_parser.add_argument("--aplicar", action="store_true", help="Ativa o perfil recomendado.")
+
+    args = parser.parse_args(argv)
+    db_path = Path(args.db) if args.db else sales_logic.DB_PATH
+    sales_logic.initialize_database(db_path)
+
+    # Executa o comando escolhido
+    if args.comando == "listar":
+        conn = sales_logic._connect(db_path)
+        try:
+            active = get_active_profile(conn)
+        finally:
+            conn.close()
+
+        for name, profile in PROFILES.items():
+            marker = "*" if name == active else " "
+            print(f"{marker} {name:<10} durabilidade={profile['durabilidade']}  {profile['descricao']}")
+        return
+
+    if args.comando == "calibrar":
+        recommended, timings = calibrate(args.durabilidade, db_path)
+
+        for name, elapsed in sorted(timings.items(), key=lambda item: item[1]):
+            print(f"  {name:<10} {elapsed:8.3f} s  (durabilidade {PROFILES[name]['durabilidade']})")
+        print(f"Perfil recomendado para durabilidade >= {args.durabilidade}: {recommended}")
+
+        if not args.aplicar:
+            return
+        args.perfil = recommended
+
+    conn = sales_logic._connect(db_path)
+    try:
+        set_active_profile(conn, args.perfil)
+    finally:
+        conn.close()
+    print(f"Perfil ativo: {args.perfil}")
+
+if __name__ == "__main__":
+    main()
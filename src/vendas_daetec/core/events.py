@@ -0,0 +1,123 @@
+import logging
+import threading
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Tipos de evento publicados pela camada core, com o formato de 'rows' de cada um:
+#   SELLER_ADDED / SELLER_DELETED:   [(id, nome)]                                      (como get_all_sellers)
+#   PRODUCT_ADDED / PRODUCT_DELETED: [(nome_vendedor, id, nome, preco)]                (como get_all_products);
+#                                    data: vendedor_id (None se as linhas forem de vendedores diferentes)
+#   PRODUCTS_UPDATED:                [(nome_vendedor, id, nome, preco)] com os valores novos; data: vendedor_id (idem)
+#   SALE_REGISTERED:                 [(venda_id, data_venda, nome_vendedor, valor_total)] (como get_sales_page);
+#                                    data: vendedor_id, cart_items, payments
+#   SALES_CLEARED:                   []
+#   BACKEND_CHANGED:                 []  (o banco padrão passou a outro armazenamento; recarregar tudo)
+SELLER_ADDED = "vendedor_adicionado"
+SELLER_DELETED = "vendedor_removido"
+PRODUCT_ADDED = "produto_adicionado"
+PRODUCT_DELETED = "produto_removido"
+PRODUCTS_UPDATED = "produtos_alterados"
+SALE_REGISTERED = "venda_registrada"
+SALES_CLEARED = "vendas_apagadas"
+BACKEND_CHANGED = "armazenamento_trocado"
+
+class ChangeEvent:
+    """
+    Alteração confirmada no banco: o tipo, as linhas afetadas e dados extras do tipo.
+    """
+
+    def __init__(self, kind, rows=(), **data):
+        """
+        Cria o evento.
+        """
+
+        # As linhas seguem o formato das consultas equivalentes de sales_logic
+        self.kind = kind
+        self.rows = list(rows)
+        self.data = data
+
+    def __repr__(self):
+        """
+        Representação curta para mensagens de depuração.
+        """
+
+        # Tipo e linhas
+        return f"ChangeEvent({self.kind!r}, {self.rows!r})"
+
+class EventBus:
+    """
+    Barramento publicar/assinar dentro do processo.
+    As funções inscritas são chamadas na thread que publicou o evento, sempre depois do COMMIT.
+    """
+
+    def __init__(self):
+        """
+        Inicializa o barramento sem inscritos.
+        """
+
+        # {tipo ou None (todos): [funções]}
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, callback, *kinds):
+        """
+        Inscreve 'callback(evento)' nos tipos informados (ou em todos, se nenhum for informado).
+        Retorna o próprio callback, para facilitar o cancelamento.
+        """
+
+        # Evita inscrever a mesma função duas vezes no mesmo tipo
+        with self._lock:
+            for kind in kinds or (None,):
+                callbacks = self._subscribers.setdefault(kind, [])
+                if callback not in callbacks:
+                    callbacks.append(callback)
+
+        return callback
+
+    def unsubscribe(self, callback):
+        """
+        Cancela todas as inscrições de 'callback'.
+        """
+
+        # Ignora funções que não estavam inscritas
+        with self._lock:
+            for callbacks in self._subscribers.values():
+                if callback in callbacks:
+                    callbacks.remove(callback)
+
+    def subscriber_count(self):
+        """
+        Número total de inscrições ativas (inscrições que só crescem indicam widgets destruídos sem cancelar a inscrição).
+        """
+
+        # Soma de todos os tipos
+        with self._lock:
+            return sum(len(callbacks) for callbacks in self._subscribers.values())
+
+    def publish(self, kind, rows=(), **data):
+        """
+        Cria e entrega um evento a todos os inscritos no tipo (e nos inscritos em todos os tipos).
+        A falha de um inscrito não impede a entrega aos demais.
+        """
+
+        # Copia a lista para permitir inscrições e cancelamentos durante a entrega
+        event = ChangeEvent(kind, rows, **data)
+
+        with self._lock:
+            callbacks = self._subscribers.get(kind, []) + self._subscribers.get(None, [])
+
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception("Erro ao entregar o evento '%s': %s", kind, e, extra={"evento": kind})
+
+        return event
+
+# Barramento compartilhado pela aplicação
+_bus = EventBus()
+subscribe = _bus.subscribe
+unsubscribe = _bus.unsubscribe
+publish = _bus.publish
+subscriber_count = _bus.subscriber_count
@@ -0,0 +1,219 @@
+import sqlite3
+import logging
+import threading
+
+from . import sales_logic, events
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+class SalesCounters:
+    """
+    Contadores de vendas por vendedor mantidos em memória.
+    São carregados uma única vez do banco e atualizados a cada venda registrada.
+    """
+
+    def __init__(self):
+        """
+        Inicializa os contadores vazios.
+        """
+
+        # Estado protegido por lock, pois vendas podem ser registradas fora da thread da interface
+        self._lock = threading.Lock()
+        self._sellers = {}
+        self._seller_names = {}
+        self.version = 0
+        self.seeded = False
+
+    def _seller(self, vendedor_id):
+        """
+        Retorna (criando se necessário) o contador de um vendedor.
+        """
+
+        # Cada vendedor tem receita, unidades, número de vendas e o total por método de pagamento
+        counter = self._sellers.get(vendedor_id)
+
+        if counter is None:
+            counter = {"receita": 0.0, "unidades": 0, "vendas": 0, "pagamentos": {}}
+            self._sellers[vendedor_id] = counter
+
+        return counter
+
+    def seed(self):
+        """
+        Carrega os totais atuais a partir do banco de dados (uma única consulta por agregado).
+        """
+
+        # Agrega o histórico existente
+        conn = None
+
+        try:
+            conn = sales_logic._connect()
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT id, nome FROM vendedores")
+            names = dict(cursor.fetchall())
+
+            cursor.execute("SELECT vendedor_id, SUM(valor_total), COUNT(*) FROM vendas GROUP BY vendedor_id")
+            totals = cursor.fetchall()
+
+            cursor.execute("SELECT vendedor_id, SUM(quantidade) FROM venda_itens GROUP BY vendedor_id")
+            units = cursor.fetchall()
+
+            cursor.execute("""
+                SELECT v.vendedor_id, vp.metodo, SUM(vp.valor)
+                FROM venda_pagamentos vp
+                JOIN vendas v ON v.id = vp.venda_id
+                GROUP BY v.vendedor_id, vp.metodo
+            """)
+            payments = cursor.fetchall()
+
+        except sqlite3.Error as e:
+            logger.error("Erro ao carregar contadores de vendas: %s", e)
+            return False
+
+        finally:
+            if conn:
+                conn.close()
+
+        # Substitui o estado atual pelos totais carregados
+        with self._lock:
+            self._sellers = {}
+            self._seller_names = names
+
+            for vendedor_id, receita, vendas in totals:
+                counter = self._seller(vendedor_id)
+                counter["receita"] = receita or 0.0
+                counter["vendas"] = vendas
+
+            for vendedor_id, unidades in units:
+                self._seller(vendedor_id)["unidades"] = unidades or 0
+
+            for vendedor_id, metodo, valor in payments:
+                self._seller(vendedor_id)["pagamentos"][metodo] = valor or 0.0
+
+            self.seeded = True
+            self.version += 1
+
+        return True
+
+    def record_sale(self, venda_id, vendedor_id, valor_total, cart_items, payments):
+        """
+        Atualiza os contadores com uma venda recém-registrada, sem consultar o banco.
+        """
+
+        # O custo depende apenas do tamanho do carrinho, nunca do histórico
+        with self._lock:
+            counter = self._seller(vendedor_id)
+            counter["receita"] += valor_total
+            counter["vendas"] += 1
+            counter["unidades"] += sum(item["quantidade"] for item in cart_items)
+
+            for pagamento in payments:
+                metodo = pagamento["metodo"]
+                counter["pagamentos"][metodo] = counter["pagamentos"].get(metodo, 0.0) + pagamento["valor"]
+
+            self.version += 1
+
+    def handle_event(self, event):
+        """
+        Aplica um evento do barramento: vendas, novos vendedores, limpeza do histórico e troca de armazenamento.
+        """
+
+        # Cada tipo de evento altera só a parte correspondente dos contadores
+        if event.kind == events.SALE_REGISTERED:
+            for venda_id, _, _, valor_total in event.rows:
+                self.record_sale(venda_id, event.data["vendedor_id"], valor_total, event.data["cart_items"], event.data["payments"])
+
+        elif event.kind == events.SELLER_ADDED:
+            with self._lock:
+                self._seller_names.update(event.rows)
+                self.version += 1
+
+        elif event.kind == events.SALES_CLEARED:
+            self.reset()
+
+        elif event.kind == events.BACKEND_CHANGED:
+            self.seed()
+
+    def load_seller_names(self):
+        """
+        Recarrega apenas os nomes dos vendedores (ex: após cadastrar um novo vendedor).
+        """
+
+        # Consulta somente o cadastro de vendedores, nunca o histórico de vendas
+        conn = None
+
+        try:
+            conn = sales_logic._connect()
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, nome FROM vendedores")
+            names = dict(cursor.fetchall())
+
+        except sqlite3.Error as e:
+            logger.error("Erro ao carregar nomes dos vendedores: %s", e)
+            return False
+
+        finally:
+            if conn:
+                conn.close()
+
+        # Atualiza o mapa de nomes
+        with self._lock:
+            self._seller_names = names
+            self.version += 1
+
+        return True
+
+    def reset(self):
+        """
+        Zera os contadores (usado quando o histórico de vendas é apagado).
+        """
+
+        # Mantém os nomes dos vendedores, descartando apenas os totais
+        with self._lock:
+            self._sellers = {}
+            self.version += 1
+
+    def leaderboard(self):
+        """
+        Retorna uma lista de dicionários por vendedor, ordenada pela receita (maior primeiro).
+        """
+
+        # Copia o estado sob o lock para a interface trabalhar sem bloquear novas vendas
+        with self._lock:
+            rows = []
+
+            for vendedor_id, counter in self._sellers.items():
+                rows.append({
+                    "vendedor_id": vendedor_id,
+                    "nome": self._seller_names.get(vendedor_id, f"Vendedor {vendedor_id}"),
+                    "receita": counter["receita"],
+                    "unidades": counter["unidades"],
+                    "vendas": counter["vendas"],
+                    "pagamentos": dict(counter["pagamentos"])
+                })
+
+        rows.sort(key=lambda row: (-row["receita"], row["nome"]))
+        return rows
+
+# Instância compartilhada pela aplicação
+_counters = None
+_counters_lock = threading.Lock()
+
+def get_counters():
+    """
+    Retorna os contadores compartilhados, carregando-os do banco na primeira chamada.
+    """
+
+    # Carrega uma única vez e passa a ouvir os eventos do barramento
+    global _counters
+
+    with _counters_lock:
+        if _counters is None:
+            _counters = SalesCounters()
+            _counters.seed()
+            events.subscribe(_counters.handle_event, events.SALE_REGISTERED, events.SELLER_ADDED, events.SALES_CLEARED,
+                             events.BACKEND_CHANGED)
+
+    return _counters
@@ -0,0 +1,382 @@
+import sqlite3
+import os
+import math
+import time
+import random
+import tempfile
+import logging
+import argparse
+from uuid import uuid4
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from . import sales_logic, db_profiles
+
+# Métodos de pagamento sorteados nos carrinhos (os mesmos do caixa)
+PAYMENT_METHODS = sales_logic.PAYMENT_METHODS
+
+# Estratégias de gravação comparadas:
+# 'venda'    = o caminho real da interface: sales_logic.register_sale para cada vendedor do carrinho
+#              (transação adiada e a espera padrão do SQLite pela trava);
+# 'imediata' = as mesmas vendas, uma transação BEGIN IMMEDIATE por vendedor com novas tentativas explícitas;
+# 'carrinho' = todas as vendas do carrinho em uma única transação BEGIN IMMEDIATE.
+STRATEGIES = ("venda", "imediata", "carrinho")
+
+# Espera máxima pela trava de escrita em cada transação (o mesmo timeout padrão de sqlite3.connect usado por register_sale)
+LOCK_TIMEOUT = 5.0
+
+def _create_catalog(db_path, sellers, products_per_seller, rng):
+    """
+    Cria vendedores e produtos de teste no banco temporário.
+    Retorna {vendedor_id: [(produto_id, nome, preco), ...]}.
+    """
+
+    # Inserção direta em uma única transação
+    conn = sales_logic._connect(db_path)
+
+    try:
+        cursor = conn.cursor()
+        catalog = {}
+        product_number = 0
+
+        for seller_number in range(1, sellers + 1):
+            cursor.execute("INSERT INTO vendedores (nome) VALUES (?)", (f"Vendedor {seller_number:02d}",))
+            seller_id = cursor.lastrowid
+            catalog[seller_id] = []
+
+            for _ in range(products_per_seller):
+                product_number += 1
+                product = (f"PROD-{product_number:04d}", f"Produto {product_number}", round(rng.uniform(2, 30), 2))
+                cursor.execute("INSERT INTO produtos (id, nome, preco, vendedor_id) VALUES (?, ?, ?, ?)", product + (seller_id,))
+                catalog[seller_id].append(product)
+
+        conn.commit()
+        return catalog
+
+    finally:
+        conn.close()
+
+def _random_checkout(rng, catalog):
+    """
+    Monta um carrinho como o do diálogo de venda: um a três vendedores, pagamento integral ou fracionado.
+    Retorna uma lista de (vendedor_id, valor_total, cart_items, payments), uma entrada por vendedor.
+    """
+
+    # Itens do carrinho agrupados por vendedor
+    seller_ids = rng.sample(list(catalog), k=min(len(catalog), rng.choice((1, 1, 2, 3))))
+    sales = []
+
+    for seller_id in seller_ids:
+        cart_items = []
+
+        for produto_id, nome, preco in rng.sample(catalog[seller_id], k=min(len(catalog[seller_id]), rng.randint(1, 4))):
+            quantidade = rng.randint(1, 3)
+            cart_items.append({"produto_id": produto_id, "nome": nome, "quantidade": quantidade, "preco_unitario": preco})
+
+        sales.append([seller_id, sum(item["quantidade"] * item["preco_unitario"] for item in cart_items), cart_items])
+
+    # Pagamentos divididos proporcionalmente entre os vendedores, como em _finish_sale
+    total = sum(valor for _, valor, _ in sales)
+    methods = rng.sample(PAYMENT_METHODS, k=rng.choice((1, 1, 2)))
+    shares = [total / len(methods)] * len(methods)
+
+    return [
+        (seller_id, valor, cart_items, [{"metodo": method, "valor": valor / total * share} for method, share in zip(methods, shares)])
+        for seller_id, valor, cart_items in sales
+    ]
+
+def _register_per_sale(sales, lock, atendimento):
+    """
+    Estratégia 'venda': chama sales_logic.register_sale para cada vendedor do carrinho, como o diálogo de venda.
+    A espera pela trava acontece dentro do SQLite e não é separável da latência; o que se mede é o tempo das
+    chamadas que falharam ('espera') e quantas falharam antes do timeout ('sem_espera': o SQLITE_BUSY imediato
+    da transação adiada que precisa passar de leitura para escrita enquanto outro processo grava).
+    Retorna o índice da primeira venda que falhou, ou None se todas foram gravadas.
+    """
+
+    # Cada venda em sua própria transação, pelo mesmo código da interface
+    for index, (seller_id, valor, cart_items, payments) in enumerate(sales):
+        start = time.perf_counter()
+
+        if not sales_logic.register_sale(seller_id, valor, cart_items, payments, atendimento=atendimento):
+            elapsed = time.perf_counter() - start
+            lock["espera"] += elapsed
+
+            if elapsed < LOCK_TIMEOUT:
+                lock["sem_espera"] += 1
+
+            return index
+
+    return None
+
+def _begin_immediate(conn, lock):
+    """
+    Inicia uma transação BEGIN IMMEDIATE com busy_timeout=0 e novas tentativas explícitas até LOCK_TIMEOUT.
+    Todo o tempo até obter a trava de escrita é somado em lock["espera"].
+    Levanta sqlite3.OperationalError se a trava não for obtida.
+    """
+
+    # Sem espera dentro do SQLite: cada "database is locked" volta aqui e o tempo fica mensurável
+    conn.execute("PRAGMA busy_timeout = 0")
+    start = time.perf_counter()
+    pause = 0.0005
+
+    try:
+        while True:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+
+            except sqlite3.OperationalError:
+                if time.perf_counter() - start + pause > LOCK_TIMEOUT:
+                    raise
+
+                time.sleep(pause)
+                pause = min(pause * 2, 0.01)
+
+    finally:
+        lock["espera"] += time.perf_counter() - start
+
+def _write_sales(sales, lock, atendimento):
+    """
+    Grava as vendas em uma única transação BEGIN IMMEDIATE, com a espera pela trava medida por _begin_immediate.
+    Retorna True se a transação foi confirmada.
+    """
+
+    # Mesmas inserções de register_sale (_insert_sale), mas com a trava de escrita obtida logo no início
+    conn = None
+
+    try:
+        conn = sales_logic._connect()
+        conn.isolation_level = None
+        conn.execute("PRAGMA foreign_keys = ON")
+        _begin_immediate(conn, lock)
+        cursor = conn.cursor()
+
+        for seller_id, valor, cart_items, payments in sales:
+            sales_logic._insert_sale(cursor, seller_id, valor, cart_items, payments, atendimento=atendimento)
+
+        cursor.execute("COMMIT")
+        return True
+
+    except sqlite3.Error:
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
+        return False
+
+    finally:
+        if conn:
+            conn.close()
+
+def _write_immediate_per_sale(sales, lock, atendimento):
+    """
+    Estratégia 'imediata': uma transação BEGIN IMMEDIATE por vendedor do carrinho.
+    Retorna o índice da primeira venda que falhou, ou None se todas foram gravadas.
+    """
+
+    # Cada venda espera pela trava separadamente
+    for index, sale in enumerate(sales):
+        if not _write_sales([sale], lock, atendimento):
+            return index
+
+    return None
+
+def _write_per_cart(sales, lock, atendimento):
+    """
+    Estratégia 'carrinho': grava todas as vendas do carrinho em uma única transação.
+    Retorna 0 se a transação falhou, ou None se foi confirmada.
+    """
+
+    # Uma única espera pela trava para o carrinho inteiro
+    return None if _write_sales(sales, lock, atendimento) else 0
+
+# Função de gravação de cada estratégia
+WRITERS = {"venda": _register_per_sale, "imediata": _write_immediate_per_sale, "carrinho": _write_per_cart}
+
+def _worker(db_path, catalog, strategy, duration, checkouts, retries, seed, start_at):
+    """
+    Processo de carga: registra carrinhos até acabar o tempo ou o número de checkouts.
+    Retorna um dicionário com as latências (segundos) e os contadores do processo.
+    """
+
+    # Cada processo grava no banco temporário pelo caminho normal da aplicação
+    sales_logic.DB_PATH = Path(db_path)
+    write = WRITERS[strategy]
+    rng = random.Random(seed)
+    latencies = []
+    stats = {"checkouts": 0, "vendas": 0, "erros": 0, "tentativas_extras": 0}
+    lock = {"espera": 0.0, "sem_espera": 0}
+
+    # Todos os processos começam juntos
+    time.sleep(max(0.0, start_at - time.time()))
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    # Os erros de gravação já são contados aqui; o registro do processo fica em silêncio durante a carga
+    logging.getLogger("vendas_daetec").setLevel(logging.CRITICAL)
+
+    while True:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if checkouts is not None and stats["checkouts"] >= checkouts:
+            break
+
+        sales = _random_checkout(rng, catalog)
+        sale_count = len(sales)
+        atendimento = uuid4().hex
+        start = time.perf_counter()
+        failed_at = write(sales, lock, atendimento)
+
+        # Nova tentativa com espera crescente; só o que falhou é regravado
+        for attempt in range(retries):
+            if failed_at is None:
+                break
+
+            stats["tentativas_extras"] += 1
+            sales = sales[failed_at:]
+            time.sleep(0.005 * (2 ** attempt) * (1 + rng.random()))
+            failed_at = write(sales, lock, atendimento)
+
+        latencies.append(time.perf_counter() - start)
+        stats["checkouts"] += 1
+
+        if failed_at is None:
+            stats["vendas"] += sale_count
+        else:
+            stats["vendas"] += sale_count - len(sales) + failed_at
+            stats["erros"] += 1
+
+    stats["segundos"] = time.perf_counter() - started
+    stats["latencias"] = latencies
+    stats["espera_lock"] = lock["espera"]
+    stats["falhas_sem_espera"] = lock["sem_espera"]
+    return stats
+
+def _percentile(sorted_values, fraction):
+    """
+    Percentil pelo método do posto mais próximo em uma lista já ordenada.
+    """
+
+    # Lista vazia não tem percentil
+    if not sorted_values:
+        return 0.0
+
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run_load_test(processes=4, strategy="venda", profile=db_profiles.DEFAULT_PROFILE, duration=10.0, checkouts=None,
+                  retries=3, sellers=8, products_per_seller=20, seed=0):
+    """
+    Executa um teste de carga de checkouts em um banco temporário.
+
+    :param processes: Número de processos gravando ao mesmo tempo.
+    :param strategy: 'venda' (register_sale por vendedor), 'imediata' (BEGIN IMMEDIATE por vendedor)
+                     ou 'carrinho' (uma transação por carrinho).
+    :param profile: Perfil de desempenho do banco (ver db_profiles.PROFILES).
+    :param duration: Duração em segundos (ignorada se 'checkouts' for informado).
+    :param checkouts: Número fixo de checkouts por processo.
+    :param retries: Tentativas extras após uma falha.
+    Retorna um dicionário com vazão, percentis de latência, erros, novas tentativas, espera por lock e falhas sem espera.
+    """
+
+    # Valida a estratégia antes de criar o banco
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estratégia desconhecida: {strategy}. Opções: {', '.join(STRATEGIES)}")
+
+    with tempfile.TemporaryDirectory(prefix="vendas_carga_") as temp_dir:
+        db_path = Path(temp_dir) / "planilhas.db"
+
+        # Banco novo com o perfil pedido e um catálogo de teste
+        sales_logic.initialize_database(db_path)
+
+        conn = sales_logic._connect(db_path)
+        try:
+            db_profiles.set_active_profile(conn, profile)
+        finally:
+            conn.close()
+
+        catalog = _create_catalog(db_path, sellers, products_per_seller, random.Random(seed))
+
+        # Processos de carga com início sincronizado
+        start_at = time.time() + 0.5
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(_worker, str(db_path), catalog, strategy, None if checkouts else duration,
+                                checkouts, retries, seed * 1000 + index, start_at)
+                for index in range(processes)
+            ]
+            results = [future.result() for future in futures]
+
+        # Conexão ociosa do WAL (ver db_profiles) fechada antes de apagar o diretório
+        db_profiles.release_connections(db_path)
+
+    # Consolida os resultados de todos os processos
+    latencies = sorted(latency for result in results for latency in result["latencias"])
+    total_checkouts = sum(result["checkouts"] for result in results)
+    errors = sum(result["erros"] for result in results)
+    elapsed = max(max(result["segundos"] for result in results), 1e-9)
+
+    return {
+        "processos": processes,
+        "estrategia": strategy,
+        "perfil": profile,
+        "segundos": elapsed,
+        "checkouts": total_checkouts,
+        "vendas": sum(result["vendas"] for result in results),
+        "checkouts_por_segundo": (total_checkouts - errors) / elapsed,
+        "p50": _percentile(latencies, 0.50),
+        "p95": _percentile(latencies, 0.95),
+        "p99": _percentile(latencies, 0.99),
+        "erros": errors,
+        "tentativas_extras": sum(result["tentativas_extras"] for result in results),
+        "espera_lock": sum(result["espera_lock"] for result in results),
+        "falhas_sem_espera": sum(result["falhas_sem_espera"] for result in results)
+    }
+
+def print_results(results):
+    """
+    Mostra os resultados de um ou mais testes em forma de tabela.
+    """
+
+    # Latências em milissegundos; em 'venda', "Lock s" é o tempo das chamadas a register_sale que falharam
+    print(f"{'Perfil':<10} {'Estratégia':<10} {'Proc.':>5} {'Chk/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'Erros':>6} {'Retent.':>7} {'Lock s':>7} {'Sem esp.':>8}")
+
+    for result in results:
+        print(f"{result['perfil']:<10} {result['estrategia']:<10} {result['processos']:>5} "
+              f"{result['checkouts_por_segundo']:>8.1f} {result['p50'] * 1000:>8.1f} {result['p95'] * 1000:>8.1f} "
+              f"{result['p99'] * 1000:>8.1f} {result['erros']:>6} {result['tentativas_extras']:>7} {result['espera_lock']:>7.2f} "
+              f"{result['falhas_sem_espera']:>8}")
+
+def main(argv=None):
+    """
+    Linha de comando: mede quantos checkouts por segundo o banco suporta.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Teste de carga de checkouts em um banco temporário.")
+    parser.add_argument("--processos", type=int, nargs="+", default=[os.cpu_count() or 1],
+                        help="Número(s) de processos simultâneos (padrão: núcleos da máquina).")
+    parser.add_argument("--estrategia", choices=STRATEGIES, nargs="+", default=["venda"])
+    parser.add_argument("--perfil", choices=list(db_profiles.PROFILES), nargs="+", default=[db_profiles.DEFAULT_PROFILE])
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos de carga por cenário (padrão: 10).")
+    parser.add_argument("--checkouts", type=int, help="Checkouts por processo (substitui --duracao).")
+    parser.add_argument("--tentativas", type=int, default=3, help="Tentativas extras após falha (padrão: 3).")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # Um cenário para cada combinação de perfil, estratégia e número de processos
+    results = []
+
+    for profile in args.perfil:
+        for strategy in args.estrategia:
+            for processes in args.processos:
+                results.append(run_load_test(processes, strategy, profile, args.duracao, args.checkouts,
+                                             args.tentativas, seed=args.semente))
+
+    print_results(results)
+    return results
+
+if __name__ == "__main__":
+    main()
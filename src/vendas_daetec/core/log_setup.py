@@ -0,0 +1,153 @@
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import datetime
+import threading
+import logging.handlers
+from pathlib import Path
+
+from . import sales_logic
+
+# Arquivos rotativos em logs/, ao lado de data/
+LOG_FILE_NAME = "vendas.log"
+LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# Atributos padrão de LogRecord; o restante veio de 'extra' e vira campo do registro
+_STANDARD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+
+# Estado da configuração ativa
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """
+    Um objeto JSON por linha: horário, nível, módulo, thread, mensagem e os campos passados em 'extra'
+    (ex: venda_id, vendedor_id, duracao_ms).
+    """
+
+    def format(self, record):
+        """
+        Serializa o registro.
+        """
+
+        # Campos fixos seguidos dos campos do evento
+        entry = {
+            "hora": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "modulo": record.name,
+            "thread": record.threadName,
+            "mensagem": record.getMessage()
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+
+        if record.exc_text or record.exc_info:
+            entry["excecao"] = record.exc_text or self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que preserva os campos do evento e guarda a exceção à parte (em vez de juntá-la à mensagem).
+    """
+
+    def prepare(self, record):
+        """
+        Resolve a mensagem e a exceção na thread de quem registrou; o resto fica para a thread de fundo.
+        """
+
+        # Argumentos e tracebacks podem não sobreviver até a gravação
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+def default_log_dir():
+    """
+    Diretório padrão dos logs: 'logs' ao lado de 'data'.
+    """
+
+    # Acompanha DB_PATH, inclusive no executável do PyInstaller
+    return sales_logic.DB_PATH.parent.parent / "logs"
+
+def configure_logging(log_dir=None, level=logging.INFO, console=None):
+    """
+    Liga o registro estruturado: quem registra só coloca o evento em uma fila; uma thread de fundo
+    grava o arquivo rotativo (JSON por linha) e, se houver console, mostra a mensagem.
+    Chamadas repetidas não fazem nada. Retorna o caminho do arquivo de log.
+
+    :param log_dir: Diretório dos arquivos (padrão: logs/ ao lado de data/).
+    :param console: Mostra as mensagens no stderr (padrão: apenas se houver um stderr, o que não acontece no executável sem console).
+    """
+
+    # Uma única configuração por processo
+    global _listener, _queue_handler
+
+    with _setup_lock:
+        log_dir = Path(log_dir) if log_dir else default_log_dir()
+        log_path = log_dir / LOG_FILE_NAME
+
+        if _listener is not None:
+            return log_path
+
+        # Handlers de saída: executados apenas pela thread do QueueListener
+        log_dir.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                                            encoding="utf-8", delay=True)
+        file_handler.setFormatter(JsonFormatter())
+        handlers = [file_handler]
+
+        if console is None:
+            console = sys.stderr is not None
+
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter("%(message)s"))
+            handlers.append(console_handler)
+
+        # Quem registra não espera por disco: put_nowait em uma fila sem limite
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+        # No logger raiz: também recebe os módulos executados com 'python -m' (logger "__main__")
+        _queue_handler = _QueueHandler(log_queue)
+        logger = logging.getLogger()
+        logger.setLevel(level)
+        logger.addHandler(_queue_handler)
+
+        atexit.register(shutdown_logging)
+        return log_path
+
+def shutdown_logging():
+    """
+    Grava os registros pendentes e encerra a thread de fundo.
+    """
+
+    # stop() esvazia a fila antes de terminar
+    global _listener, _queue_handler
+
+    with _setup_lock:
+        if _listener is None:
+            return
+
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+
+        for handler in _listener.handlers:
+            handler.close()
+
+        _listener = None
+        _queue_handler = None
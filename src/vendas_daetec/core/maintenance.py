@@ -0,0 +1,305 @@
+import sqlite3
+import os
+import time
+import logging
+import argparse
+import threading
+from pathlib import Path
+
+from . import sales_logic, events
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Páginas liberadas por chamada de PRAGMA incremental_vacuum e limites padrão de cada passo ocioso
+VACUUM_CHUNK_PAGES = 64
+IDLE_MAX_PAGES = 512
+IDLE_TIME_BUDGET = 0.2
+
+# Valores de PRAGMA auto_vacuum
+AUTO_VACUUM_MODES = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+
+# ANALYZE pendente após alterações em massa (ex: histórico apagado)
+_analyze_pending = threading.Event()
+_watching = False
+_watch_lock = threading.Lock()
+
+def _fragmentation(cursor):
+    """
+    Fração das páginas de tabelas e índices fora de sequência no arquivo e fração de bytes sem uso nelas.
+    Retorna (fragmentacao, bytes_sem_uso) ou (None, None) se o SQLite não tiver a tabela virtual dbstat.
+    """
+
+    # Percorre cada árvore na ordem lógica (path) e conta os saltos de página
+    try:
+        cursor.execute("SELECT name, pageno, unused, pgsize FROM dbstat ORDER BY name, path")
+    except sqlite3.OperationalError:
+        return None, None
+
+    previous_name = previous_page = None
+    jumps = pages = unused = total = 0
+
+    for name, pageno, page_unused, page_size in cursor:
+        if name == previous_name and pageno != previous_page + 1:
+            jumps += 1
+        previous_name, previous_page = name, pageno
+        pages += 1
+        unused += page_unused or 0
+        total += page_size or 0
+
+    return (jumps / pages if pages else 0.0), (unused / total if total else 0.0)
+
+def get_storage_stats(db_path=None):
+    """
+    Retorna um dicionário com o tamanho do arquivo, páginas, páginas livres, modo de auto_vacuum e fragmentação.
+    """
+
+    # Tamanho em disco inclui o arquivo WAL, se existir
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    wal_path = Path(f"{db_path}-wal")
+    conn = None
+
+    try:
+        conn = sales_logic._connect(db_path)
+        cursor = conn.cursor()
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+        freelist = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+        fragmentation, unused = _fragmentation(cursor)
+
+        return {
+            "tamanho_arquivo": os.path.getsize(db_path) + (os.path.getsize(wal_path) if wal_path.exists() else 0),
+            "tamanho_pagina": page_size,
+            "paginas": page_count,
+            "paginas_livres": freelist,
+            "auto_vacuum": AUTO_VACUUM_MODES.get(auto_vacuum, str(auto_vacuum)),
+            "fragmentacao": fragmentation,
+            "bytes_sem_uso": unused
+        }
+
+    finally:
+        if conn:
+            conn.close()
+
+def analyze(db_path=None, full=False):
+    """
+    Atualiza as estatísticas do planejador de consultas.
+    Com full=True executa ANALYZE completo; senão PRAGMA optimize, que só reanalisa as tabelas que precisam.
+    """
+
+    # 0x10002: analisa todas as tabelas com estatísticas desatualizadas, mesmo em uma conexão recém-aberta
+    conn = sales_logic._connect(db_path)
+
+    try:
+        conn.execute("ANALYZE" if full else "PRAGMA optimize = 0x10002")
+        conn.commit()
+
+    finally:
+        conn.close()
+
+def enable_incremental_vacuum(db_path=None):
+    """
+    Converte o banco para auto_vacuum=INCREMENTAL (exige um VACUUM completo, que reescreve o arquivo).
+    Retorna True se a conversão foi feita, False se o banco já estava no modo incremental.
+    """
+
+    # O modo só muda de NONE para INCREMENTAL com um VACUUM logo em seguida
+    conn = sales_logic._connect(db_path)
+
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+
+    finally:
+        conn.close()
+
+def incremental_vacuum(db_path=None, max_pages=IDLE_MAX_PAGES, time_budget=None):
+    """
+    Devolve ao sistema até 'max_pages' páginas livres, em passos pequenos, parando se o tempo acabar.
+    Retorna a quantidade de páginas liberadas. Não faz nada se o banco não estiver em auto_vacuum=INCREMENTAL.
+    """
+
+    # Passos curtos mantêm cada transação de escrita breve, sem travar as vendas por muito tempo
+    conn = sales_logic._connect(db_path)
+    released = 0
+    deadline = time.perf_counter() + time_budget if time_budget else None
+
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+
+        while released < max_pages:
+            freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+            if freelist == 0 or (deadline is not None and time.perf_counter() >= deadline):
+                break
+
+            # executescript percorre o comando até o fim; execute liberaria uma única página por chamada
+            step = min(VACUUM_CHUNK_PAGES, max_pages - released, freelist)
+            conn.executescript(f"PRAGMA incremental_vacuum({int(step)})")
+            released += freelist - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        return released
+
+    finally:
+        conn.close()
+
+def run_maintenance(db_path=None, full=False, max_pages=None, time_budget=None):
+    """
+    Manutenção completa: estatísticas do planejador e recuperação de espaço, com medições antes e depois.
+
+    :param full: Executa ANALYZE completo e converte o banco para auto_vacuum=INCREMENTAL se necessário.
+    :param max_pages: Limite de páginas liberadas (padrão: todas).
+    :param time_budget: Tempo máximo, em segundos, para liberar páginas (padrão: sem limite).
+    Retorna {"antes": stats, "depois": stats, "etapas": [descrições]} ou None em caso de erro.
+    """
+
+    # Mede, executa cada etapa e mede de novo
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    steps = []
+
+    try:
+        before = get_storage_stats(db_path)
+
+        if full and before["auto_vacuum"] != "INCREMENTAL":
+            enable_incremental_vacuum(db_path)
+            steps.append("Banco convertido para auto_vacuum=INCREMENTAL (VACUUM completo).")
+
+        analyze(db_path, full=full or _analyze_pending.is_set())
+        _analyze_pending.clear()
+        steps.append("Estatísticas do planejador atualizadas.")
+
+        released = incremental_vacuum(db_path, max_pages or before["paginas"], time_budget)
+        if released:
+            steps.append(f"{released} página(s) livre(s) devolvida(s) ao sistema.")
+
+        after = get_storage_stats(db_path)
+
+    except sqlite3.Error as e:
+        logger.error("Erro na manutenção do banco de dados: %s", e)
+        return None
+
+    return {"antes": before, "depois": after, "etapas": steps}
+
+def idle_step(db_path=None, max_pages=IDLE_MAX_PAGES, time_budget=IDLE_TIME_BUDGET):
+    """
+    Um passo curto de manutenção para momentos ociosos: ANALYZE pendente e algumas páginas livres.
+    Retorna True se ainda há trabalho para os próximos passos.
+    """
+
+    # Cada passo é limitado em páginas e em tempo
+    try:
+        if _analyze_pending.is_set():
+            _analyze_pending.clear()
+            analyze(db_path, full=True)
+
+        incremental_vacuum(db_path, max_pages, time_budget)
+        return needs_maintenance(db_path)
+
+    except sqlite3.Error as e:
+        logger.error("Erro na manutenção em segundo plano: %s", e)
+        return False
+
+def needs_maintenance(db_path=None):
+    """
+    Indica se há ANALYZE pendente ou páginas livres a devolver (apenas no modo incremental).
+    """
+
+    # Consulta barata: dois PRAGMAs
+    if _analyze_pending.is_set():
+        return True
+
+    conn = sales_logic._connect(db_path)
+
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2 and conn.execute("PRAGMA freelist_count").fetchone()[0] > 0
+
+    finally:
+        conn.close()
+
+def _on_bulk_change(event):
+    """
+    Inscrito no barramento: depois de uma alteração em massa, as estatísticas precisam ser refeitas.
+    """
+
+    # O ANALYZE acontece no próximo passo de manutenção
+    _analyze_pending.set()
+
+def watch_bulk_changes():
+    """
+    Passa a marcar ANALYZE pendente sempre que o histórico de vendas for apagado.
+    """
+
+    # Inscreve uma única vez
+    global _watching
+
+    with _watch_lock:
+        if not _watching:
+            events.subscribe(_on_bulk_change, events.SALES_CLEARED)
+            _watching = True
+
+def _format_size(size):
+    """
+    Formata bytes em KB/MB.
+    """
+
+    # Unidade mais legível
+    return f"{size / 1024 / 1024:.2f} MB" if size >= 1024 * 1024 else f"{size / 1024:.1f} KB"
+
+def format_report(result):
+    """
+    Texto com as medições antes e depois da manutenção.
+    """
+
+    # Uma linha por medida
+    lines = list(result["etapas"])
+
+    def percent(value):
+        return "n/d" if value is None else f"{value * 100:.1f}%"
+
+    for label, key in (("Antes", "antes"), ("Depois", "depois")):
+        stats = result[key]
+        lines.append(
+            f"{label}: {_format_size(stats['tamanho_arquivo'])}, {stats['paginas']} páginas, "
+            f"{stats['paginas_livres']} livres, fragmentação {percent(stats['fragmentacao'])}, "
+            f"bytes sem uso {percent(stats['bytes_sem_uso'])}, auto_vacuum {stats['auto_vacuum']}"
+        )
+
+    return "\n".join(lines)
+
+def main(argv=None):
+    """
+    Linha de comando: manutenção do banco sem abrir a interface.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Manutenção do banco de dados (ANALYZE e recuperação de espaço).")
+    parser.add_argument("--db", help="Banco de dados (padrão: data/planilhas.db).")
+    parser.add_argument("--completa", action="store_true",
+                        help="ANALYZE completo e conversão para auto_vacuum=INCREMENTAL (reescreve o arquivo).")
+    parser.add_argument("--paginas", type=int, help="Máximo de páginas livres a devolver (padrão: todas).")
+    parser.add_argument("--tempo", type=float, help="Tempo máximo em segundos para devolver páginas.")
+    parser.add_argument("--estatisticas", action="store_true", help="Apenas mostra as medições, sem alterar nada.")
+    args = parser.parse_args(argv)
+
+    db_path = Path(args.db) if args.db else sales_logic.DB_PATH
+    sales_logic.initialize_database(db_path)
+
+    # Somente leitura das medições
+    if args.estatisticas:
+        for key, value in get_storage_stats(db_path).items():
+            print(f"  {key}: {value}")
+        return
+
+    result = run_maintenance(db_path, args.completa, args.paginas, args.tempo)
+
+    if result is not None:
+        print(format_report(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import sqlite3
+import os
+import time
+import logging
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from . import sales_logic
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+def _open_read_only(db_path):
+    """
+    Abre uma conexão somente leitura, própria de cada processo.
+    """
+
+    # O modo 'ro' impede qualquer escrita acidental a partir dos processos auxiliares
+    return sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+
+def _aggregate_sellers(db_path, seller_ids):
+    """
+    Processo auxiliar: calcula os agregados de um grupo de vendedores.
+    Retorna {vendedor_id: (produtos_vendidos, pagamentos)}.
+    """
+
+    # Cada processo usa sua própria conexão
+    conn = _open_read_only(db_path)
+
+    try:
+        cursor = conn.cursor()
+        return {seller_id: sales_logic._fetch_seller_aggregates(cursor, seller_id) for seller_id in seller_ids}
+
+    finally:
+        conn.close()
+
+def _aggregate_range(db_path, first_id, last_id):
+    """
+    Processo auxiliar: calcula os agregados parciais das vendas com ID no intervalo [first_id, last_id].
+    Retorna ({vendedor_id: {(produto_id, nome): quantidade}}, {vendedor_id: {metodo: valor}}).
+    """
+
+    # Cada processo usa sua própria conexão
+    conn = _open_read_only(db_path)
+
+    try:
+        cursor = conn.cursor()
+        produtos = {}
+        pagamentos = {}
+
+        # Quantidades por vendedor e produto no intervalo
+        cursor.execute("""
+            SELECT vendedor_id, produto_id, produto_nome, SUM(quantidade)
+            FROM venda_itens
+            WHERE venda_id BETWEEN ? AND ?
+            GROUP BY vendedor_id, produto_id, produto_nome
+        """, (first_id, last_id))
+
+        for vendedor_id, produto_id, produto_nome, quantidade in cursor:
+            produtos.setdefault(vendedor_id, {})[(produto_id, produto_nome)] = quantidade
+
+        # Pagamentos por vendedor e método no intervalo
+        cursor.execute("""
+            SELECT v.vendedor_id, vp.metodo, SUM(vp.valor)
+            FROM venda_pagamentos vp
+            JOIN vendas v ON v.id = vp.venda_id
+            WHERE vp.venda_id BETWEEN ? AND ?
+            GROUP BY v.vendedor_id, vp.metodo
+        """, (first_id, last_id))
+
+        for vendedor_id, metodo, valor in cursor:
+            pagamentos.setdefault(vendedor_id, {})[metodo] = valor
+
+        return produtos, pagamentos
+
+    finally:
+        conn.close()
+
+def _merge_ranges(partials):
+    """
+    Soma os agregados parciais dos intervalos, na ordem dos intervalos, e os ordena como no relatório.
+    """
+
+    # Acumula as somas por vendedor
+    produtos = {}
+    pagamentos = {}
+
+    for partial_produtos, partial_pagamentos in partials:
+        for vendedor_id, itens in partial_produtos.items():
+            destino = produtos.setdefault(vendedor_id, {})
+            for chave, quantidade in itens.items():
+                destino[chave] = destino.get(chave, 0) + quantidade
+
+        for vendedor_id, metodos in partial_pagamentos.items():
+            destino = pagamentos.setdefault(vendedor_id, {})
+            for metodo, valor in metodos.items():
+                destino[metodo] = destino.get(metodo, 0.0) + valor
+
+    # Mesma ordenação das consultas sequenciais (nome do produto, método)
+    aggregates = {}
+
+    for vendedor_id in produtos.keys() | pagamentos.keys():
+        itens = sorted(produtos.get(vendedor_id, {}).items(), key=lambda item: (item[0][1], item[0][0]))
+        metodos = sorted(pagamentos.get(vendedor_id, {}).items())
+        aggregates[vendedor_id] = (
+            [(produto_id, produto_nome, quantidade) for (produto_id, produto_nome), quantidade in itens],
+            metodos
+        )
+
+    return aggregates
+
+def _split_evenly(items, parts):
+    """
+    Distribui a lista em 'parts' grupos intercalados (vendedores grandes e pequenos se misturam).
+    """
+
+    # Grupos vazios são descartados
+    return [chunk for chunk in (items[i::parts] for i in range(parts)) if chunk]
+
+def generate_sales_report_parallel(workers=None, split="vendedor", db_path=None):
+    """
+    Gera o mesmo relatório de generate_sales_report dividindo o trabalho em vários processos.
+
+    :param workers: Número de processos (padrão: número de núcleos).
+    :param split: 'vendedor' (cada processo agrega um grupo de vendedores) ou
+                  'intervalo' (cada processo agrega uma faixa de vendas.id e os resultados são somados).
+    :param db_path: Banco a ser lido (padrão: DB_PATH).
+    """
+
+    # Parâmetros padrão
+    workers = workers or os.cpu_count() or 1
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    conn = None
+
+    try:
+        # Lista de vendedores e faixa de IDs, lidas na conexão principal
+        conn = _open_read_only(db_path)
+        cursor = conn.cursor()
+        vendedores = sales_logic._fetch_report_sellers(cursor)
+        cursor.execute("SELECT MIN(id), MAX(id) FROM vendas")
+        first_id, last_id = cursor.fetchone()
+
+    except sqlite3.Error as e:
+        logger.error("Erro ao gerar relatório: %s", e)
+        return f"Erro ao gerar relatório: {e}"
+
+    finally:
+        if conn:
+            conn.close()
+
+    if not vendedores:
+        return "Nenhuma venda registrada para gerar relatório."
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+
+            # Divisão por vendedor: os resultados já chegam completos
+            if split == "vendedor":
+                chunks = _split_evenly([vendedor_id for vendedor_id, _ in vendedores], workers)
+                aggregates = {}
+
+                for partial in executor.map(_aggregate_sellers, [db_path] * len(chunks), chunks):
+                    aggregates.update(partial)
+
+            # Divisão por faixa de vendas.id: os parciais são somados na ordem das faixas
+            elif split == "intervalo":
+                step = (last_id - first_id) // workers + 1
+                starts = list(range(first_id, last_id + 1, step))
+                ends = [start + step - 1 for start in starts]
+                aggregates = _merge_ranges(executor.map(_aggregate_range, [db_path] * len(starts), starts, ends))
+
+            else:
+                raise ValueError(f"Modo de divisão desconhecido: {split}")
+
+    except sqlite3.Error as e:
+        logger.error("Erro ao gerar relatório: %s", e)
+        return f"Erro ao gerar relatório: {e}"
+
+    # A ordem dos vendedores vem da lista principal, então o texto é determinístico
+    return sales_logic._format_report(vendedores, aggregates)
+
+def benchmark(max_workers=None, split="vendedor", repeat=3, db_path=None):
+    """
+    Mede o tempo do relatório sequencial e do paralelo com 1..max_workers processos.
+    Retorna uma lista de (processos, melhor_tempo_em_segundos); processos = 0 é o modo sequencial.
+    """
+
+    # Parâmetros padrão
+    max_workers = max_workers or os.cpu_count() or 1
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    results = []
+
+    def best_of(function):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    # Referência: relatório sequencial em uma única conexão com o banco informado
+    expected = sales_logic.generate_sales_report(db_path=db_path)
+    results.append((0, best_of(lambda: sales_logic.generate_sales_report(db_path=db_path))))
+
+    # Paralelo, aumentando o número de processos
+    for workers in range(1, max_workers + 1):
+        report = generate_sales_report_parallel(workers, split, db_path)
+
+        if report != expected:
+            logger.warning("Aviso: o relatório com %s processo(s) difere do sequencial.", workers)
+
+        results.append((workers, best_of(lambda: generate_sales_report_parallel(workers, split, db_path))))
+
+    # Tabela de escalonamento
+    sequential = results[0][1]
+    print(f"{'Processos':>10} {'Tempo (s)':>10} {'Ganho':>7}")
+
+    for workers, elapsed in results:
+        label = "seq." if workers == 0 else str(workers)
+        print(f"{label:>10} {elapsed:>10.3f} {sequential / elapsed:>6.2f}x")
+
+    return results
+
+def main(argv=None):
+    """
+    Linha de comando: gera o relatório em paralelo ou executa o benchmark de escalonamento.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Relatório de vendas em paralelo.")
+    parser.add_argument("--db", help="Banco de dados (padrão: data/planilhas.db).")
+    parser.add_argument("--processos", type=int, help="Número de processos (padrão: núcleos da máquina).")
+    parser.add_argument("--divisao", choices=("vendedor", "intervalo"), default="vendedor")
+    parser.add_argument("--benchmark", action="store_true", help="Mede o ganho com 1..N processos.")
+    parser.add_argument("--saida", help="Arquivo onde salvar o relatório.")
+    args = parser.parse_args(argv)
+
+    # Benchmark ou geração do relatório
+    if args.benchmark:
+        benchmark(args.processos, args.divisao, db_path=args.db)
+        return
+
+    report = generate_sales_report_parallel(args.processos, args.divisao, args.db)
+
+    if args.saida:
+        Path(args.saida).write_text(report, encoding="utf-8")
+
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+import sqlite3
+import gzip
+import json
+import time
+import shutil
+import logging
+import datetime
+import argparse
+import tempfile
+import importlib
+import itertools
+import threading
+from pathlib import Path
+
+from . import sales_logic, storage, db_profiles
+from .loadtest import _percentile
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Versão do formato do arquivo de sessão
+TRACE_VERSION = 1
+
+# Operações gravadas: chamadas que a interface faz à camada core (módulo em vendas_daetec.core, função)
+RECORDED_OPERATIONS = (
+    ("sales_logic", "add_seller"),
+    ("sales_logic", "delete_seller"),
+    ("sales_logic", "add_product"),
+    ("sales_logic", "delete_product"),
+    ("sales_logic", "update_products"),
+    ("sales_logic", "delete_products"),
+    ("sales_logic", "get_all_sellers"),
+    ("sales_logic", "iter_sellers"),
+    ("sales_logic", "iter_products"),
+    ("sales_logic", "iter_products_by_seller"),
+    ("sales_logic", "get_products_by_seller"),
+    ("sales_logic", "get_product_details"),
+    ("sales_logic", "register_sale"),
+    ("sales_logic", "get_sales_page"),
+    ("sales_logic", "get_sale_details"),
+    ("sales_logic", "clear_sales_data"),
+    ("report_cache", "generate_cached_report"),
+    ("settlement", "compute_settlement")
+)
+
+# Operações que retornam iteradores: a duração gravada é a do consumo completo e a linha guarda quantas linhas saíram
+ITERATOR_OPERATIONS = {"sales_logic.iter_sellers", "sales_logic.iter_products", "sales_logic.iter_products_by_seller"}
+
+def _module(name):
+    """
+    Módulo de vendas_daetec.core pelo nome curto.
+    """
+
+    # Importados sob demanda: nem todo módulo precisa estar carregado para gravar ou reproduzir
+    return importlib.import_module(f"{__package__}.{name}")
+
+def _jsonable(value):
+    """
+    Indica se o argumento pode ir para o arquivo (funções de progresso e threading.Event não podem).
+    """
+
+    # O teste é a própria serialização
+    try:
+        json.dumps(value)
+        return True
+
+    except (TypeError, ValueError):
+        return False
+
+def _succeeded(result):
+    """
+    Resultado resumido de uma operação: False/None são falha; o resto (listas vazias inclusive) é sucesso.
+    """
+
+    # delete_seller retorna textos como "not_found"; eles contam como resposta, não como erro
+    return result is not None and result is not False
+
+def _open_trace(path, mode):
+    """
+    Abre o arquivo de sessão como texto (compactado com gzip se terminar em .gz).
+    """
+
+    # JSON por linha nos dois casos
+    path = Path(path)
+
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+def snapshot_path_for(trace_path):
+    """
+    Caminho da cópia do banco que acompanha o arquivo de sessão (sessao.jsonl.gz -> sessao.db).
+    """
+
+    # Mesmo diretório, mesmo nome sem as extensões
+    trace_path = Path(trace_path)
+    return trace_path.with_name(trace_path.name.split(".")[0] + ".db")
+
+class SessionRecorder:
+    """
+    Grava as operações que a interface faz na camada core (cadastros, carrinhos, vendas, relatórios),
+    com o instante e a duração de cada uma, em um arquivo de sessão (JSON por linha, gzip opcional).
+    Junto do arquivo fica uma cópia do banco no início da gravação, ponto de partida da reprodução.
+    """
+
+    def __init__(self, trace_path):
+        """
+        Configura o gravador (nada é alterado até start()).
+        """
+
+        # Arquivo de sessão e cópia inicial do banco
+        self.trace_path = Path(trace_path)
+        self.snapshot_path = snapshot_path_for(self.trace_path)
+
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._originals = []
+        self._started = None
+        self.count = 0
+
+    def start(self):
+        """
+        Copia o banco ativo, abre o arquivo de sessão e passa a envolver as operações gravadas.
+        """
+
+        # A cópia é apagada e recriada: nunca pode ser o próprio banco em uso
+        if self.snapshot_path.resolve() == sales_logic.DB_PATH.resolve():
+            raise ValueError(f"A cópia da sessão ({self.snapshot_path}) seria o próprio banco em uso; escolha outro nome de arquivo.")
+
+        # Cópia consistente do estado inicial (arquivo ou armazenamento em memória)
+        self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path.unlink(missing_ok=True)
+        source = sales_logic._connect()
+        target = sqlite3.connect(self.snapshot_path)
+
+        try:
+            source.backup(target)
+
+        finally:
+            target.close()
+            source.close()
+
+        self._file = _open_trace(self.trace_path, "w")
+        self._write({"versao": TRACE_VERSION, "inicio": datetime.datetime.now().isoformat(timespec="seconds"),
+                     "banco": self.snapshot_path.name, "armazenamento": storage.get_backend().name})
+        self._started = time.perf_counter()
+
+        # Troca as funções nos módulos: a interface as chama sempre pelo módulo (ex: sales_logic.register_sale)
+        for module_name, function_name in RECORDED_OPERATIONS:
+            module = _module(module_name)
+            original = getattr(module, function_name)
+            self._originals.append((module, function_name, original))
+            setattr(module, function_name, self._wrap(f"{module_name}.{function_name}", original))
+
+        logger.info("Gravação da sessão iniciada em %s", self.trace_path, extra={"arquivo": str(self.trace_path)})
+
+    def _wrap(self, op, function):
+        """
+        Envolve uma operação: mede a duração e grava a chamada (só a mais externa, se uma chamar outra).
+        """
+
+        # Chamadas internas (ex: delete_product -> delete_products) não são gravadas de novo
+        recorder = self
+
+        def recorded(*args, **kwargs):
+            if getattr(recorder._local, "depth", 0):
+                return function(*args, **kwargs)
+
+            recorder._local.depth = 1
+            offset = time.perf_counter() - recorder._started
+            start = time.perf_counter()
+
+            try:
+                result = function(*args, **kwargs)
+
+            finally:
+                recorder._local.depth = 0
+
+            elapsed = time.perf_counter() - start
+
+            # Iteradores só fazem o trabalho quando consumidos: a linha é gravada ao fim do consumo
+            if op in ITERATOR_OPERATIONS:
+                return recorder._consume(op, offset, elapsed, args, kwargs, result)
+
+            recorder._record(op, offset, elapsed, args, kwargs, result)
+            return result
+
+        recorded.__wrapped__ = function
+        return recorded
+
+    def _consume(self, op, offset, elapsed, args, kwargs, iterator):
+        """
+        Repassa as linhas do iterador medindo só o tempo gasto dentro dele (não o de quem consome)
+        e grava a operação quando ele termina ou é descartado.
+        """
+
+        # 'parcial' indica que quem chamou parou antes do fim
+        rows = 0
+        finished = False
+
+        try:
+            while True:
+                start = time.perf_counter()
+
+                try:
+                    row = next(iterator)
+
+                except StopIteration:
+                    finished = True
+                    break
+
+                finally:
+                    elapsed += time.perf_counter() - start
+
+                rows += 1
+                yield row
+
+        finally:
+            self._record(op, offset, elapsed, args, kwargs, iterator, rows=rows, partial=not finished)
+
+    def _record(self, op, offset, elapsed, args, kwargs, result, rows=None, partial=False):
+        """
+        Grava uma linha da sessão. Argumentos que não são dados (ex: progress_callback) ficam de fora.
+        """
+
+        # Chaves curtas: o arquivo de um evento inteiro continua pequeno
+        entry = {"t": round(offset, 4), "op": op, "ms": round(elapsed * 1000, 3), "ok": _succeeded(result)}
+
+        if rows is not None:
+            entry["n"] = rows
+
+        if partial:
+            entry["parcial"] = True
+
+        if args:
+            entry["a"] = [arg if _jsonable(arg) else None for arg in args]
+
+        kwargs = {key: value for key, value in kwargs.items() if _jsonable(value)}
+
+        if kwargs:
+            entry["k"] = kwargs
+
+        self._write(entry)
+
+    def _write(self, entry):
+        """
+        Acrescenta uma linha ao arquivo (operações podem vir de threads de fundo, ex: relatório).
+        """
+
+        # Uma linha por vez
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+                self.count += 1
+
+    def stop(self):
+        """
+        Restaura as funções originais e fecha o arquivo de sessão.
+        """
+
+        # Ordem inversa da instalação
+        for module, function_name, original in reversed(self._originals):
+            setattr(module, function_name, original)
+
+        self._originals = []
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+        logger.info("Gravação da sessão encerrada: %s operações.", self.count - 1,
+                    extra={"arquivo": str(self.trace_path), "operacoes": self.count - 1})
+
+def load_trace(trace_path):
+    """
+    Lê um arquivo de sessão. Retorna (cabeçalho, [operações]).
+    """
+
+    # Primeira linha: cabeçalho com a versão e a cópia do banco
+    with _open_trace(trace_path, "r") as file:
+        header = json.loads(file.readline())
+
+        if header.get("versao") != TRACE_VERSION:
+            raise ValueError(f"Versão de sessão não suportada: {header.get('versao')}")
+
+        return header, [json.loads(line) for line in file if line.strip()]
+
+def replay_session(trace_path, speed=None, in_memory=False, progress=None):
+    """
+    Reproduz uma sessão gravada sobre uma cópia nova do banco inicial e mede a latência de cada operação.
+
+    :param speed: None reproduz o mais rápido possível; 1.0 respeita os intervalos gravados (2.0 = duas vezes mais rápido).
+    :param in_memory: Reproduz em um banco em memória (isola o processamento do disco).
+    :param progress: Função opcional chamada como progress(reproduzidas, total).
+    Retorna um dicionário com os totais e, por operação, contagem, percentis atual e gravado, e divergências de resultado.
+    """
+
+    # O arquivo da sessão e a cópia inicial do banco precisam existir
+    trace_path = Path(trace_path)
+    header, operations = load_trace(trace_path)
+    snapshot = trace_path.with_name(header["banco"])
+    functions = {}
+    latencies = {}
+    divergences = {}
+
+    with tempfile.TemporaryDirectory(prefix="vendas_reproducao_") as temp_dir:
+        db_path = Path(temp_dir) / "planilhas.db"
+        shutil.copyfile(snapshot, db_path)
+        backend = storage.MemoryBackend("reproducao") if in_memory else None
+
+        # A aplicação passa a usar a cópia (e, se pedido, a memória) durante a reprodução
+        previous_path = sales_logic.DB_PATH
+        sales_logic.DB_PATH = db_path
+
+        try:
+            if backend is not None:
+                backend.load_from(db_path)
+                previous_backend = storage.set_backend(backend)
+            else:
+                sales_logic.initialize_database()
+                sales_logic.invalidate_catalog_cache()
+
+            started = time.perf_counter()
+
+            for index, entry in enumerate(operations, 1):
+                op = entry["op"]
+
+                if op not in functions:
+                    module_name, function_name = op.split(".", 1)
+                    functions[op] = getattr(_module(module_name), function_name)
+
+                # Ritmo gravado: espera até o instante da operação (dividido pela velocidade)
+                if speed:
+                    delay = entry["t"] / speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                # Iteradores são consumidos dentro da medição (até onde a sessão consumiu), como na gravação
+                start = time.perf_counter()
+                result = functions[op](*entry.get("a", ()), **entry.get("k", {}))
+
+                if "n" in entry:
+                    rows = len(list(itertools.islice(result, entry["n"]) if entry.get("parcial") else result))
+
+                    if entry.get("parcial") and hasattr(result, "close"):
+                        result.close()
+
+                elapsed = time.perf_counter() - start
+
+                latencies.setdefault(op, []).append((elapsed, entry["ms"] / 1000))
+
+                if _succeeded(result) != entry["ok"] or ("n" in entry and rows != entry["n"]):
+                    divergences[op] = divergences.get(op, 0) + 1
+
+                if progress:
+                    progress(index, len(operations))
+
+            total_time = time.perf_counter() - started
+
+        finally:
+            if backend is not None:
+                storage.set_backend(previous_backend)
+                backend.close()
+
+            sales_logic.DB_PATH = previous_path
+            sales_logic.invalidate_catalog_cache()
+            db_profiles.release_connections(db_path)
+
+    # Percentis por operação: reproduzido e gravado lado a lado
+    per_operation = {}
+
+    for op, values in sorted(latencies.items()):
+        replayed = sorted(value for value, _ in values)
+        recorded = sorted(value for _, value in values)
+        per_operation[op] = {
+            "chamadas": len(values),
+            "p50": _percentile(replayed, 0.50),
+            "p95": _percentile(replayed, 0.95),
+            "p99": _percentile(replayed, 0.99),
+            "max": replayed[-1],
+            "total": sum(replayed),
+            "gravado_p50": _percentile(recorded, 0.50),
+            "gravado_p95": _percentile(recorded, 0.95),
+            "divergencias": divergences.get(op, 0)
+        }
+
+    return {
+        "sessao": str(trace_path),
+        "inicio_gravacao": header.get("inicio"),
+        "operacoes": len(operations),
+        "segundos": total_time,
+        "duracao_gravada": operations[-1]["t"] if operations else 0.0,
+        "por_operacao": per_operation
+    }
+
+def print_results(result):
+    """
+    Mostra a latência de cada operação reproduzida, ao lado da gravada, em forma de tabela.
+    """
+
+    # Latências em milissegundos
+    print(f"Sessão: {result['sessao']} (gravada em {result['inicio_gravacao']})")
+    print(f"{result['operacoes']} operações reproduzidas em {result['segundos']:.2f} s "
+          f"(duração gravada: {result['duracao_gravada']:.1f} s)")
+    print()
+    print(f"{'Operação':<38} {'Chamadas':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Máx ms':>8} "
+          f"{'Grav. p50':>9} {'Grav. p95':>9} {'Diverg.':>7}")
+
+    for op, stats in result["por_operacao"].items():
+        print(f"{op:<38} {stats['chamadas']:>8} {stats['p50'] * 1000:>8.2f} {stats['p95'] * 1000:>8.2f} "
+              f"{stats['p99'] * 1000:>8.2f} {stats['max'] * 1000:>8.2f} {stats['gravado_p50'] * 1000:>9.2f} "
+              f"{stats['gravado_p95'] * 1000:>9.2f} {stats['divergencias']:>7}")
+
+def main(argv=None):
+    """
+    Linha de comando: reproduz uma sessão gravada (ver SessionRecorder) e mede a latência de cada operação.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Reproduz uma sessão gravada da interface sobre uma cópia do banco inicial.")
+    parser.add_argument("sessao", help="Arquivo de sessão (.jsonl ou .jsonl.gz); a cópia do banco deve estar ao lado.")
+    parser.add_argument("--tempo-real", action="store_true", help="Respeita os intervalos gravados entre as operações.")
+    parser.add_argument("--velocidade", type=float, default=1.0, help="Com --tempo-real, multiplica o ritmo (padrão: 1).")
+    parser.add_argument("--memoria", action="store_true", help="Reproduz em um banco em memória (sem disco).")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Reproduções seguidas, cada uma em uma cópia nova.")
+    args = parser.parse_args(argv)
+
+    # As mensagens das operações (ex: "Venda registrada") atrapalhariam a tabela
+    logging.getLogger("vendas_daetec").setLevel(logging.ERROR)
+    results = []
+
+    for _ in range(args.repeticoes):
+        result = replay_session(args.sessao, speed=args.velocidade if args.tempo_real else None, in_memory=args.memoria)
+        print_results(result)
+        print()
+        results.append(result)
+
+    return results
+
+if __name__ == "__main__":
+    main()
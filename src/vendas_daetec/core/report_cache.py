@@ -0,0 +1,228 @@
+import sqlite3
+import logging
+import threading
+
+from . import sales_logic, storage
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Faixa de IDs de venda agregada por consulta; o progresso é informado ao fim de cada faixa
+REFRESH_CHUNK = 5000
+
+class ReportCache:
+    """
+    Cache dos agregados do relatório de vendas por vendedor.
+    Guarda uma marca d'água (maior vendas.id já agregado e PRAGMA data_version da conexão do cache):
+    se nada mudou, o relatório sai direto da memória; se entraram vendas novas, apenas elas são agregadas.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Inicializa o cache vazio. 'db_path' fixa o banco (padrão: DB_PATH no armazenamento ativo).
+        """
+
+        # A conexão é mantida aberta: PRAGMA data_version só é comparável dentro da mesma conexão.
+        # Cada relatório pode vir de uma thread diferente; o lock garante um uso por vez
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        self._conn = None
+        self._source = None
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Descarta todos os agregados; o próximo relatório é recalculado do zero.
+        """
+
+        # Estado inicial
+        self.watermark = 0
+        self.data_version = None
+        self.generation = None
+        self._sellers = {}
+        self._products = {}
+        self._payments = {}
+
+    def _connection(self):
+        """
+        Retorna a conexão do cache, reabrindo-a se o banco em uso mudou.
+        """
+
+        # Um banco diferente (troca de DB_PATH ou de armazenamento) invalida tudo
+        source = (self.db_path, None) if self.db_path else (sales_logic.DB_PATH, storage.get_backend())
+
+        if self._conn is None or self._source != source:
+            if self._conn is not None:
+                self._conn.close()
+
+            self._conn = sales_logic._connect(self.db_path, check_same_thread=False)
+            self._source = source
+            self.invalidate()
+
+        return self._conn
+
+    def close(self):
+        """
+        Fecha a conexão do cache.
+        """
+
+        # Próximo uso reabre e recalcula
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _refresh(self, cursor, progress_callback=None):
+        """
+        Agrega as vendas posteriores à marca d'água e soma aos totais em memória, em faixas de REFRESH_CHUNK IDs.
+        progress_callback(processados, total) é chamado ao fim de cada faixa, com a quantidade de IDs de venda já agregados.
+        """
+
+        # Leitura consistente: a faixa de IDs e as somas vêm do mesmo instantâneo do banco
+        cursor.connection.execute("BEGIN")
+
+        try:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM vendas")
+            new_watermark = cursor.fetchone()[0]
+            total = max(new_watermark - self.watermark, 0)
+
+            for start in range(self.watermark, new_watermark, REFRESH_CHUNK):
+                end = min(start + REFRESH_CHUNK, new_watermark)
+
+                # Itens novos por vendedor e produto (cópia gravada na venda)
+                cursor.execute("""
+                    SELECT vendedor_id, vendedor_nome, produto_id, produto_nome, SUM(quantidade)
+                    FROM venda_itens
+                    WHERE venda_id > ? AND venda_id <= ?
+                    GROUP BY vendedor_id, vendedor_nome, produto_id, produto_nome
+                """, (start, end))
+
+                for vendedor_id, vendedor_nome, produto_id, produto_nome, quantidade in cursor.fetchall():
+                    self._sellers[vendedor_id] = vendedor_nome
+                    produtos = self._products.setdefault(vendedor_id, {})
+                    chave = (produto_id, produto_nome)
+                    produtos[chave] = produtos.get(chave, 0) + quantidade
+
+                # Pagamentos novos por vendedor e método
+                cursor.execute("""
+                    SELECT v.vendedor_id, vp.metodo, SUM(vp.valor)
+                    FROM venda_pagamentos vp
+                    JOIN vendas v ON v.id = vp.venda_id
+                    WHERE vp.venda_id > ? AND vp.venda_id <= ?
+                    GROUP BY v.vendedor_id, vp.metodo
+                """, (start, end))
+
+                for vendedor_id, metodo, valor in cursor.fetchall():
+                    pagamentos = self._payments.setdefault(vendedor_id, {})
+                    pagamentos[metodo] = pagamentos.get(metodo, 0.0) + valor
+
+                if progress_callback:
+                    progress_callback(end - self.watermark, total)
+
+            # A marca d'água só avança com todas as faixas agregadas (uma interrupção invalida o cache)
+            self.watermark = max(new_watermark, self.watermark)
+
+        finally:
+            # Transação somente leitura: encerra mesmo se a agregação foi interrompida
+            cursor.connection.set_progress_handler(None, 0)
+
+            if cursor.connection.in_transaction:
+                cursor.connection.rollback()
+
+    def get_report(self, progress_callback=None, cancel_event=None):
+        """
+        Retorna o texto do relatório (mesmo formato de generate_sales_report), recalculando só o necessário.
+        Aceita os mesmos progress_callback e cancel_event de generate_sales_report; retorna None se cancelado.
+        O progresso acompanha a agregação no banco e conta vendas novas (IDs de venda), não vendedores.
+        """
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                cursor = conn.cursor()
+
+                # Permite interromper a agregação
+                if cancel_event is not None:
+                    conn.set_progress_handler(lambda: 1 if cancel_event.is_set() else 0, 1000)
+
+                # O histórico foi apagado (por este ou outro processo): recomeça do zero
+                cursor.execute("SELECT valor FROM configuracoes WHERE chave = ?", (sales_logic.SALES_GENERATION_KEY,))
+                row = cursor.fetchone()
+                generation = row[0] if row else "0"
+
+                if generation != self.generation:
+                    self.invalidate()
+                    self.generation = generation
+
+                # Só agrega se algum commit aconteceu desde a última vez
+                cursor.execute("PRAGMA data_version")
+                data_version = cursor.fetchone()[0]
+
+                if data_version != self.data_version:
+                    self._refresh(cursor, progress_callback)
+                    self.data_version = data_version
+
+            except sqlite3.Error as e:
+
+                # Agregação parcial não pode ficar no cache
+                self.invalidate()
+
+                if cancel_event is not None and cancel_event.is_set():
+                    logger.info("Geração do relatório cancelada.")
+                    return None
+
+                logger.error("Erro ao gerar relatório: %s", e)
+                return f"Erro ao gerar relatório: {e}"
+
+            finally:
+                if self._conn is not None:
+                    self._conn.set_progress_handler(None, 0)
+
+            # Cancelado depois da agregação: os totais continuam válidos no cache
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info("Geração do relatório cancelada.")
+                return None
+
+            # Monta os agregados no formato do relatório
+            vendedores = sorted(self._sellers.items(), key=lambda seller: (seller[1], seller[0]))
+
+            if not vendedores:
+                return "Nenhuma venda registrada para gerar relatório."
+
+            # Montagem em memória: rápida, não informa progresso
+            aggregates = {}
+
+            for vendedor_id, _ in vendedores:
+                produtos = sorted(self._products.get(vendedor_id, {}).items(), key=lambda item: (item[0][1], item[0][0]))
+                aggregates[vendedor_id] = (
+                    [(produto_id, produto_nome, quantidade) for (produto_id, produto_nome), quantidade in produtos],
+                    sorted(self._payments.get(vendedor_id, {}).items())
+                )
+
+            return sales_logic._format_report(vendedores, aggregates)
+
+# Instância compartilhada pela aplicação
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """
+    Retorna o cache de relatório compartilhado.
+    """
+
+    # Criado na primeira chamada
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache()
+
+    return _cache
+
+def generate_cached_report(progress_callback=None, cancel_event=None):
+    """
+    Atalho para get_cache().get_report(...).
+    """
+
+    # Mesmo contrato de generate_sales_report
+    return get_cache().get_report(progress_callback, cancel_event)
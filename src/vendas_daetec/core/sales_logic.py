@@ -2,8 +2,18 @@ import sqlite3
 import datetime
 import sys
 import os
+import json
+import uuid
+import time
+import logging
+import threading
 from pathlib import Path
 
+from . import db_profiles, events, storage
+
+# Registro estruturado (ver log_setup); sem configuração, só avisos e erros aparecem no stderr
+logger = logging.getLogger(__name__)
+
 # Configuração do Caminho do Banco de Dados
 if getattr(sys, 'frozen', False):
     # Executável PyInstaller
@@ -13,20 +23,63 @@ else:
     BASE_DIR = Path(__file__).parent.parent.parent
 DB_PATH = BASE_DIR / "data" / "planilhas.db"
 
-def initialize_database():
+def _connect(db_path=None, **options):
+    """
+    Abre uma conexão com o banco (padrão: DB_PATH) já configurada com o perfil de desempenho ativo.
+    O banco padrão é aberto pelo armazenamento ativo (arquivo ou memória, ver storage); outros caminhos são sempre arquivos.
+    'options' são repassadas para sqlite3.connect (ex: check_same_thread=False).
+    """
+
+    # Todas as conexões da aplicação passam por aqui
+    db_path = Path(db_path) if db_path else DB_PATH
+    backend = storage.get_backend() if db_path == DB_PATH else storage.FILE_BACKEND
+    conn = backend.connect(db_path, **options)
+
+    # Chave do perfil sem consultar a conexão; arquivos em WAL ficam com uma conexão ociosa aberta (ver db_profiles)
+    if backend.persistent:
+        db_profiles.configure_connection(conn, db_profiles.db_key(db_path), keep_alive=True)
+    else:
+        db_profiles.configure_connection(conn, backend.uri)
+
+    return conn
+
+# Versão do esquema gravada em PRAGMA user_version; se o banco já está nela, a inicialização não executa DDL
+SCHEMA_VERSION = 4
+
+# Chave de 'configuracoes' incrementada sempre que o histórico de vendas é apagado
+SALES_GENERATION_KEY = "sales_generation"
+
+# Métodos de pagamento aceitos pelo caixa (mesmos nomes gravados em venda_pagamentos.metodo)
+PAYMENT_METHODS = ("Pix", "Dinheiro", "Débito", "Crédito")
+
+# Cache do catálogo (vendedores e produtos), preenchido por warm_catalog e descartado a cada alteração
+_catalog_cache = None
+_catalog_lock = threading.RLock()
+
+def initialize_database(db_path=None):
     """
     Cria/verifica o banco de dados e as tabelas 'vendedores' e 'produtos'.
+    Por padrão usa DB_PATH; 'db_path' permite inicializar outro arquivo (ex: banco central da sincronização).
     """
     
     # Garante que o diretório para o banco de dados exista
-    DB_PATH.parent.mkdir(exist_ok=True)
+    db_path = Path(db_path) if db_path else DB_PATH
+    db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = None
     
     # Criação das tabelas necessárias para a aplicação
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect(db_path)
         cursor = conn.cursor()
 
+        # Caminho rápido: banco já criado e migrado na versão atual
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] == SCHEMA_VERSION:
+            return
+
+        # Bancos novos já nascem com recuperação de espaço incremental (sem efeito em bancos existentes)
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
         # Tabela 1: Vendedores
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS vendedores (
@@ -53,6 +106,8 @@ def initialize_database():
             vendedor_id INTEGER NOT NULL,
             valor_total REAL NOT NULL,
             data_venda TEXT NOT NULL,
+            uuid TEXT,
+            atendimento TEXT,
             FOREIGN KEY (vendedor_id) REFERENCES vendedores (id)
         )
         """)
@@ -65,6 +120,9 @@ def initialize_database():
             produto_id TEXT NOT NULL,
             quantidade INTEGER NOT NULL,
             preco_unitario_na_venda REAL NOT NULL,
+            produto_nome TEXT,
+            vendedor_id INTEGER,
+            vendedor_nome TEXT,
             FOREIGN KEY (venda_id) REFERENCES vendas (id),
             FOREIGN KEY (produto_id) REFERENCES produtos (id)
         )
@@ -89,19 +147,346 @@ def initialize_database():
         )
         """)
 
+        # Atualiza bancos criados por versões anteriores
+        _migrate_schema(cursor)
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
         # Confirma as alterações no banco de dados
         conn.commit()
-        print(f"Banco de dados verificado/inicializado com sucesso em: {DB_PATH}")
+        logger.info("Banco de dados verificado/inicializado com sucesso em: %s", db_path)
 
     # Tratamento de erros específicos do SQLite
     except sqlite3.Error as e:
-        print(f"Erro ao inicializar o banco de dados: {e}")
+        logger.error("Erro ao inicializar o banco de dados: %s", e)
     
     # Fechamento da conexão com o banco de dados
     finally:
         if conn:
             conn.close()
 
+def _migrate_schema(cursor):
+    """
+    Aplica as migrações de esquema pendentes em um banco já existente.
+    """
+
+    # Colunas atuais da tabela de vendas
+    cursor.execute("PRAGMA table_info(vendas)")
+    colunas_vendas = {row[1] for row in cursor.fetchall()}
+
+    # Identificador global da venda, usado na sincronização entre terminais
+    if "uuid" not in colunas_vendas:
+        cursor.execute("ALTER TABLE vendas ADD COLUMN uuid TEXT")
+        cursor.execute("UPDATE vendas SET uuid = lower(hex(randomblob(16))) WHERE uuid IS NULL")
+
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_vendas_uuid ON vendas (uuid)")
+
+    # Atendimento (checkout) de origem: as vendas de vários vendedores de um mesmo carrinho compartilham o valor
+    if "atendimento" not in colunas_vendas:
+        cursor.execute("ALTER TABLE vendas ADD COLUMN atendimento TEXT")
+
+    # Cópia do nome do produto e do vendedor no momento da venda (relatórios sem JOIN)
+    cursor.execute("PRAGMA table_info(venda_itens)")
+    colunas_itens = {row[1] for row in cursor.fetchall()}
+
+    if "produto_nome" not in colunas_itens:
+        cursor.execute("ALTER TABLE venda_itens ADD COLUMN produto_nome TEXT")
+    if "vendedor_id" not in colunas_itens:
+        cursor.execute("ALTER TABLE venda_itens ADD COLUMN vendedor_id INTEGER")
+    if "vendedor_nome" not in colunas_itens:
+        cursor.execute("ALTER TABLE venda_itens ADD COLUMN vendedor_nome TEXT")
+
+    # Preenche as linhas antigas; produtos já apagados ficam com o próprio ID como nome
+    cursor.execute("""
+        UPDATE venda_itens
+        SET produto_nome = COALESCE((SELECT nome FROM produtos WHERE produtos.id = venda_itens.produto_id), produto_id)
+        WHERE produto_nome IS NULL
+    """)
+    cursor.execute("""
+        UPDATE venda_itens
+        SET vendedor_id = (SELECT vendedor_id FROM vendas WHERE vendas.id = venda_itens.venda_id)
+        WHERE vendedor_id IS NULL
+    """)
+    cursor.execute("""
+        UPDATE venda_itens
+        SET vendedor_nome = (SELECT nome FROM vendedores WHERE vendedores.id = venda_itens.vendedor_id)
+        WHERE vendedor_nome IS NULL
+    """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_venda_itens_vendedor ON venda_itens (vendedor_id, produto_id)")
+
+    # Índices da navegação pelo histórico (paginação por data_venda, id) e do detalhe de cada venda
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas (data_venda, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vendas_vendedor_data ON vendas (vendedor_id, data_venda, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_venda_itens_venda ON venda_itens (venda_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_venda_pagamentos_venda ON venda_pagamentos (venda_id)")
+
+def _next_product_id(cursor):
+    """
+    Calcula o próximo ID sequencial de produto no formato PROD-0000.
+    """
+
+    # Busca o maior ID já utilizado
+    cursor.execute("SELECT id FROM produtos WHERE id LIKE 'PROD-%' ORDER BY id DESC LIMIT 1")
+    last_id = cursor.fetchone()
+
+    if last_id:
+        last_number = int(last_id[0].split('-')[1])
+        return f"PROD-{last_number + 1:04d}"
+
+    return "PROD-0001"
+
+def warm_catalog():
+    """
+    Carrega vendedores e produtos para a memória em uma única passada.
+    Enquanto o cache estiver válido, as consultas de catálogo não acessam o banco.
+    """
+
+    # Segura o lock durante a carga: quem pedir o catálogo espera pelo resultado em vez de consultar em paralelo
+    global _catalog_cache
+    conn = None
+
+    with _catalog_lock:
+        try:
+            conn = _connect()
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT id, nome FROM vendedores ORDER BY id")
+            sellers = cursor.fetchall()
+
+            cursor.execute("""
+                SELECT p.vendedor_id, v.nome, p.id, p.nome, p.preco
+                FROM produtos p
+                JOIN vendedores v ON p.vendedor_id = v.id
+                ORDER BY v.nome, p.id
+            """)
+            rows = cursor.fetchall()
+
+        except sqlite3.Error as e:
+            logger.error("Erro ao carregar o catálogo: %s", e)
+            return False
+
+        finally:
+            if conn:
+                conn.close()
+
+        # Agrupa os produtos por vendedor, na mesma ordem de get_products_by_seller
+        products_by_seller = {}
+
+        for vendedor_id, _, prod_id, prod_nome, prod_preco in rows:
+            products_by_seller.setdefault(vendedor_id, []).append((prod_id, prod_nome, prod_preco))
+
+        for products in products_by_seller.values():
+            products.sort(key=lambda product: product[1])
+
+        _catalog_cache = {
+            "sellers": sellers,
+            "products": [row[1:] for row in rows],
+            "products_by_seller": products_by_seller
+        }
+
+    return True
+
+def invalidate_catalog_cache():
+    """
+    Descarta o cache do catálogo (chamado após qualquer alteração em vendedores ou produtos).
+    """
+
+    # A próxima consulta volta a ler o banco
+    global _catalog_cache
+
+    with _catalog_lock:
+        _catalog_cache = None
+
+# Linhas buscadas por vez nos iteradores de catálogo
+STREAM_BATCH_SIZE = 256
+
+class _Row:
+    """
+    Base das linhas nomeadas: atributos fixos (__slots__), desempacotáveis e indexáveis como tuplas.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        """
+        Cria a linha com os valores na ordem de __slots__.
+        """
+
+        # Um atributo por coluna, sem __dict__
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __iter__(self):
+        """
+        Permite desempacotar a linha como a tupla equivalente.
+        """
+
+        # Mesma ordem das colunas da consulta
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __getitem__(self, index):
+        """
+        Acesso por posição, como na tupla equivalente.
+        """
+
+        # Índices e fatias sobre os valores
+        return tuple(self)[index]
+
+    def __len__(self):
+        """
+        Quantidade de colunas.
+        """
+
+        # Uma coluna por atributo
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        """
+        Compara com outra linha ou com a tupla equivalente.
+        """
+
+        # Igualdade pelos valores
+        return tuple(self) == tuple(other) if isinstance(other, (_Row, tuple)) else NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        """
+        Representação com os nomes das colunas.
+        """
+
+        # Ex: SellerRow(id=1, nome='Ana')
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+class SellerRow(_Row):
+    """
+    Vendedor: (id, nome).
+    """
+
+    __slots__ = ("id", "nome")
+
+class ProductRow(_Row):
+    """
+    Produto com o nome do vendedor: (nome_vendedor, id, nome, preco).
+    """
+
+    __slots__ = ("nome_vendedor", "id", "nome", "preco")
+
+class SellerProductRow(_Row):
+    """
+    Produto de um vendedor: (id, nome, preco).
+    """
+
+    __slots__ = ("id", "nome", "preco")
+
+def _stream(sql, params, batch_size, row_class, error_message):
+    """
+    Executa a consulta e entrega as linhas em lotes de 'batch_size' (fetchmany), sem montar a lista inteira.
+    A conexão fica aberta até o iterador terminar ou ser descartado.
+    """
+
+    # Erros seguem o padrão das funções de lista: mensagem e nenhuma linha a mais
+    conn = None
+    
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.arraysize = batch_size or STREAM_BATCH_SIZE
+        cursor.execute(sql, params)
+
+        while True:
+            rows = cursor.fetchmany()
+
+            if not rows:
+                break
+
+            for row in rows:
+                yield row_class(*row) if row_class else row
+
+    except sqlite3.Error as e:
+        logger.error("%s: %s", error_message, e)
+
+    finally:
+        if conn:
+            conn.close()
+
+def _cached_rows(key, seller_id=None):
+    """
+    Retorna a lista do catálogo em memória (sem copiar) ou None se o cache não estiver carregado.
+    """
+
+    # O cache é substituído, nunca alterado: a lista obtida continua válida mesmo após uma invalidação
+    with _catalog_lock:
+        if _catalog_cache is None:
+            return None
+
+        if key == "products_by_seller":
+            return _catalog_cache[key].get(seller_id, [])
+
+        return _catalog_cache[key]
+
+def iter_sellers(batch_size=None, named=False):
+    """
+    Itera sobre os vendedores em ordem de ID, como get_all_sellers, sem materializar a tabela.
+
+    :param batch_size: Linhas buscadas por vez (padrão: STREAM_BATCH_SIZE).
+    :param named: Entrega SellerRow (atributos id e nome) em vez de tuplas.
+    """
+
+    # Catálogo em memória, se estiver carregado
+    cached = _cached_rows("sellers")
+
+    if cached is not None:
+        return (SellerRow(*row) for row in cached) if named else iter(cached)
+
+    return _stream("SELECT id, nome FROM vendedores ORDER BY id", (), batch_size,
+                   SellerRow if named else None, "Erro ao buscar vendedores")
+
+def iter_products(batch_size=None, named=False):
+    """
+    Itera sobre os produtos com o nome do vendedor, na ordem de get_all_products, sem materializar a tabela.
+
+    :param batch_size: Linhas buscadas por vez (padrão: STREAM_BATCH_SIZE).
+    :param named: Entrega ProductRow (nome_vendedor, id, nome, preco) em vez de tuplas.
+    """
+
+    # Catálogo em memória, se estiver carregado
+    cached = _cached_rows("products")
+
+    if cached is not None:
+        return (ProductRow(*row) for row in cached) if named else iter(cached)
+
+    sql_query = """
+    SELECT
+        v.nome,
+        p.id,
+        p.nome,
+        p.preco
+    FROM produtos p
+    JOIN vendedores v ON p.vendedor_id = v.id
+    ORDER BY v.nome, p.id;
+    """
+
+    return _stream(sql_query, (), batch_size, ProductRow if named else None, "Erro ao buscar produtos")
+
+def iter_products_by_seller(seller_id, batch_size=None, named=False):
+    """
+    Itera sobre os produtos de um vendedor em ordem de nome, como get_products_by_seller.
+
+    :param batch_size: Linhas buscadas por vez (padrão: STREAM_BATCH_SIZE).
+    :param named: Entrega SellerProductRow (id, nome, preco) em vez de tuplas.
+    """
+
+    # Catálogo em memória, se estiver carregado
+    cached = _cached_rows("products_by_seller", seller_id)
+
+    if cached is not None:
+        return (SellerProductRow(*row) for row in cached) if named else iter(cached)
+
+    return _stream("SELECT id, nome, preco FROM produtos WHERE vendedor_id = ? ORDER BY nome", (seller_id,), batch_size,
+                   SellerProductRow if named else None, "Erro ao buscar produtos por vendedor")
+
 def add_seller(name):
     """
     Adiciona um novo vendedor ao banco de dados.
@@ -111,7 +496,7 @@ def add_seller(name):
     conn = None
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
         
         # Padroniza o nome para ter a primeira letra de cada palavra em maiúsculo
@@ -119,15 +504,17 @@ def add_seller(name):
 
         cursor.execute("INSERT INTO vendedores (nome) VALUES (?)", (name,))
         conn.commit()
-        print(f"Vendedor '{name}' adicionado com sucesso.")
+        invalidate_catalog_cache()
+        logger.info("Vendedor '%s' adicionado com sucesso.", name, extra={"vendedor_id": cursor.lastrowid})
+        events.publish(events.SELLER_ADDED, [(cursor.lastrowid, name)])
         return True
     
     except sqlite3.IntegrityError:
-        print(f"Erro: O vendedor '{name}' já existe.")
+        logger.warning("Erro: O vendedor '%s' já existe.", name)
         return False
     
     except sqlite3.Error as e:
-        print(f"Erro ao adicionar vendedor: {e}")
+        logger.error("Erro ao adicionar vendedor: %s", e)
         return False
     
     finally:
@@ -144,13 +531,20 @@ def delete_seller(seller_id):
     conn = None
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
         cursor.execute("PRAGMA foreign_keys = ON")
+
+        # Guarda a linha removida para o evento
+        cursor.execute("SELECT id, nome FROM vendedores WHERE id = ?", (seller_id,))
+        removed = cursor.fetchall()
+
         cursor.execute("DELETE FROM vendedores WHERE id = ?", (seller_id,))
         conn.commit()
+        invalidate_catalog_cache()
         
         if cursor.rowcount > 0:
+            events.publish(events.SELLER_DELETED, removed)
             return True
         
         else:
@@ -160,7 +554,7 @@ def delete_seller(seller_id):
         return "constraint_failed"
     
     except sqlite3.Error as e:
-        print(f"Erro ao deletar vendedor: {e}")
+        logger.error("Erro ao deletar vendedor: %s", e, extra={"vendedor_id": seller_id})
         return False
     
     finally:
@@ -173,23 +567,8 @@ def get_all_sellers():
     Retorna uma lista de tuplas (id, nome).
     """
     
-    # Busca todos os vendedores
-    conn = None
-    
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, nome FROM vendedores ORDER BY id")
-        sellers = cursor.fetchall()
-        return sellers
-    
-    except sqlite3.Error as e:
-        print(f"Erro ao buscar vendedores: {e}")
-        return []
-    
-    finally:
-        if conn:
-            conn.close()
+    # Lista montada a partir do iterador (catálogo em memória ou banco)
+    return list(iter_sellers())
 
 def add_product(name, price, seller_id):
     """
@@ -199,25 +578,24 @@ def add_product(name, price, seller_id):
     # Gera um ID único para o produto
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
-        cursor.execute("SELECT id FROM produtos WHERE id LIKE 'PROD-%' ORDER BY id DESC LIMIT 1")
-        last_id = cursor.fetchone()
-
-        if last_id:
-            last_number = int(last_id[0].split('-')[1])
-            new_product_id = f"PROD-{last_number + 1:04d}"
-        
-        else:
-            new_product_id = "PROD-0001"
+        new_product_id = _next_product_id(cursor)
 
         cursor.execute("INSERT INTO produtos (id, nome, preco, vendedor_id) VALUES (?, ?, ?, ?)", (new_product_id, name, price, seller_id))
         conn.commit()
-        print(f"Produto '{name}' adicionado com sucesso com o ID {new_product_id}.")
+        invalidate_catalog_cache()
+        logger.info("Produto '%s' adicionado com sucesso com o ID %s.", name, new_product_id,
+                    extra={"produto_id": new_product_id, "vendedor_id": seller_id})
+
+        # Linha no formato de get_all_products
+        cursor.execute("SELECT nome FROM vendedores WHERE id = ?", (seller_id,))
+        row = cursor.fetchone()
+        events.publish(events.PRODUCT_ADDED, [(row[0] if row else None, new_product_id, name, price)], vendedor_id=seller_id)
         return True
     
     except sqlite3.Error as e:
-        print(f"Erro ao adicionar produto: {e}")
+        logger.error("Erro ao adicionar produto: %s", e, extra={"vendedor_id": seller_id})
         return False
     
     finally:
@@ -229,90 +607,194 @@ def delete_product(product_id):
     Remove um produto do banco de dados pelo seu ID.
     """
     
-    # Tenta deletar um produto
+    # Caso particular da remoção em lote
+    removed = delete_products(product_ids=[product_id])
+
+    if removed:
+        return True
+
+    if removed is not None:
+        logger.warning("Nenhum produto encontrado com ID %s.", product_id)
+
+    return False
+
+def _product_filter(product_ids=None, seller_id=None, name_contains=None, min_price=None, max_price=None):
+    """
+    Condição SQL sobre 'produtos p' para as operações em lote; os critérios informados são combinados com AND.
+    Retorna (where, params). Sem nenhum critério levanta ValueError, para nunca alterar o catálogo inteiro por engano.
+    """
+
+    # A lista de IDs vai como um único parâmetro JSON: o tamanho não esbarra no limite de variáveis do SQLite
+    conditions = []
+    params = []
+
+    if product_ids is not None:
+        conditions.append("p.id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps([str(product_id) for product_id in product_ids]))
+
+    if seller_id is not None:
+        conditions.append("p.vendedor_id = ?")
+        params.append(seller_id)
+
+    if name_contains:
+        conditions.append("p.nome LIKE ? ESCAPE '\\'")
+        params.append("%" + name_contains.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+    if min_price is not None:
+        conditions.append("p.preco >= ?")
+        params.append(min_price)
+
+    if max_price is not None:
+        conditions.append("p.preco <= ?")
+        params.append(max_price)
+
+    if not conditions:
+        raise ValueError("Informe ao menos um critério: IDs, vendedor, nome ou faixa de preço.")
+
+    return "WHERE " + " AND ".join(conditions), params
+
+def _select_products(cursor, where, params):
+    """
+    Produtos que atendem à condição, no formato de get_all_products mais o vendedor_id.
+    """
+
+    # Mesma junção de iter_products
+    cursor.execute(f"""
+        SELECT v.nome, p.id, p.nome, p.preco, p.vendedor_id
+        FROM produtos p
+        LEFT JOIN vendedores v ON v.id = p.vendedor_id
+        {where}
+        ORDER BY v.nome, p.id
+    """, params)
+    return cursor.fetchall()
+
+def _single_seller(rows):
+    """
+    vendedor_id comum a todas as linhas afetadas, ou None se forem de vendedores diferentes.
+    """
+
+    # Usado no campo vendedor_id dos eventos
+    seller_ids = {row[4] for row in rows}
+    return seller_ids.pop() if len(seller_ids) == 1 else None
+
+def update_products(price=None, percent=None, **criteria):
+    """
+    Altera o preço de vários produtos em uma única instrução UPDATE e uma única transação.
+
+    :param price: Novo preço fixo para todos os produtos selecionados.
+    :param percent: Reajuste percentual sobre o preço atual (ex: 10 para +10%, -15 para -15%), arredondado em centavos.
+    :param criteria: Seleção dos produtos (ver _product_filter): product_ids, seller_id, name_contains, min_price, max_price.
+    Retorna as linhas alteradas no formato de get_all_products, já com o preço novo, ou None em caso de erro.
+    """
+
+    # Exatamente uma forma de alteração
+    if (price is None) == (percent is None):
+        raise ValueError("Informe 'price' ou 'percent' (apenas um).")
+
+    if (price is not None and price < 0) or (percent is not None and percent <= -100):
+        raise ValueError("O preço resultante não pode ser negativo (reajustes devem ser maiores que -100%).")
+
+    where, params = _product_filter(**criteria)
+    new_price = "ROUND(?, 2)" if price is not None else "ROUND(preco * (100 + ?) / 100.0, 2)"
     conn = None
-    
+
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM produtos WHERE id = ?", (product_id,))
+        start = time.perf_counter()
+
+        # Os IDs são capturados antes do UPDATE: a faixa de preço vale para o preço atual, não para o novo
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f"SELECT p.id FROM produtos p {where}", params)
+        product_ids = json.dumps([row[0] for row in cursor.fetchall()])
+        updated = []
+
+        # Alteração e releitura pela mesma lista de IDs, na mesma transação
+        if product_ids != "[]":
+            by_id = "WHERE p.id IN (SELECT value FROM json_each(?))"
+            cursor.execute(f"UPDATE produtos AS p SET preco = {new_price} {by_id}", [price if price is not None else percent, product_ids])
+            updated = _select_products(cursor, by_id, [product_ids])
+
         conn.commit()
-        
-        if cursor.rowcount > 0:
-            print(f"Produto com ID {product_id} deletado com sucesso.")
-            return True
-        else:
-            print(f"Nenhum produto encontrado com ID {product_id}.")
-            return False
-            
+
     except sqlite3.Error as e:
-        print(f"Erro ao deletar produto: {e}")
-        return False
-    
+        logger.error("Erro ao alterar produtos em lote: %s", e, extra={"criterios": criteria})
+        return None
+
     finally:
         if conn:
             conn.close()
 
-def get_all_products():
+    # Um único evento para todas as linhas: as telas se atualizam de uma vez
+    if updated:
+        invalidate_catalog_cache()
+        events.publish(events.PRODUCTS_UPDATED, [row[:4] for row in updated], vendedor_id=_single_seller(updated))
+
+    logger.info("%s produto(s) com preço alterado.", len(updated),
+                extra={"produtos": len(updated), "criterios": criteria, "duracao_ms": round((time.perf_counter() - start) * 1000, 2)})
+    return [row[:4] for row in updated]
+
+def delete_products(**criteria):
     """
-    Busca todos os produtos com os nomes dos vendedores correspondentes.
-    Retorna uma lista de tuplas (nome_vendedor, id_produto, nome_produto, preco).
+    Remove vários produtos em uma única instrução DELETE e uma única transação.
+
+    :param criteria: Seleção dos produtos (ver _product_filter): product_ids, seller_id, name_contains, min_price, max_price.
+    Retorna as linhas removidas no formato de get_all_products, ou None em caso de erro.
     """
-    
-    # Busca todos os produtos junto com o nome do vendedor
+
+    # Mesma seleção usada na consulta e na remoção
+    where, params = _product_filter(**criteria)
     conn = None
-    
+
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
-        
-        # Consulta SQL para buscar os produtos junto com o nome do vendedor
-        sql_query = """
-        SELECT
-            v.nome,
-            p.id,
-            p.nome,
-            p.preco
-        FROM produtos p
-        JOIN vendedores v ON p.vendedor_id = v.id
-        ORDER BY v.nome, p.id;
-        """
+        start = time.perf_counter()
+
+        # As linhas removidas (para o evento) são lidas na mesma transação da remoção
+        cursor.execute("BEGIN IMMEDIATE")
+        removed = _select_products(cursor, where, params)
+
+        if removed:
+            cursor.execute(f"DELETE FROM produtos AS p {where}", params)
+
+        conn.commit()
 
-        cursor.execute(sql_query)
-        products = cursor.fetchall()
-        return products
-    
     except sqlite3.Error as e:
-        print(f"Erro ao buscar produtos: {e}")
-        return []
-    
+        logger.error("Erro ao deletar produtos em lote: %s", e, extra={"criterios": criteria})
+        return None
+
     finally:
         if conn:
             conn.close()
 
+    # Um único evento para todas as linhas removidas
+    if removed:
+        invalidate_catalog_cache()
+        events.publish(events.PRODUCT_DELETED, [row[:4] for row in removed], vendedor_id=_single_seller(removed))
+        logger.info("%s produto(s) deletado(s) com sucesso.", len(removed),
+                    extra={"produtos": len(removed), "produto_ids": [row[1] for row in removed][:50],
+                           "duracao_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+    return [row[:4] for row in removed]
+
+def get_all_products():
+    """
+    Busca todos os produtos com os nomes dos vendedores correspondentes.
+    Retorna uma lista de tuplas (nome_vendedor, id_produto, nome_produto, preco).
+    """
+    
+    # Lista montada a partir do iterador (catálogo em memória ou banco)
+    return list(iter_products())
+
 def get_products_by_seller(seller_id):
     """
     Busca todos os produtos de um vendedor específico.
     Retorna uma lista de tuplas (id_produto, nome_produto, preco).
     """
     
-    # Busca os produtos de um vendedor específico
-    conn = None
-    
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, nome, preco FROM produtos WHERE vendedor_id = ? ORDER BY nome", (seller_id,))
-        products = cursor.fetchall()
-        return products
-    
-    except sqlite3.Error as e:
-        print(f"Erro ao buscar produtos por vendedor: {e}")
-        return []
-    
-    finally:
-        if conn:
-            conn.close()
+    # Lista montada a partir do iterador (catálogo em memória ou banco)
+    return list(iter_products_by_seller(seller_id))
 
 def get_product_details(product_id):
     """
@@ -324,20 +806,38 @@ def get_product_details(product_id):
     conn = None
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
         cursor.execute("SELECT id, nome, preco FROM produtos WHERE id = ?", (product_id,))
         product = cursor.fetchone()
         return product
     
     except sqlite3.Error as e:
-        print(f"Erro ao buscar detalhes do produto: {e}")
+        logger.error("Erro ao buscar detalhes do produto: %s", e, extra={"produto_id": product_id})
         return None
     
     finally:
         if conn:
             conn.close()
 
+def read_config(cursor, chave, default=None):
+    """
+    Lê uma configuração usando o cursor informado (dentro da transação de quem chama).
+    """
+
+    # Busca o valor na mesma conexão
+    cursor.execute("SELECT valor FROM configuracoes WHERE chave = ?", (chave,))
+    resultado = cursor.fetchone()
+    return resultado[0] if resultado else default
+
+def write_config(cursor, chave, valor):
+    """
+    Grava uma configuração usando o cursor informado, sem confirmar a transação.
+    """
+
+    # Salva ou atualiza a configuração
+    cursor.execute("REPLACE INTO configuracoes (chave, valor) VALUES (?, ?)", (chave, str(valor)))
+
 def get_config(chave):
     """
     Busca o valor de uma configuração específica.
@@ -348,14 +848,14 @@ def get_config(chave):
     conn = None
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
         cursor.execute("SELECT valor FROM configuracoes WHERE chave = ?", (chave,))
         resultado = cursor.fetchone()
         return resultado[0] if resultado else '0.0'
     
     except sqlite3.Error as e:
-        print(f"Erro ao buscar configuração '{chave}': {e}")
+        logger.error("Erro ao buscar configuração '%s': %s", chave, e)
         return '0.0'
     
     finally:
@@ -371,21 +871,97 @@ def set_config(chave, valor):
     conn = None
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
         cursor.execute("REPLACE INTO configuracoes (chave, valor) VALUES (?, ?)", (chave, valor))
         conn.commit()
         return True
     
     except sqlite3.Error as e:
-        print(f"Erro ao salvar configuração '{chave}': {e}")
+        logger.error("Erro ao salvar configuração '%s': %s", chave, e)
         return False
     
     finally:
         if conn:
             conn.close()
 
-def register_sale(vendedor_id, valor_total, cart_items, payments):
+def _insert_sale(cursor, vendedor_id, valor_total, cart_items, payments, data_venda=None, venda_uuid=None, atendimento=None):
+    """
+    Insere uma venda, seus itens e pagamentos usando o cursor informado, sem confirmar a transação.
+    'atendimento' identifica o checkout quando um carrinho com vários vendedores vira várias vendas.
+    Retorna o ID local da venda criada.
+    """
+
+    # 1. Inserir na tabela 'vendas' (o recibo geral)
+    if data_venda is None:
+        data_venda = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Identificador global, único entre todos os terminais
+    if venda_uuid is None:
+        venda_uuid = uuid.uuid4().hex
+
+    cursor.execute(
+        "INSERT INTO vendas (vendedor_id, valor_total, data_venda, uuid, atendimento) VALUES (?, ?, ?, ?, ?)",
+        (vendedor_id, valor_total, data_venda, venda_uuid, atendimento)
+    )
+
+    # Pega o ID da venda que acabamos de criar
+    venda_id = cursor.lastrowid
+
+    # 2. Inserir na tabela 'venda_itens' (os produtos do carrinho), com a cópia dos nomes
+    cursor.execute("SELECT nome FROM vendedores WHERE id = ?", (vendedor_id,))
+    row = cursor.fetchone()
+    vendedor_nome = row[0] if row else None
+    itens_para_inserir = []
+
+    for item in cart_items:
+
+        # Usa o nome que veio do carrinho; se não veio, busca no cadastro
+        produto_nome = item.get('nome')
+
+        if produto_nome is None:
+            cursor.execute("SELECT nome FROM produtos WHERE id = ?", (item['produto_id'],))
+            row = cursor.fetchone()
+            produto_nome = row[0] if row else item['produto_id']
+
+        itens_para_inserir.append(
+            (venda_id, item['produto_id'], item['quantidade'], item['preco_unitario'], produto_nome, vendedor_id, vendedor_nome)
+        )
+    cursor.executemany(
+        """INSERT INTO venda_itens (venda_id, produto_id, quantidade, preco_unitario_na_venda, produto_nome, vendedor_id, vendedor_nome)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        itens_para_inserir
+    )
+
+    # 3. Inserir na tabela 'venda_pagamentos' (os pagamentos)
+    pagamentos_para_inserir = []
+
+    for pagamento in payments:
+        pagamentos_para_inserir.append(
+            (venda_id, pagamento['metodo'], pagamento['valor'])
+        )
+    cursor.executemany(
+        "INSERT INTO venda_pagamentos (venda_id, metodo, valor) VALUES (?, ?, ?)",
+        pagamentos_para_inserir
+    )
+
+    return venda_id
+
+def _sale_row(cursor, venda_id):
+    """
+    Retorna a linha de uma venda no formato de get_sales_page: (id, data_venda, nome_vendedor, valor_total).
+    """
+
+    # Consulta pela chave primária
+    cursor.execute("""
+        SELECT v.id, v.data_venda, s.nome, v.valor_total
+        FROM vendas v
+        LEFT JOIN vendedores s ON s.id = v.vendedor_id
+        WHERE v.id = ?
+    """, (venda_id,))
+    return cursor.fetchone()
+
+def register_sale(vendedor_id, valor_total, cart_items, payments, atendimento=None):
     """
     Registra uma venda completa no banco de dados usando uma transação.
     
@@ -395,57 +971,43 @@ def register_sale(vendedor_id, valor_total, cart_items, payments):
                        Ex: [{'produto_id': 'PROD-0001', 'quantidade': 2, 'preco_unitario': 10.0}, ...]
     :param payments: Lista de dicionários, cada um representando um pagamento.
                      Ex: [{'metodo': 'Pix', 'valor': 20.0}, ...]
+    :param atendimento: Identificador do checkout, comum às vendas de um mesmo carrinho dividido por vendedor.
     """
     
     # Registra uma venda completa usando uma transação para garantir integridade dos dados
     conn = None
+    start = time.perf_counter()
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
         cursor.execute("PRAGMA foreign_keys = ON")
 
-        # 1. Inserir na tabela 'vendas' (o recibo geral)
-        data_atual = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute(
-            "INSERT INTO vendas (vendedor_id, valor_total, data_venda) VALUES (?, ?, ?)",
-            (vendedor_id, valor_total, data_atual)
-        )
-        
-        # Pega o ID da venda que acabamos de criar
-        venda_id = cursor.lastrowid
-
-        # 2. Inserir na tabela 'venda_itens' (os produtos do carrinho)
-        itens_para_inserir = []
-        
-        for item in cart_items:
-            itens_para_inserir.append(
-                (venda_id, item['produto_id'], item['quantidade'], item['preco_unitario'])
-            )
-        cursor.executemany(
-            "INSERT INTO venda_itens (venda_id, produto_id, quantidade, preco_unitario_na_venda) VALUES (?, ?, ?, ?)",
-            itens_para_inserir
-        )
-
-        # 3. Inserir na tabela 'venda_pagamentos' (os pagamentos)
-        pagamentos_para_inserir = []
-        
-        for pagamento in payments:
-            pagamentos_para_inserir.append(
-                (venda_id, pagamento['metodo'], pagamento['valor'])
-            )
-        cursor.executemany(
-            "INSERT INTO venda_pagamentos (venda_id, metodo, valor) VALUES (?, ?, ?)",
-            pagamentos_para_inserir
-        )
+        # Insere a venda, os itens e os pagamentos na mesma transação
+        venda_id = _insert_sale(cursor, vendedor_id, valor_total, cart_items, payments, atendimento=atendimento)
+        row = _sale_row(cursor, venda_id)
 
         # Confirma todas as operações se tudo deu certo
         conn.commit()
-        print(f"Venda ID {venda_id} registrada com sucesso!")
+        logger.info("Venda ID %s registrada com sucesso!", venda_id, extra={
+            "venda_id": venda_id,
+            "vendedor_id": vendedor_id,
+            "valor_total": valor_total,
+            "itens": len(cart_items),
+            "duracao_ms": round((time.perf_counter() - start) * 1000, 2)
+        })
+
+        # Avisa os interessados (ex: contadores do painel) somente após a confirmação
+        events.publish(events.SALE_REGISTERED, [row], vendedor_id=vendedor_id, cart_items=cart_items, payments=payments,
+                       atendimento=atendimento)
         return True
 
     except sqlite3.Error as e:
-        print(f"Erro ao registrar venda. A transação foi revertida. Erro: {e}")
+        logger.error("Erro ao registrar venda. A transação foi revertida. Erro: %s", e, extra={
+            "vendedor_id": vendedor_id,
+            "valor_total": valor_total,
+            "duracao_ms": round((time.perf_counter() - start) * 1000, 2)
+        })
         
         if conn:
             conn.rollback()
@@ -455,95 +1017,261 @@ def register_sale(vendedor_id, valor_total, cart_items, payments):
         if conn:
             conn.close()
 
-def generate_sales_report():
+def get_sales_page(limit=50, after=None, seller_id=None, date_from=None, date_to=None):
+    """
+    Busca uma página do histórico de vendas, da mais recente para a mais antiga.
+    Usa paginação por chave (data_venda, id): o custo de cada página não depende de quantas já foram lidas.
+
+    :param limit: Quantidade máxima de vendas na página.
+    :param after: Cursor (data_venda, id) da última venda da página anterior; None para a primeira página.
+    :param seller_id: Filtra por vendedor, se informado.
+    :param date_from: Data inicial (AAAA-MM-DD), inclusiva.
+    :param date_to: Data final (AAAA-MM-DD), inclusiva.
+    Retorna (vendas, proximo_cursor): vendas é uma lista de (id, data_venda, nome_vendedor, valor_total)
+    e proximo_cursor é None quando não há mais páginas.
+    """
+
+    # Monta os filtros apenas com as condições informadas, para o SQLite usar os índices
+    conditions = []
+    params = []
+
+    if seller_id is not None:
+        conditions.append("v.vendedor_id = ?")
+        params.append(seller_id)
+
+    if date_from:
+        conditions.append("v.data_venda >= ?")
+        params.append(str(date_from))
+
+    # Data final inclusiva: tudo antes do dia seguinte
+    if date_to:
+        next_day = datetime.date.fromisoformat(str(date_to)) + datetime.timedelta(days=1)
+        conditions.append("v.data_venda < ?")
+        params.append(next_day.isoformat())
+
+    if after is not None:
+        conditions.append("(v.data_venda, v.id) < (?, ?)")
+        params.extend(after)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Busca uma venda a mais para saber se existe a próxima página
+    conn = None
+
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT v.id, v.data_venda, ve.nome, v.valor_total
+            FROM vendas v
+            JOIN vendedores ve ON ve.id = v.vendedor_id
+            {where}
+            ORDER BY v.data_venda DESC, v.id DESC
+            LIMIT ?
+        """, (*params, limit + 1))
+        rows = cursor.fetchall()
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            return rows, (last[1], last[0])
+
+        return rows, None
+
+    except sqlite3.Error as e:
+        logger.error("Erro ao buscar histórico de vendas: %s", e)
+        return [], None
+
+    finally:
+        if conn:
+            conn.close()
+
+def get_sale_details(venda_id):
+    """
+    Busca os itens e os pagamentos de uma venda.
+    Retorna (itens, pagamentos): listas de (produto_id, nome, quantidade, preco_unitario) e (metodo, valor).
+    """
+
+    # Duas consultas pelo índice de venda_id
+    conn = None
+
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT produto_id, produto_nome, quantidade, preco_unitario_na_venda
+            FROM venda_itens
+            WHERE venda_id = ?
+            ORDER BY id
+        """, (venda_id,))
+        itens = cursor.fetchall()
+
+        cursor.execute("SELECT metodo, valor FROM venda_pagamentos WHERE venda_id = ? ORDER BY id", (venda_id,))
+        pagamentos = cursor.fetchall()
+        return itens, pagamentos
+
+    except sqlite3.Error as e:
+        logger.error("Erro ao buscar detalhes da venda %s: %s", venda_id, e, extra={"venda_id": venda_id})
+        return [], []
+
+    finally:
+        if conn:
+            conn.close()
+
+def _fetch_seller_aggregates(cursor, vendedor_id):
+    """
+    Busca os agregados de um vendedor usados no relatório.
+    Retorna (produtos_vendidos, pagamentos): listas de (id, nome, quantidade) e (metodo, valor).
+    """
+
+    # Produtos vendidos pelo vendedor (cópia gravada na venda, sem JOIN com o catálogo)
+    cursor.execute("""
+        SELECT produto_id, produto_nome, SUM(quantidade)
+        FROM venda_itens
+        WHERE vendedor_id = ?
+        GROUP BY produto_id, produto_nome
+        ORDER BY produto_nome, produto_id
+    """, (vendedor_id,))
+    produtos_vendidos = cursor.fetchall()
+
+    # Resumo de pagamentos do vendedor
+    cursor.execute("""
+        SELECT vp.metodo, SUM(vp.valor)
+        FROM venda_pagamentos vp
+        JOIN vendas v ON vp.venda_id = v.id
+        WHERE v.vendedor_id = ?
+        GROUP BY vp.metodo
+        ORDER BY vp.metodo
+    """, (vendedor_id,))
+    pagamentos = cursor.fetchall()
+
+    return produtos_vendidos, pagamentos
+
+def _format_currency(valor):
+    """
+    Formata um valor no padrão R$ 0.000,00.
+    """
+
+    # Troca os separadores do formato americano pelo brasileiro
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def _format_report(vendedores, aggregates):
+    """
+    Monta o texto do relatório a partir da lista ordenada de (vendedor_id, nome)
+    e do dicionário {vendedor_id: (produtos_vendidos, pagamentos)}.
+    """
+
+    # Cabeçalho
+    report_lines = [
+        "=====================================",
+        "      RELATÓRIO GERAL DE VENDAS      ",
+        "=====================================",
+        ""
+    ]
+
+    # Uma seção por vendedor, na ordem recebida
+    for vendedor_id, vendedor_nome in vendedores:
+        produtos_vendidos, pagamentos = aggregates.get(vendedor_id, ([], []))
+
+        report_lines.append("-------------------------------------")
+        report_lines.append(f"VENDEDOR: {vendedor_nome}")
+        report_lines.append("-------------------------------------")
+        report_lines.append("")
+
+        report_lines.append("  PRODUTOS VENDIDOS:")
+        
+        if not produtos_vendidos:
+            report_lines.append("    - Nenhum produto vendido neste período.")
+        
+        else:
+            for prod_id, prod_nome, quantidade in produtos_vendidos:
+                report_lines.append(f"    - [{prod_id}] {prod_nome}: {quantidade} unidade(s)")
+        
+        report_lines.append("")
+
+        total_recebido = 0
+        report_lines.append("  RESUMO DE PAGAMENTOS:")
+        
+        if not pagamentos:
+            report_lines.append("    - Nenhum pagamento registrado.")
+        
+        else:
+            for metodo, valor in pagamentos:
+                total_recebido += valor
+                report_lines.append(f"    - {metodo}: {_format_currency(valor)}")
+        
+        report_lines.append(f"    - TOTAL RECEBIDO: {_format_currency(total_recebido)}")
+        report_lines.append("")
+
+    return "\n".join(report_lines)
+
+def _fetch_report_sellers(cursor):
+    """
+    Lista (vendedor_id, nome) dos vendedores com vendas, na ordem do relatório.
+    """
+
+    # Usa a cópia do nome gravada nos itens
+    cursor.execute("""
+        SELECT DISTINCT vendedor_id, vendedor_nome
+        FROM venda_itens
+        ORDER BY vendedor_nome, vendedor_id
+    """)
+    return cursor.fetchall()
+
+def generate_sales_report(progress_callback=None, cancel_event=None, db_path=None):
     """
     Busca todos os dados de vendas e gera uma string de relatório formatado.
+
+    :param progress_callback: Função opcional chamada como progress_callback(processados, total) a cada vendedor.
+    :param cancel_event: threading.Event opcional; quando marcado, a consulta em andamento é interrompida
+                         e a função retorna None.
+    :param db_path: Banco a ler (padrão: DB_PATH), ex: a cópia usada em uma medição.
     """
     
     # Gera um relatório geral de vendas
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect(db_path)
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT DISTINCT v.id, v.nome
-            FROM vendedores v
-            JOIN vendas ON v.id = vendas.vendedor_id
-            ORDER BY v.nome
-        """)
-        vendedores = cursor.fetchall()
+
+        # Permite interromper uma consulta longa assim que o cancelamento for pedido
+        if cancel_event is not None:
+            conn.set_progress_handler(lambda: 1 if cancel_event.is_set() else 0, 1000)
+
+        # 1. Vendedores com vendas
+        vendedores = _fetch_report_sellers(cursor)
 
         if not vendedores:
             return "Nenhuma venda registrada para gerar relatório."
 
-        report_lines = [
-            "=====================================",
-            "      RELATÓRIO GERAL DE VENDAS      ",
-            "=====================================",
-            ""
-        ]
-
         # 2. Para cada vendedor, buscar seus dados
-        for vendedor_id, vendedor_nome in vendedores:
-            report_lines.append("-------------------------------------")
-            report_lines.append(f"VENDEDOR: {vendedor_nome}")
-            report_lines.append("-------------------------------------")
-            report_lines.append("")
+        aggregates = {}
 
-            # 3. Buscar produtos vendidos pelo vendedor
-            cursor.execute("""
-                SELECT p.id, p.nome, SUM(vi.quantidade)
-                FROM venda_itens vi
-                JOIN vendas v ON vi.venda_id = v.id
-                JOIN produtos p ON vi.produto_id = p.id
-                WHERE v.vendedor_id = ?
-                GROUP BY p.id, p.nome
-                ORDER BY p.nome
-            """, (vendedor_id,))
-            produtos_vendidos = cursor.fetchall()
-
-            report_lines.append("  PRODUTOS VENDIDOS:")
-            
-            if not produtos_vendidos:
-                report_lines.append("    - Nenhum produto vendido neste período.")
-            
-            else:
-                for prod_id, prod_nome, quantidade in produtos_vendidos:
-                    report_lines.append(f"    - [{prod_id}] {prod_nome}: {quantidade} unidade(s)")
-            
-            report_lines.append("")
-
-            # 4. Buscar resumo de pagamentos para o vendedor
-            cursor.execute("""
-                SELECT vp.metodo, SUM(vp.valor)
-                FROM venda_pagamentos vp
-                JOIN vendas v ON vp.venda_id = v.id
-                WHERE v.vendedor_id = ?
-                GROUP BY vp.metodo
-                ORDER BY vp.metodo
-            """, (vendedor_id,))
-            pagamentos = cursor.fetchall()
-            
-            total_recebido = 0
-            report_lines.append("  RESUMO DE PAGAMENTOS:")
-            
-            if not pagamentos:
-                report_lines.append("    - Nenhum pagamento registrado.")
-            
-            else:
-                for metodo, valor in pagamentos:
-                    total_recebido += valor
-                    valor_formatado = f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                    report_lines.append(f"    - {metodo}: {valor_formatado}")
-            
-            total_formatado = f"R$ {total_recebido:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            report_lines.append(f"    - TOTAL RECEBIDO: {total_formatado}")
-            report_lines.append("")
-
-        return "\n".join(report_lines)
+        for processados, (vendedor_id, vendedor_nome) in enumerate(vendedores):
+
+            # Verifica o cancelamento entre um vendedor e outro
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+
+            if progress_callback:
+                progress_callback(processados, len(vendedores))
+
+            aggregates[vendedor_id] = _fetch_seller_aggregates(cursor, vendedor_id)
+
+        if progress_callback:
+            progress_callback(len(vendedores), len(vendedores))
+
+        # 3. Monta o texto final
+        return _format_report(vendedores, aggregates)
 
     except sqlite3.Error as e:
-        print(f"Erro ao gerar relatório: {e}")
+
+        # Consulta interrompida pelo cancelamento não é um erro
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info("Geração do relatório cancelada.")
+            return None
+
+        logger.error("Erro ao gerar relatório: %s", e)
         return f"Erro ao gerar relatório: {e}"
     
     finally:
@@ -560,18 +1288,25 @@ def clear_sales_data():
     conn = None
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect()
         cursor = conn.cursor()
         cursor.execute("PRAGMA foreign_keys = ON")
         cursor.execute("DELETE FROM venda_pagamentos")
         cursor.execute("DELETE FROM venda_itens")
         cursor.execute("DELETE FROM vendas")
+
+        # Nova geração do histórico: caches de relatório (inclusive de outros processos) são descartados
+        cursor.execute("""
+            REPLACE INTO configuracoes (chave, valor)
+            VALUES (?, CAST(COALESCE((SELECT CAST(valor AS INTEGER) FROM configuracoes WHERE chave = ?), 0) + 1 AS TEXT))
+        """, (SALES_GENERATION_KEY, SALES_GENERATION_KEY))
         
         conn.commit()
+        events.publish(events.SALES_CLEARED)
         return True
     
     except sqlite3.Error as e:
-        print(f"Erro ao limpar dados de vendas: {e}")
+        logger.error("Erro ao limpar dados de vendas: %s", e)
         return False
     
     finally:
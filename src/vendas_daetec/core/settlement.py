@@ -0,0 +1,319 @@
+import sqlite3
+import csv
+import json
+import logging
+import argparse
+import datetime
+from pathlib import Path
+
+from . import sales_logic
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Chave de 'configuracoes' com as taxas por método de pagamento, em JSON: {"Crédito": 3.5, ...} (percentual)
+FEES_CONFIG_KEY = "taxas_pagamento"
+
+# Prefixo das chaves de 'configuracoes' com o acerto já calculado de um período encerrado
+CACHE_KEY_PREFIX = "acerto_cache"
+
+def get_fees(db_path=None):
+    """
+    Retorna as taxas por método de pagamento: {metodo: percentual}.
+    """
+
+    # Métodos sem taxa cadastrada não aparecem
+    conn = sales_logic._connect(db_path)
+
+    try:
+        return json.loads(sales_logic.read_config(conn.cursor(), FEES_CONFIG_KEY, "{}"))
+
+    finally:
+        conn.close()
+
+def set_fee(method, percent, db_path=None):
+    """
+    Define a taxa (percentual) de um método de pagamento; percent=None remove a taxa.
+    Levanta ValueError se o método não for um dos métodos do caixa (sales_logic.PAYMENT_METHODS)
+    ou se o percentual for negativo.
+    """
+
+    # Uma taxa com nome errado nunca seria aplicada: rejeita antes de gravar
+    if method not in sales_logic.PAYMENT_METHODS:
+        raise ValueError(f"Método de pagamento desconhecido: {method!r} (use {', '.join(sales_logic.PAYMENT_METHODS)}).")
+
+    if percent is not None and float(percent) < 0:
+        raise ValueError("A taxa não pode ser negativa.")
+
+    # Lê, altera e grava o JSON na mesma transação
+    conn = sales_logic._connect(db_path)
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        fees = json.loads(sales_logic.read_config(cursor, FEES_CONFIG_KEY, "{}"))
+
+        if percent is None:
+            fees.pop(method, None)
+        else:
+            fees[method] = float(percent)
+
+        sales_logic.write_config(cursor, FEES_CONFIG_KEY, json.dumps(fees, ensure_ascii=False, sort_keys=True))
+        conn.commit()
+
+    finally:
+        conn.close()
+
+def _period_filter(date_from, date_to):
+    """
+    Condição SQL sobre vendas.data_venda para o período (datas AAAA-MM-DD inclusivas, como em get_sales_page).
+    """
+
+    # Só as condições informadas, para o SQLite usar idx_vendas_data
+    conditions = []
+    params = []
+
+    if date_from:
+        conditions.append("v.data_venda >= ?")
+        params.append(str(date_from))
+
+    if date_to:
+        next_day = datetime.date.fromisoformat(str(date_to)) + datetime.timedelta(days=1)
+        conditions.append("v.data_venda < ?")
+        params.append(next_day.isoformat())
+
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+def _fingerprint(cursor, where, params):
+    """
+    Identifica o conteúdo do período (quantidade e maior ID de venda, geração do histórico).
+    Usa apenas o índice de data; se mudar, o acerto guardado não vale mais.
+    """
+
+    # Vendas sincronizadas depois do fechamento mudam a contagem e o maior ID
+    cursor.execute(f"SELECT COUNT(*), COALESCE(MAX(v.id), 0) FROM vendas v {where}", params)
+    count, max_id = cursor.fetchone()
+    generation = sales_logic.read_config(cursor, sales_logic.SALES_GENERATION_KEY, "0")
+    return [count, max_id, generation]
+
+def _aggregate(cursor, where, params):
+    """
+    Uma única agregação: total recebido por vendedor e método de pagamento no período.
+    Retorna [(vendedor_id, nome, metodo, total)].
+    """
+
+    # Os pagamentos são gravados por venda (um vendedor por venda), então somá-los dá o bruto de cada vendedor
+    cursor.execute(f"""
+        SELECT v.vendedor_id, COALESCE(s.nome, 'Vendedor ' || v.vendedor_id), vp.metodo, SUM(vp.valor)
+        FROM vendas v
+        JOIN venda_pagamentos vp ON vp.venda_id = v.id
+        LEFT JOIN vendedores s ON s.id = v.vendedor_id
+        {where}
+        GROUP BY v.vendedor_id, vp.metodo
+    """, params)
+    return cursor.fetchall()
+
+def compute_settlement(date_from=None, date_to=None, db_path=None, use_cache=True):
+    """
+    Calcula o acerto com cada vendedor no período: bruto, total por método, taxas e valor líquido a repassar.
+    Períodos encerrados (data final antes de hoje) são guardados em 'configuracoes' e reaproveitados
+    enquanto nenhuma venda do período mudar; as taxas são aplicadas sempre sobre os totais.
+
+    Retorna um dicionário com:
+      'periodo': (date_from, date_to);
+      'metodos': métodos de pagamento presentes, em ordem alfabética;
+      'taxas': {metodo: percentual};
+      'vendedores': [{'vendedor_id', 'nome', 'por_metodo', 'bruto', 'taxas', 'liquido'}], ordenados pelo nome;
+      'totais': {'por_metodo', 'bruto', 'taxas', 'liquido'};
+      'em_cache': True se os totais vieram do acerto guardado.
+    Retorna None em caso de erro.
+    """
+
+    # Períodos abertos podem receber vendas a qualquer momento: nunca são guardados
+    closed = bool(date_to) and str(date_to) < datetime.date.today().isoformat()
+    cache_key = f"{CACHE_KEY_PREFIX}:{date_from or ''}:{date_to}"
+    conn = None
+
+    try:
+        where, params = _period_filter(date_from, date_to)
+        conn = sales_logic._connect(db_path)
+        cursor = conn.cursor()
+        fees = json.loads(sales_logic.read_config(cursor, FEES_CONFIG_KEY, "{}"))
+        rows = None
+        cached = False
+
+        # Leitura consistente: a impressão digital e a agregação veem o mesmo instantâneo
+        cursor.execute("BEGIN")
+
+        if closed:
+            fingerprint = _fingerprint(cursor, where, params)
+            stored = sales_logic.read_config(cursor, cache_key)
+
+            if use_cache and stored:
+                stored = json.loads(stored)
+                if stored["impressao"] == fingerprint:
+                    rows = [tuple(row) for row in stored["linhas"]]
+                    cached = True
+
+        if rows is None:
+            rows = _aggregate(cursor, where, params)
+
+        conn.rollback()
+
+        # Guarda o resultado do período encerrado para as próximas consultas
+        if closed and not cached:
+            cursor.execute("BEGIN IMMEDIATE")
+            sales_logic.write_config(cursor, cache_key, json.dumps({"impressao": fingerprint, "linhas": rows}, ensure_ascii=False))
+            conn.commit()
+
+    except ValueError as e:
+        logger.error("Período inválido para o acerto (%s a %s): %s", date_from, date_to, e)
+        return None
+
+    except sqlite3.Error as e:
+        logger.error("Erro ao calcular o acerto dos vendedores: %s", e)
+        return None
+
+    finally:
+        if conn:
+            conn.close()
+
+    return _build_result(rows, fees, date_from, date_to, cached)
+
+def _build_result(rows, fees, date_from, date_to, cached):
+    """
+    Aplica as taxas sobre os totais por vendedor e método e monta o resultado de compute_settlement.
+    """
+
+    # Agrupa as linhas da agregação por vendedor (cálculo em memória, proporcional ao número de vendedores)
+    sellers = {}
+    methods = set()
+
+    for vendedor_id, nome, metodo, total in rows:
+        seller = sellers.setdefault(vendedor_id, {"vendedor_id": vendedor_id, "nome": nome, "por_metodo": {}})
+        seller["por_metodo"][metodo] = round(total, 2)
+        methods.add(metodo)
+
+    totals = {"por_metodo": {}, "bruto": 0.0, "taxas": 0.0, "liquido": 0.0}
+
+    for seller in sellers.values():
+        seller["bruto"] = round(sum(seller["por_metodo"].values()), 2)
+        seller["taxas"] = round(sum(round(valor * fees.get(metodo, 0.0) / 100, 2) for metodo, valor in seller["por_metodo"].items()), 2)
+        seller["liquido"] = round(seller["bruto"] - seller["taxas"], 2)
+
+        for metodo, valor in seller["por_metodo"].items():
+            totals["por_metodo"][metodo] = round(totals["por_metodo"].get(metodo, 0.0) + valor, 2)
+
+        for key in ("bruto", "taxas", "liquido"):
+            totals[key] = round(totals[key] + seller[key], 2)
+
+    return {
+        "periodo": (date_from, date_to),
+        "metodos": sorted(methods),
+        "taxas": fees,
+        "vendedores": sorted(sellers.values(), key=lambda seller: (seller["nome"].casefold(), seller["vendedor_id"])),
+        "totais": totals,
+        "em_cache": cached
+    }
+
+def _table_rows(result):
+    """
+    Linhas da tabela de acerto: cabeçalho, um vendedor por linha e o total geral.
+    """
+
+    # Uma coluna por método de pagamento, depois bruto, taxas e líquido
+    methods = result["metodos"]
+    header = ["Vendedor"] + [f"{metodo} ({result['taxas'].get(metodo, 0.0):g}%)" for metodo in methods] + ["Bruto", "Taxas", "Líquido"]
+    rows = [header]
+
+    for seller in result["vendedores"] + [dict(result["totais"], nome="TOTAL")]:
+        rows.append([seller["nome"]] + [seller["por_metodo"].get(metodo, 0.0) for metodo in methods]
+                    + [seller["bruto"], seller["taxas"], seller["liquido"]])
+
+    return rows
+
+def format_table(result):
+    """
+    Tabela de texto do acerto, com valores no formato R$ 0.000,00.
+    """
+
+    # Larguras calculadas pelo maior valor de cada coluna
+    rows = [[cell if isinstance(cell, str) else sales_logic._format_currency(cell) for cell in row] for row in _table_rows(result)]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    date_from, date_to = result["periodo"]
+
+    lines = [f"ACERTO DE VENDEDORES ({date_from or 'início'} a {date_to or 'hoje'})", ""]
+
+    for index, row in enumerate(rows):
+        lines.append("  ".join(cell.ljust(widths[0]) if i == 0 else cell.rjust(widths[i]) for i, cell in enumerate(row)))
+
+        # Separadores abaixo do cabeçalho e acima do total
+        if index == 0 or index == len(rows) - 2:
+            lines.append("  ".join("-" * width for width in widths))
+
+    return "\n".join(lines)
+
+def export_csv(result, path):
+    """
+    Grava o acerto em CSV (separador ';' e vírgula decimal, como o Excel em português espera).
+    """
+
+    # utf-8-sig: o Excel reconhece a acentuação
+    with open(path, "w", newline="", encoding="utf-8-sig") as file:
+        writer = csv.writer(file, delimiter=";")
+
+        for row in _table_rows(result):
+            writer.writerow([cell if isinstance(cell, str) else f"{cell:.2f}".replace(".", ",") for cell in row])
+
+def main(argv=None):
+    """
+    Linha de comando: acerto dos vendedores e cadastro das taxas por método de pagamento.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Acerto de valores com os vendedores ao fim do evento.")
+    parser.add_argument("--db", help="Banco de dados (padrão: data/planilhas.db).")
+    parser.add_argument("--de", help="Data inicial (AAAA-MM-DD).")
+    parser.add_argument("--ate", help="Data final (AAAA-MM-DD).")
+    parser.add_argument("--csv", help="Arquivo CSV onde salvar o acerto.")
+    parser.add_argument("--taxa", action="append", default=[], metavar="METODO=PERCENTUAL",
+                        help="Define a taxa de um método (ex: 'Crédito=3,5'); percentual vazio remove a taxa. "
+                             f"Métodos: {', '.join(sales_logic.PAYMENT_METHODS)}.")
+    parser.add_argument("--sem-cache", action="store_true", help="Recalcula mesmo se o período já tiver sido fechado.")
+    args = parser.parse_args(argv)
+
+    # Datas validadas antes de tocar no banco
+    for value in (args.de, args.ate):
+        if value:
+            try:
+                datetime.date.fromisoformat(value)
+            except ValueError:
+                parser.error(f"data inválida: {value!r} (use AAAA-MM-DD)")
+
+    db_path = Path(args.db) if args.db else sales_logic.DB_PATH
+    sales_logic.initialize_database(db_path)
+
+    # Taxas primeiro: o acerto já sai com os valores novos
+    for item in args.taxa:
+        method, _, percent = item.partition("=")
+
+        try:
+            set_fee(method.strip(), float(percent.replace(",", ".")) if percent.strip() else None, db_path)
+        except ValueError as e:
+            parser.error(f"taxa inválida {item!r}: {e}")
+
+    result = compute_settlement(args.de, args.ate, db_path, use_cache=not args.sem_cache)
+
+    if result is None:
+        return 2
+
+    print(format_table(result))
+
+    if args.csv:
+        export_csv(result, args.csv)
+        print(f"Acerto salvo em: {args.csv}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
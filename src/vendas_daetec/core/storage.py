@@ -0,0 +1,185 @@
+import sqlite3
+import uuid
+import threading
+import contextlib
+from pathlib import Path
+
+from . import events
+
+# Tabelas de histórico descartadas quando o modo de treinamento copia apenas o catálogo
+SALES_TABLES = ("venda_pagamentos", "venda_itens", "vendas")
+
+class FileBackend:
+    """
+    Armazenamento padrão: arquivo SQLite em disco (DB_PATH ou o caminho informado).
+    """
+
+    name = "arquivo"
+    persistent = True
+
+    def connect(self, db_path, **options):
+        """
+        Abre uma conexão com o arquivo. 'options' são repassadas para sqlite3.connect.
+        """
+
+        # Conexão direta ao arquivo
+        return sqlite3.connect(db_path, **options)
+
+    def close(self):
+        """
+        Nada a liberar: os dados ficam no arquivo.
+        """
+
+        # Mantido para a mesma interface de MemoryBackend
+        pass
+
+class MemoryBackend:
+    """
+    Armazenamento em memória, compartilhado por todas as conexões do processo e descartado em close().
+    Usado no modo de treinamento e em medições que não devem tocar o banco de produção nem o disco.
+    """
+
+    name = "memoria"
+    persistent = False
+
+    def __init__(self, label=None):
+        """
+        Cria um banco vazio em memória. 'label' só ajuda a identificá-lo (ex: "treinamento").
+        """
+
+        # VFS memdb: várias conexões no mesmo banco com travas normais (busy_timeout funciona);
+        # SQLite sem memdb (< 3.36) cai no cache compartilhado
+        name = f"vendas_{label or 'memoria'}_{uuid.uuid4().hex[:8]}"
+        self.label = label or self.name
+        self.uri = f"file:/{name}?vfs=memdb"
+
+        try:
+            self._anchor = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+        except sqlite3.OperationalError:
+            self.uri = f"file:{name}?mode=memory&cache=shared"
+            self._anchor = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+    def connect(self, db_path=None, **options):
+        """
+        Abre uma conexão com o banco em memória ('db_path' é ignorado).
+        """
+
+        # A conexão âncora mantém o banco vivo enquanto as demais abrem e fecham
+        if self._anchor is None:
+            raise sqlite3.ProgrammingError("Armazenamento em memória já foi fechado.")
+
+        return sqlite3.connect(self.uri, uri=True, **options)
+
+    def load_from(self, db_path, catalog_only=False):
+        """
+        Copia um banco em disco para a memória; com 'catalog_only' mantém só vendedores, produtos e configurações.
+        """
+
+        # Backup online: não bloqueia o arquivo de origem por mais que uma passada
+        source = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+
+        try:
+            source.backup(self._anchor)
+
+        finally:
+            source.close()
+
+        if catalog_only:
+            for table in SALES_TABLES:
+                self._anchor.execute(f"DELETE FROM {table}")
+            self._anchor.commit()
+
+    def close(self):
+        """
+        Descarta os dados em memória.
+        """
+
+        # Ao fechar a última conexão o SQLite libera o banco
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+
+# Armazenamento ativo do processo
+FILE_BACKEND = FileBackend()
+_active = FILE_BACKEND
+_active_lock = threading.Lock()
+
+def get_backend():
+    """
+    Retorna o armazenamento ativo.
+    """
+
+    # Leitura simples: a troca é atômica
+    return _active
+
+def set_backend(backend):
+    """
+    Troca o armazenamento ativo em tempo de execução e retorna o anterior.
+    O novo armazenamento recebe o esquema, o cache do catálogo é descartado e os inscritos em
+    BACKEND_CHANGED (contadores, cestas, relatório) recarregam seus dados.
+    """
+
+    # Importação tardia: sales_logic importa este módulo
+    from . import sales_logic
+    global _active
+
+    with _active_lock:
+        previous = _active
+        _active = backend
+
+    sales_logic.initialize_database()
+    sales_logic.invalidate_catalog_cache()
+    events.publish(events.BACKEND_CHANGED)
+    return previous
+
+@contextlib.contextmanager
+def use_backend(backend):
+    """
+    Usa 'backend' dentro do bloco 'with' e volta ao anterior na saída (ex: medições em memória).
+    """
+
+    # O armazenamento anterior é restaurado mesmo se o bloco falhar
+    previous = set_backend(backend)
+
+    try:
+        yield backend
+
+    finally:
+        set_backend(previous)
+
+def is_training_mode():
+    """
+    Indica se o armazenamento ativo é descartável (modo de treinamento).
+    """
+
+    # Somente o arquivo é persistente
+    return not _active.persistent
+
+def start_training_mode():
+    """
+    Passa a usar uma cópia em memória do catálogo de produção, sem histórico de vendas.
+    Nada do que for feito no treinamento chega ao arquivo.
+    """
+
+    # Importação tardia: sales_logic importa este módulo
+    from . import sales_logic
+
+    backend = MemoryBackend("treinamento")
+
+    if sales_logic.DB_PATH.exists():
+        backend.load_from(sales_logic.DB_PATH, catalog_only=True)
+
+    set_backend(backend)
+    return backend
+
+def stop_training_mode():
+    """
+    Volta ao arquivo de produção e descarta os dados do treinamento.
+    """
+
+    # Só fecha o armazenamento se ele for descartável
+    previous = set_backend(FILE_BACKEND)
+
+    if not previous.persistent:
+        previous.close()
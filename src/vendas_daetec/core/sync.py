@@ -0,0 +1,349 @@
+import sqlite3
+import datetime
+import gzip
+import json
+import logging
+import uuid
+import argparse
+from pathlib import Path
+
+from . import sales_logic, log_setup
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Versão do formato do arquivo de sincronização (a 2 acrescenta o atendimento de cada venda; a 1 ainda é importada)
+CHANGESET_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+
+# Chaves usadas na tabela 'configuracoes'
+TERMINAL_ID_KEY = "sync_terminal_id"
+EXPORT_WATERMARK_KEY = "sync_export_watermark"
+IMPORT_WATERMARK_PREFIX = "sync_import_watermark:"
+
+def get_terminal_id(db_path=None):
+    """
+    Retorna o identificador deste terminal, criando um novo na primeira chamada.
+    """
+
+    # Garante que o banco e as tabelas existam
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    sales_logic.initialize_database(db_path)
+    conn = None
+
+    try:
+        conn = sales_logic._connect(db_path)
+        cursor = conn.cursor()
+        terminal_id = sales_logic.read_config(cursor, TERMINAL_ID_KEY)
+
+        # Gera o identificador apenas uma vez por banco de dados
+        if terminal_id is None:
+            terminal_id = uuid.uuid4().hex
+            sales_logic.write_config(cursor, TERMINAL_ID_KEY, terminal_id)
+            conn.commit()
+
+        return terminal_id
+
+    finally:
+        if conn:
+            conn.close()
+
+def export_changeset(output_path, db_path=None, since=None, advance_watermark=True):
+    """
+    Exporta as vendas registradas após a última sincronização para um arquivo compacto (JSON + gzip).
+
+    :param output_path: Caminho do arquivo de changeset a ser criado.
+    :param db_path: Banco do terminal (padrão: DB_PATH).
+    :param since: ID local a partir do qual exportar. Se omitido, usa a marca d'água salva.
+    :param advance_watermark: Se True, avança a marca d'água após a exportação.
+    Retorna a quantidade de vendas exportadas.
+    """
+
+    # Garante que o banco esteja inicializado e que o terminal tenha identificador
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    terminal_id = get_terminal_id(db_path)
+    conn = None
+
+    try:
+        conn = sales_logic._connect(db_path)
+        cursor = conn.cursor()
+
+        # Determina o intervalo de vendas a exportar
+        if since is None:
+            since = int(sales_logic.read_config(cursor, EXPORT_WATERMARK_KEY, 0))
+        cursor.execute("SELECT COALESCE(MAX(id), ?) FROM vendas", (since,))
+        until = max(cursor.fetchone()[0], since)
+
+        # Vendas do intervalo, com o nome do vendedor como chave natural
+        cursor.execute("""
+            SELECT v.id, v.uuid, ve.nome, v.valor_total, v.data_venda, v.atendimento
+            FROM vendas v
+            JOIN vendedores ve ON ve.id = v.vendedor_id
+            WHERE v.id > ? AND v.id <= ?
+            ORDER BY v.id
+        """, (since, until))
+        vendas = cursor.fetchall()
+
+        # Itens do intervalo, com o produto identificado por (vendedor, nome) gravados na venda
+        cursor.execute("""
+            SELECT vi.venda_id, vi.produto_id, vi.produto_nome, vi.vendedor_nome,
+                   COALESCE(p.preco, vi.preco_unitario_na_venda),
+                   vi.quantidade, vi.preco_unitario_na_venda
+            FROM venda_itens vi
+            LEFT JOIN produtos p ON p.id = vi.produto_id
+            WHERE vi.venda_id > ? AND vi.venda_id <= ?
+            ORDER BY vi.id
+        """, (since, until))
+        itens = cursor.fetchall()
+
+        # Pagamentos do intervalo
+        cursor.execute("""
+            SELECT venda_id, metodo, valor
+            FROM venda_pagamentos
+            WHERE venda_id > ? AND venda_id <= ?
+            ORDER BY id
+        """, (since, until))
+        pagamentos = cursor.fetchall()
+
+        # Tabelas de referência: cada vendedor e produto aparece uma única vez no arquivo
+        vendedores = []
+        vendedor_idx = {}
+        produtos = []
+        produto_idx = {}
+
+        def seller_ref(nome):
+            if nome not in vendedor_idx:
+                vendedor_idx[nome] = len(vendedores)
+                vendedores.append(nome)
+            return vendedor_idx[nome]
+
+        # Monta as vendas no formato compacto
+        vendas_por_id = {}
+        vendas_out = []
+
+        for venda_id, venda_uuid, vendedor_nome, valor_total, data_venda, atendimento in vendas:
+            venda_out = [venda_uuid, seller_ref(vendedor_nome), valor_total, data_venda, [], [], atendimento]
+            vendas_por_id[venda_id] = venda_out
+            vendas_out.append(venda_out)
+
+        # Associa os itens às vendas
+        for venda_id, produto_id, produto_nome, produto_vendedor, produto_preco, quantidade, preco_unitario in itens:
+            if produto_id not in produto_idx:
+                produto_idx[produto_id] = len(produtos)
+                produtos.append([produto_nome, seller_ref(produto_vendedor), produto_preco])
+            vendas_por_id[venda_id][4].append([produto_idx[produto_id], quantidade, preco_unitario])
+
+        # Associa os pagamentos às vendas
+        for venda_id, metodo, valor in pagamentos:
+            vendas_por_id[venda_id][5].append([metodo, valor])
+
+        changeset = {
+            "versao": CHANGESET_VERSION,
+            "terminal": terminal_id,
+            "gerado_em": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "desde": since,
+            "ate": until,
+            "vendedores": vendedores,
+            "produtos": produtos,
+            "vendas": vendas_out
+        }
+
+        # Grava o arquivo compactado
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(output_path, "wt", encoding="utf-8") as file:
+            json.dump(changeset, file, ensure_ascii=False, separators=(",", ":"))
+
+        # Avança a marca d'água somente depois que o arquivo foi gravado
+        if advance_watermark:
+            sales_logic.write_config(cursor, EXPORT_WATERMARK_KEY, until)
+            conn.commit()
+
+        logger.info("Changeset com %s venda(s) exportado para: %s", len(vendas_out), output_path,
+                    extra={"vendas": len(vendas_out), "arquivo": str(output_path)})
+        return len(vendas_out)
+
+    finally:
+        if conn:
+            conn.close()
+
+def _resolve_seller(cursor, nome, stats):
+    """
+    Encontra (ou cria) um vendedor no banco central pelo nome.
+    """
+
+    # O nome do vendedor é único, então serve como chave natural
+    cursor.execute("SELECT id FROM vendedores WHERE nome = ?", (nome,))
+    row = cursor.fetchone()
+
+    if row:
+        return row[0]
+
+    cursor.execute("INSERT INTO vendedores (nome) VALUES (?)", (nome,))
+    stats["vendedores_criados"] += 1
+    return cursor.lastrowid
+
+def _resolve_product(cursor, nome, vendedor_id, preco, stats):
+    """
+    Encontra (ou cria) um produto no banco central pela chave natural (vendedor, nome).
+    """
+
+    # Os IDs PROD-xxxx são locais de cada terminal, por isso a busca é feita pelo nome
+    cursor.execute(
+        "SELECT id FROM produtos WHERE vendedor_id = ? AND nome = ? ORDER BY id LIMIT 1",
+        (vendedor_id, nome)
+    )
+    row = cursor.fetchone()
+
+    if row:
+        return row[0]
+
+    produto_id = sales_logic._next_product_id(cursor)
+    cursor.execute(
+        "INSERT INTO produtos (id, nome, preco, vendedor_id) VALUES (?, ?, ?, ?)",
+        (produto_id, nome, preco, vendedor_id)
+    )
+    stats["produtos_criados"] += 1
+    return produto_id
+
+def import_changeset(changeset_path, db_path=None):
+    """
+    Importa um changeset no banco central de forma idempotente.
+    Changesets cobertos pela marca d'água do terminal (já importados por inteiro) são ignorados sem ler as vendas;
+    nos demais, vendas já importadas (mesmo uuid) são ignoradas. Vendedores e produtos são reconciliados pela chave natural.
+    Retorna um dicionário com as estatísticas da importação.
+    """
+
+    # Lê o arquivo de changeset
+    with gzip.open(changeset_path, "rt", encoding="utf-8") as file:
+        changeset = json.load(file)
+
+    if changeset.get("versao") not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Versão de changeset não suportada: {changeset.get('versao')}")
+
+    # Garante que o banco central exista
+    db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+    sales_logic.initialize_database(db_path)
+
+    stats = {"importadas": 0, "ignoradas": 0, "vendedores_criados": 0, "produtos_criados": 0}
+    conn = None
+
+    try:
+        conn = sales_logic._connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+
+        # Toda a importação acontece em uma única transação
+        cursor.execute("BEGIN IMMEDIATE")
+
+        # Intervalo do terminal já importado por inteiro (ex: o mesmo arquivo importado de novo): nada a fazer
+        watermark_key = IMPORT_WATERMARK_PREFIX + changeset["terminal"]
+        watermark = int(sales_logic.read_config(cursor, watermark_key, 0))
+
+        if changeset["ate"] <= watermark:
+            conn.rollback()
+            stats["ignoradas"] = len(changeset["vendas"])
+            logger.info("Changeset do terminal %s já importado (marca d'água %s): %s", changeset["terminal"], watermark, stats,
+                        extra={"terminal": changeset["terminal"], **stats})
+            return stats
+
+        # Resolve as referências apenas quando forem usadas
+        vendedores = changeset["vendedores"]
+        produtos = changeset["produtos"]
+        seller_ids = {}
+        product_ids = {}
+
+        for venda in changeset["vendas"]:
+            venda_uuid, seller_ref, valor_total, data_venda, itens, pagamentos = venda[:6]
+            atendimento = venda[6] if len(venda) > 6 else None
+
+            # Idempotência: uma venda já importada nunca é duplicada
+            cursor.execute("SELECT 1 FROM vendas WHERE uuid = ?", (venda_uuid,))
+            if cursor.fetchone():
+                stats["ignoradas"] += 1
+                continue
+
+            if seller_ref not in seller_ids:
+                seller_ids[seller_ref] = _resolve_seller(cursor, vendedores[seller_ref], stats)
+
+            # Converte os itens para os IDs de produto do banco central
+            cart_items = []
+
+            for product_ref, quantidade, preco_unitario in itens:
+                if product_ref not in product_ids:
+                    produto_nome, produto_vendedor_ref, produto_preco = produtos[product_ref]
+
+                    if produto_vendedor_ref not in seller_ids:
+                        seller_ids[produto_vendedor_ref] = _resolve_seller(cursor, vendedores[produto_vendedor_ref], stats)
+                    product_ids[product_ref] = _resolve_product(cursor, produto_nome, seller_ids[produto_vendedor_ref], produto_preco, stats)
+
+                cart_items.append({
+                    "produto_id": product_ids[product_ref],
+                    "nome": produtos[product_ref][0],
+                    "quantidade": quantidade,
+                    "preco_unitario": preco_unitario
+                })
+
+            payments = [{"metodo": metodo, "valor": valor} for metodo, valor in pagamentos]
+
+            sales_logic._insert_sale(
+                cursor, seller_ids[seller_ref], valor_total, cart_items, payments,
+                data_venda=data_venda, venda_uuid=venda_uuid, atendimento=atendimento
+            )
+            stats["importadas"] += 1
+
+        # Registra até onde cada terminal já foi importado sem lacunas: um changeset que começa depois da marca
+        # (um anterior ainda não chegou) não a avança, e um antigo importado depois não a faz recuar
+        if changeset["desde"] <= watermark:
+            sales_logic.write_config(cursor, watermark_key, max(watermark, changeset["ate"]))
+        conn.commit()
+
+        # Vendedores e produtos podem ter sido criados
+        if stats["vendedores_criados"] or stats["produtos_criados"]:
+            sales_logic.invalidate_catalog_cache()
+
+        logger.info("Changeset do terminal %s importado: %s", changeset["terminal"], stats, extra={"terminal": changeset["terminal"], **stats})
+        return stats
+
+    except sqlite3.Error:
+        if conn:
+            conn.rollback()
+        raise
+
+    finally:
+        if conn:
+            conn.close()
+
+def main(argv=None):
+    """
+    Linha de comando da sincronização: exportar no terminal, importar no banco central.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Sincronização de vendas entre terminais DAETEC.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    export_parser = subparsers.add_parser("exportar", help="Exporta as vendas novas deste terminal.")
+    export_parser.add_argument("arquivo", help="Arquivo de changeset a ser criado (.json.gz).")
+    export_parser.add_argument("--db", help="Banco do terminal (padrão: data/planilhas.db).")
+    export_parser.add_argument("--tudo", action="store_true", help="Exporta todo o histórico, ignorando a marca d'água.")
+
+    import_parser = subparsers.add_parser("importar", help="Importa changesets no banco central.")
+    import_parser.add_argument("arquivos", nargs="+", help="Arquivos de changeset.")
+    import_parser.add_argument("--db", help="Banco central (padrão: data/planilhas.db).")
+
+    args = parser.parse_args(argv)
+
+    # Registro em logs/ e no console
+    log_setup.configure_logging()
+
+    # Executa o comando escolhido
+    if args.comando == "exportar":
+        export_changeset(args.arquivo, db_path=args.db, since=0 if args.tudo else None)
+
+    else:
+        for arquivo in args.arquivos:
+            import_changeset(arquivo, db_path=args.db)
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,35 @@
+import time
+import logging
+import threading
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox, filedialog
-from .views import ProductsView, AddProductDialog, SaleDialog
-from ..core import sales_logic
+from .views import (ProductsView, DashboardView, SalesHistoryView, AddProductDialog, SaleDialog, SettlementDialog, ReportProgressDialog,
+                    subscribe_widget, TreeSorter, add_filter_entry)
+from ..core import sales_logic, report_cache, events, maintenance, storage, settlement, basket
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
 
 class AppWindow(tk.Tk):
     """
     Janela principal da aplicação de vendas DAETEC.
     """
+
+    # Manutenção em segundo plano: verificação periódica e tempo sem uso exigido antes de cada passo
+    MAINTENANCE_CHECK_MS = 30000
+    MAINTENANCE_IDLE_SECONDS = 60
     
-    def __init__(self):
+    def __init__(self, warmup_thread=None):
         """
         Inicializa a janela principal, configura o layout e os componentes.
+        Se 'warmup_thread' for informado, a tabela de produtos é preenchida quando ele terminar.
         """
         
         # Chama o construtor da classe pai
         super().__init__()
         
-        # Janela principal
-        self.title("Vendas DAETEC")
+        # Janela principal (o título indica o modo de treinamento)
+        self._update_title()
         self.geometry("1024x768")
         self.state("zoomed")
 
@@ -37,10 +49,14 @@ class AppWindow(tk.Tk):
         # Botões do menu
         self._setup_navigation()
 
+        # Telas já construídas; as demais são criadas na primeira vez em que forem mostradas
         self.frames = {}
 
-        # Instancia das telas utilizadas
-        self.products_view_frame = ProductsView(self.main_content_frame)
+        # Janelas secundárias reaproveitadas entre aberturas
+        self.sellers_window = None
+
+        # Instancia a tela inicial (os dados chegam depois do aquecimento, se houver)
+        self.products_view_frame = ProductsView(self.main_content_frame, load=warmup_thread is None)
         self.frames[ProductsView] = self.products_view_frame
 
         # Coloca a tela de produtos no grid
@@ -49,13 +65,45 @@ class AppWindow(tk.Tk):
         # Mostra a tela inicial
         self.show_frame(ProductsView)
 
+        # Preenche a tabela assim que o banco e o catálogo estiverem prontos
+        if warmup_thread is not None:
+            self._wait_for_warmup(warmup_thread)
+
+        # Manutenção do banco quando ninguém estiver usando o caixa
+        self._last_input = time.monotonic()
+        self._maintenance_thread = None
+        self.bind_all("<Any-KeyPress>", self._register_input, add="+")
+        self.bind_all("<Any-ButtonPress>", self._register_input, add="+")
+        maintenance.watch_bulk_changes()
+        self.after(self.MAINTENANCE_CHECK_MS, self._idle_maintenance)
+
+    def _wait_for_warmup(self, warmup_thread):
+        """
+        Aguarda o aquecimento em segundo plano sem bloquear a janela e então carrega os produtos.
+        """
+
+        # Verifica novamente em breve enquanto a thread estiver rodando
+        if warmup_thread.is_alive():
+            self.after(50, self._wait_for_warmup, warmup_thread)
+            return
+
+        self.products_view_frame.load_products()
+
     def show_frame(self, frame_class):
         """
         Mostra uma tela especificada e esconde as outras.
+        A tela é construída na primeira vez em que for solicitada.
         """
         
+        # Constrói a tela sob demanda
+        frame = self.frames.get(frame_class)
+
+        if frame is None:
+            frame = frame_class(self.main_content_frame)
+            frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[frame_class] = frame
+
         # Alterna a visibilidade dos frames para mostrar apenas o frame solicitado
-        frame = self.frames[frame_class]
         frame.tkraise()
 
     def _setup_navigation(self):
@@ -71,6 +119,10 @@ class AppWindow(tk.Tk):
         delete_product_button = tk.Button(self.menu_frame, text="Descadastrar Produto", command=self._delete_product_dialog)
         delete_product_button.pack(side="left", padx=0, pady=5)
 
+        # Botão de reajuste de preços de um vendedor
+        adjust_prices_button = tk.Button(self.menu_frame, text="Reajustar Preços", command=self._adjust_prices_dialog)
+        adjust_prices_button.pack(side="left", padx=0, pady=5)
+
         # Botão de Cadastrar vendedor
         add_seller_button = tk.Button(self.menu_frame, text="Cadastrar Vendedor", command=self._open_add_seller_dialog)
         add_seller_button.pack(side="left", padx=0, pady=5)
@@ -83,10 +135,39 @@ class AppWindow(tk.Tk):
         show_sellers_button = tk.Button(self.menu_frame, text="Mostrar Vendedores", command=self._show_sellers_window)
         show_sellers_button.pack(side="left", padx=0, pady=5)
 
+        # Botão da tela de produtos
+        products_button = tk.Button(self.menu_frame, text="Produtos", command=lambda: self.show_frame(ProductsView))
+        products_button.pack(side="left", padx=0, pady=5)
+
+        # Botão do painel de vendedores
+        dashboard_button = tk.Button(self.menu_frame, text="Painel", command=lambda: self.show_frame(DashboardView))
+        dashboard_button.pack(side="left", padx=0, pady=5)
+
+        # Botão do histórico de vendas
+        history_button = tk.Button(self.menu_frame, text="Histórico", command=lambda: self.show_frame(SalesHistoryView))
+        history_button.pack(side="left", padx=0, pady=5)
+
         # Botão de relatório
         report_button = tk.Button(self.menu_frame, text="Gerar Relatório", command=self._generate_report)
         report_button.pack(side="left", padx=0, pady=5)
 
+        # Botão do acerto com os vendedores
+        settlement_button = tk.Button(self.menu_frame, text="Acerto", command=self._export_settlement)
+        settlement_button.pack(side="left", padx=0, pady=5)
+
+        # Botão da análise de cesta (produtos comprados juntos)
+        basket_button = tk.Button(self.menu_frame, text="Comprados Juntos", command=self._show_bought_with)
+        basket_button.pack(side="left", padx=0, pady=5)
+
+        # Botão de manutenção do banco
+        maintenance_button = tk.Button(self.menu_frame, text="Manutenção", command=self._run_maintenance)
+        maintenance_button.pack(side="left", padx=0, pady=5)
+
+        # Botão do modo de treinamento (vendas em memória, sem tocar o banco de produção)
+        self.training_button = tk.Button(self.menu_frame, command=self._toggle_training_mode,
+                                         text="Sair do Treinamento" if storage.is_training_mode() else "Treinamento")
+        self.training_button.pack(side="left", padx=0, pady=5)
+
         # Botão de limpar histórico
         clear_history_button = tk.Button(self.menu_frame, text="Limpar Histórico", command=self._clear_history)
         clear_history_button.pack(side="left", padx=0, pady=5)
@@ -97,7 +178,20 @@ class AppWindow(tk.Tk):
 
     def _show_sellers_window(self):
         """
-        Abre uma nova janela para mostrar a lista de vendedores.
+        Abre a janela com a lista de vendedores (construída uma única vez e reaproveitada).
+        """
+
+        # Constrói a janela apenas na primeira abertura; depois ela se mantém atualizada pelos eventos
+        if self.sellers_window is None:
+            self._build_sellers_window()
+
+        self.sellers_window.deiconify()
+        self.sellers_window.lift()
+        self.sellers_window.grab_set()
+
+    def _build_sellers_window(self):
+        """
+        Constrói a janela da lista de vendedores.
         """
 
         # Janela para exibir os vendedores
@@ -107,9 +201,10 @@ class AppWindow(tk.Tk):
 
         # Deixa a janela modal
         sellers_win.transient(self)
-        sellers_win.grab_set()
 
-        # Frame para a tabela de vendedores
+        # Frame para o filtro (posicionado depois que o ordenador existir) e a tabela de vendedores
+        filter_holder = tk.Frame(sellers_win)
+        filter_holder.pack(fill="x", padx=10, pady=(10, 0))
         table_frame = tk.Frame(sellers_win)
         table_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
@@ -127,16 +222,60 @@ class AppWindow(tk.Tk):
         scrollbar.pack(side="right", fill="y")
         tree.pack(side="left", fill="both", expand=True)
 
-        # Frame para o botão
+        # Frame para o botão; fechar apenas esconde a janela para reaproveitá-la
         button_frame = tk.Frame(sellers_win)
         button_frame.pack(fill="x", padx=10, pady=(0, 10))
-        back_button = tk.Button(button_frame, text="Voltar", command=sellers_win.destroy)
+        back_button = tk.Button(button_frame, text="Voltar", command=self._hide_sellers_window)
         back_button.pack()
-        sellers_list = sales_logic.get_all_sellers()
-        
-        # Popula a tabela com os vendedores
-        for seller in sellers_list:
-            tree.insert("", tk.END, values=seller)
+        sellers_win.protocol("WM_DELETE_WINDOW", self._hide_sellers_window)
+
+        # Ordenação por cabeçalho e filtro em memória (ID numérico, nome sem diferenciar maiúsculas)
+        self.sellers_sorter = TreeSorter(tree, {
+            "id": lambda seller: seller[0],
+            "nome": lambda seller: seller[1].casefold()
+        }, lambda seller: seller, sort_column="id")
+        add_filter_entry(filter_holder, self.sellers_sorter).pack(fill="x")
+
+        self.sellers_window = sellers_win
+        self.sellers_tree = tree
+
+        # Preenche uma vez (catálogo em memória) e passa a aplicar só as alterações
+        self._fill_sellers_tree()
+        subscribe_widget(tree, self._on_seller_event, events.SELLER_ADDED, events.SELLER_DELETED, events.BACKEND_CHANGED)
+
+    def _fill_sellers_tree(self):
+        """
+        Preenche a lista de vendedores a partir do catálogo.
+        """
+
+        # Substitui o conteúdo anterior (ex: troca de armazenamento), mantendo a ordenação escolhida
+        self.sellers_sorter.load((str(seller[0]), seller) for seller in sales_logic.iter_sellers())
+
+    def _on_seller_event(self, event):
+        """
+        Aplica na lista de vendedores os vendedores cadastrados ou removidos.
+        """
+
+        # Outro armazenamento: a lista inteira muda
+        if event.kind == events.BACKEND_CHANGED:
+            self._fill_sellers_tree()
+            return
+
+        # Cada vendedor entra na posição da ordenação atual, sem refazer a lista
+        if event.kind == events.SELLER_DELETED:
+            self.sellers_sorter.remove([str(seller_id) for seller_id, _ in event.rows])
+
+        else:
+            self.sellers_sorter.add((str(seller[0]), seller) for seller in event.rows)
+
+    def _hide_sellers_window(self):
+        """
+        Esconde a janela de vendedores sem destruí-la.
+        """
+
+        # Libera o foco modal e esconde
+        self.sellers_window.grab_release()
+        self.sellers_window.withdraw()
 
     def _open_add_seller_dialog(self):
         """
@@ -197,38 +336,94 @@ class AppWindow(tk.Tk):
             
             if sales_logic.add_product(name, price, seller_id):
                 messagebox.showinfo("Sucesso", "Produto adicionado com sucesso!")
-
-                # Atualiza a visualização da tabela de produtos
-                self.products_view_frame.load_products()
             
             else:
                 messagebox.showerror("Erro", "Ocorreu um erro ao adicionar o produto.")
         
         else:
-            print("Cadastro de produto cancelado.")
+            logger.info("Cadastro de produto cancelado.")
     
     def _delete_product_dialog(self):
         """
-        Abre um diálogo para deletar um produto existente.
+        Abre um diálogo para deletar um ou mais produtos existentes.
         """
         
-        # Solicita o ID do produto a ser deletado
-        product_id = simpledialog.askstring("Descadastrar Produto", "Digite o ID do produto a ser removido (ex: PROD-0001):", parent=self)
+        # Solicita os IDs dos produtos a serem deletados
+        answer = simpledialog.askstring("Descadastrar Produto", "Digite o ID do produto a ser removido (ex: PROD-0001).\nVários IDs podem ser separados por vírgula:", parent=self)
         
         # Verifica se o usuário inseriu um ID
-        if product_id:
+        if answer:
+
+            # Normaliza os IDs dos produtos
+            product_ids = [product_id.strip().upper() for product_id in answer.replace(";", ",").split(",") if product_id.strip()]
+
+            # Remove todos de uma vez, em uma única transação
+            removed = sales_logic.delete_products(product_ids=product_ids) if product_ids else []
+            missing = sorted(set(product_ids) - {row[1] for row in removed or []})
+
+            if removed is None:
+                messagebox.showerror("Erro", "Ocorreu um erro ao deletar os produtos.")
+
+            elif not removed:
+                messagebox.showerror("Erro", f"Não foi possível deletar o produto com ID {', '.join(product_ids)}.\nVerifique se o ID está correto.")
+
+            elif missing:
+                messagebox.showwarning("Aviso", f"{len(removed)} produto(s) deletado(s).\nIDs não encontrados: {', '.join(missing)}")
+
+            elif len(removed) == 1:
+                messagebox.showinfo("Sucesso", f"Produto com ID {removed[0][1]} deletado com sucesso!")
 
-            # Normaliza o ID do produto
-            product_id = product_id.strip().upper()
-            
-            # Tenta deletar o produto usando a lógica de negócios
-            if sales_logic.delete_product(product_id):
-                messagebox.showinfo("Sucesso", f"Produto com ID {product_id} deletado com sucesso!")
-                
-                self.products_view_frame.load_products()
-            
             else:
-                messagebox.showerror("Erro", f"Não foi possível deletar o produto com ID {product_id}.\nVerifique se o ID está correto.")
+                messagebox.showinfo("Sucesso", f"{len(removed)} produtos deletados com sucesso!")
+
+    def _adjust_prices_dialog(self):
+        """
+        Abre um diálogo para reajustar, em percentual, os preços de todos os produtos de um vendedor.
+        """
+
+        # Solicita o vendedor e o percentual
+        seller_id = simpledialog.askinteger("Reajustar Preços", "Digite o ID do vendedor:", parent=self)
+
+        if not seller_id:
+            return
+
+        percent = simpledialog.askfloat("Reajustar Preços", "Reajuste em % (ex: 10 para aumentar 10%, -15 para reduzir 15%):", parent=self, minvalue=-99.99)
+
+        if not percent:
+            logger.info("Reajuste de preços cancelado.")
+            return
+
+        # Uma única instrução UPDATE; a tabela de produtos se atualiza pelo evento
+        updated = sales_logic.update_products(percent=percent, seller_id=seller_id)
+
+        if updated is None:
+            messagebox.showerror("Erro", "Ocorreu um erro ao reajustar os preços.")
+
+        elif not updated:
+            messagebox.showwarning("Aviso", f"Nenhum produto encontrado para o vendedor com ID {seller_id}.")
+
+        else:
+            messagebox.showinfo("Sucesso", f"{len(updated)} produto(s) do vendedor {updated[0][0]} reajustado(s) em {percent:+g}%.")
+
+    def _show_bought_with(self):
+        """
+        Mostra os produtos mais comprados junto com um produto informado.
+        """
+
+        # O índice é construído na primeira consulta e depois acompanha as vendas pelo barramento
+        product_id = simpledialog.askstring("Comprados Juntos", "Digite o ID do produto (ex: PROD-0001):", parent=self)
+
+        if not product_id:
+            return
+
+        product_id = product_id.strip().upper()
+        index = basket.get_index()
+
+        if not index.frequently_bought_with(product_id):
+            messagebox.showinfo("Comprados Juntos", f"Nenhuma compra conjunta encontrada para {product_id}.", parent=self)
+            return
+
+        messagebox.showinfo("Comprados Juntos", basket.format_bought_with(index, product_id), parent=self)
 
     def _open_sale_dialog(self):
         """
@@ -240,19 +435,99 @@ class AppWindow(tk.Tk):
 
     def _generate_report(self):
         """
-        Gera o relatório de vendas e pede ao usuário para salvar em um arquivo.
+        Gera o relatório de vendas em segundo plano e pede ao usuário para salvar em um arquivo.
         """
         
-        # Gera o conteúdo do relatório usando a lógica de negócios
-        report_content = sales_logic.generate_sales_report()
+        # Estado compartilhado com a thread do relatório (a thread nunca toca nos widgets)
+        cancel_event = threading.Event()
+        state = {"processados": 0, "total": 0, "resultado": None, "concluido": False}
+
+        def progress(processados, total):
+            state["processados"] = processados
+            state["total"] = total
+
+        def worker():
+            state["resultado"] = report_cache.generate_cached_report(progress_callback=progress, cancel_event=cancel_event)
+            state["concluido"] = True
 
-        # Pede ao usuário para escolher onde salvar o arquivo
+        # Inicia a geração antes de abrir o diálogo de salvar
+        threading.Thread(target=worker, name="relatorio", daemon=True).start()
+
+        # Pede ao usuário para escolher onde salvar o arquivo enquanto o relatório é calculado
         file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("All files", "*.*")], title="Salvar Relatório de Vendas")
 
-        # Verifica se o usuário selecionou um caminho para salvar o arquivo
+        # Se o usuário desistiu de salvar, interrompe o cálculo
+        if not file_path:
+            cancel_event.set()
+            return
+
+        # Mostra o progresso e acompanha a thread sem bloquear a janela
+        progress_dialog = ReportProgressDialog(self, cancel_event)
+        self._poll_report(progress_dialog, state, file_path)
+
+    def _export_settlement(self):
+        """
+        Pede o período e as taxas, calcula o acerto com os vendedores e salva em CSV ou texto.
+        """
+
+        # Período e taxas informados no diálogo; taxas alteradas são gravadas antes do cálculo
+        current_fees = settlement.get_fees()
+        dialog = SettlementDialog(self, current_fees)
+
+        if not dialog.result:
+            return
+
+        date_from, date_to, fees = dialog.result
+
+        for method, percent in fees.items():
+            if percent != current_fees.get(method):
+                settlement.set_fee(method, percent)
+
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", title="Salvar Acerto dos Vendedores",
+                                                 filetypes=[("CSV", "*.csv"), ("Text files", "*.txt"), ("All files", "*.*")])
+
         if not file_path:
             return
 
+        # Uma única agregação no banco (ou o acerto guardado, se o período já foi encerrado): rápido o bastante para a thread da interface
+        result = settlement.compute_settlement(date_from, date_to)
+
+        if result is None:
+            messagebox.showerror("Erro", "Ocorreu um erro ao calcular o acerto.", parent=self)
+            return
+
+        try:
+            if file_path.lower().endswith(".csv"):
+                settlement.export_csv(result, file_path)
+            else:
+                with open(file_path, "w", encoding="utf-8") as file:
+                    file.write(settlement.format_table(result))
+
+        except OSError as e:
+            messagebox.showerror("Erro", f"Não foi possível salvar o arquivo:\n{e}", parent=self)
+            return
+
+        messagebox.showinfo("Sucesso", f"Acerto de {len(result['vendedores'])} vendedor(es) salvo em:\n{file_path}", parent=self)
+
+    def _poll_report(self, progress_dialog, state, file_path):
+        """
+        Acompanha a geração do relatório e salva o arquivo quando terminar.
+        """
+
+        # Ainda calculando: atualiza a barra e verifica novamente em breve
+        if not state["concluido"]:
+            progress_dialog.update_progress(state["processados"], state["total"])
+            self.after(100, self._poll_report, progress_dialog, state, file_path)
+            return
+
+        progress_dialog.destroy()
+        report_content = state["resultado"]
+
+        # Cancelado pelo usuário
+        if report_content is None:
+            messagebox.showinfo("Relatório", "A geração do relatório foi cancelada.", parent=self)
+            return
+
         # Tenta salvar o relatório no arquivo escolhido
         try:
             with open(file_path, "w", encoding="utf-8") as file:
@@ -263,6 +538,98 @@ class AppWindow(tk.Tk):
         except Exception as e:
             messagebox.showerror("Erro ao Salvar", f"Não foi possível salvar o arquivo.\nErro: {e}")
     
+    def _register_input(self, event):
+        """
+        Guarda o instante da última tecla ou clique (a manutenção só roda com o caixa parado).
+        """
+
+        # Apenas o horário importa
+        self._last_input = time.monotonic()
+
+    def _idle_maintenance(self):
+        """
+        Executa um passo curto de manutenção em segundo plano se o caixa estiver ocioso.
+        """
+
+        # Um passo por vez, e só depois de um tempo sem teclas nem cliques
+        idle = time.monotonic() - self._last_input >= self.MAINTENANCE_IDLE_SECONDS
+        running = self._maintenance_thread is not None and self._maintenance_thread.is_alive()
+
+        if idle and not running:
+            def step():
+                if maintenance.needs_maintenance():
+                    maintenance.idle_step()
+
+            self._maintenance_thread = threading.Thread(target=step, name="manutencao", daemon=True)
+            self._maintenance_thread.start()
+
+        self.after(self.MAINTENANCE_CHECK_MS, self._idle_maintenance)
+
+    def _run_maintenance(self):
+        """
+        Executa a manutenção completa em segundo plano e mostra as medições antes e depois.
+        """
+
+        # Evita duas manutenções ao mesmo tempo
+        if self._maintenance_thread is not None and self._maintenance_thread.is_alive():
+            messagebox.showinfo("Manutenção", "Já existe uma manutenção em andamento.", parent=self)
+            return
+
+        if not messagebox.askyesno("Manutenção", "Otimizar o banco de dados agora?\nAs vendas ficam bloqueadas por alguns instantes.", parent=self):
+            return
+
+        state = {"resultado": None}
+
+        def worker():
+            state["resultado"] = maintenance.run_maintenance(full=True)
+
+        self._maintenance_thread = threading.Thread(target=worker, name="manutencao", daemon=True)
+        self._maintenance_thread.start()
+        self._poll_maintenance(state)
+
+    def _poll_maintenance(self, state):
+        """
+        Aguarda a manutenção terminar sem bloquear a janela.
+        """
+
+        # Verifica novamente em breve enquanto a thread estiver rodando
+        if self._maintenance_thread.is_alive():
+            self.after(200, self._poll_maintenance, state)
+            return
+
+        if state["resultado"] is None:
+            messagebox.showerror("Manutenção", "Ocorreu um erro durante a manutenção do banco de dados.", parent=self)
+
+        else:
+            messagebox.showinfo("Manutenção", maintenance.format_report(state["resultado"]), parent=self)
+
+    def _update_title(self):
+        """
+        Atualiza o título da janela conforme o armazenamento ativo.
+        """
+
+        # Destaque para não confundir treinamento com vendas reais
+        self.title("Vendas DAETEC — TREINAMENTO (nada será salvo)" if storage.is_training_mode() else "Vendas DAETEC")
+
+    def _toggle_training_mode(self):
+        """
+        Entra ou sai do modo de treinamento após confirmação.
+        """
+
+        # Sair descarta tudo o que foi feito no treinamento
+        if storage.is_training_mode():
+            if not messagebox.askyesno("Treinamento", "Sair do modo de treinamento?\nAs vendas de treinamento serão descartadas.", parent=self):
+                return
+            storage.stop_training_mode()
+
+        else:
+            if not messagebox.askyesno("Treinamento", "Entrar no modo de treinamento?\nAs vendas feitas nele não serão salvas.", parent=self):
+                return
+            storage.start_training_mode()
+
+        self.training_button["text"] = "Sair do Treinamento" if storage.is_training_mode() else "Treinamento"
+        self._update_title()
+
     def _clear_history(self):
         """
         Limpa o histórico de vendas após o usuário digitar a confirmação.
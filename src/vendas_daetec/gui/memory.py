@@ -0,0 +1,238 @@
+import gc
+import os
+import sys
+import time
+import logging
+import tracemalloc
+import tkinter as tk
+
+from ..core import events
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Intervalo padrão entre amostras do monitor dentro da aplicação (segundos)
+MONITOR_INTERVAL_S = 300
+
+# Quadros de pilha guardados por alocação quando o tracemalloc é ligado
+TRACE_FRAMES = 10
+
+# Arquivos ignorados no relatório de crescimento (o próprio rastreamento, as amostras e o carregamento de módulos)
+_IGNORED_FILES = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+def process_memory_bytes():
+    """
+    Memória residente do processo em bytes (inclui o Tcl/Tk e o SQLite, que o tracemalloc não enxerga).
+    Retorna None se não for possível medir neste sistema.
+    """
+
+    # Windows (executável do evento): GetProcessMemoryInfo via ctypes
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                                                     "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                                                     "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+
+        return None
+
+    # Linux: páginas residentes em /proc/self/statm
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    except (OSError, ValueError, IndexError):
+        return None
+
+def count_widgets(widget):
+    """
+    Número de widgets vivos abaixo de 'widget' (inclusive), contando Toplevels filhos.
+    """
+
+    # Percorre a árvore do Tk sem recursão
+    pending = [widget]
+    total = 0
+
+    while pending:
+        current = pending.pop()
+        total += 1
+        pending.extend(current.winfo_children())
+
+    return total
+
+def sample(root, traced=None):
+    """
+    Amostra dos indicadores de vazamento: memória do processo, widgets, comandos Tcl, objetos Python,
+    inscrições no barramento e, se o tracemalloc estiver ligado, a memória rastreada.
+    """
+
+    # 'traced' permite reaproveitar um get_traced_memory já feito por quem chama
+    rss = process_memory_bytes()
+
+    if traced is None and tracemalloc.is_tracing():
+        traced = tracemalloc.get_traced_memory()[0]
+
+    return {
+        "memoria_mb": round(rss / 1024 / 1024, 1) if rss is not None else None,
+        "rastreada_mb": round(traced / 1024 / 1024, 2) if traced is not None else None,
+        "widgets": count_widgets(root),
+        "comandos_tcl": len(root.tk.splitlist(root.tk.call("info", "commands"))),
+        "objetos": len(gc.get_objects()),
+        "inscricoes": events.subscriber_count()
+    }
+
+def take_snapshot():
+    """
+    Snapshot do tracemalloc sem as alocações do próprio rastreamento e da importação de módulos.
+    """
+
+    # Coleta antes: só sobra o que ainda é alcançável
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, name) for name in _IGNORED_FILES])
+
+def top_growth(snapshot, baseline, limit=10, key_type="traceback"):
+    """
+    Locais de alocação que mais cresceram desde 'baseline'.
+    Retorna [(local, bytes_a_mais, blocos_a_mais, pilha)], 'local' sendo o quadro mais interno dentro de vendas_daetec
+    (ou o mais interno de todos, se nenhum for da aplicação).
+    """
+
+    # Agrupado pela pilha completa (do quadro mais antigo ao mais recente); o quadro da aplicação mostra quem pediu a memória
+    growth = []
+
+    for stat in snapshot.compare_to(baseline, key_type):
+        if stat.size_diff <= 0:
+            continue
+
+        frames = list(stat.traceback)
+        own = [frame for frame in frames if "vendas_daetec" in frame.filename]
+        where = (own or frames)[-1]
+        stack = [f"{frame.filename}:{frame.lineno}" for frame in frames]
+        growth.append((f"{where.filename}:{where.lineno}", stat.size_diff, stat.count_diff, stack))
+
+        if len(growth) >= limit:
+            break
+
+    return growth
+
+def format_growth(growth):
+    """
+    Tabela de texto com o resultado de top_growth.
+    """
+
+    # Caminhos encurtados a partir do pacote
+    lines = [f"{'KiB':>10} {'Blocos':>8}  Local"]
+
+    for where, size_diff, count_diff, stack in growth:
+        short = where.split("vendas_daetec", 1)[-1].lstrip("\\/") if "vendas_daetec" in where else where
+        lines.append(f"{size_diff / 1024:>10.1f} {count_diff:>8}  {short}")
+
+    return "\n".join(lines)
+
+class MemoryMonitor:
+    """
+    Monitor opcional de memória para sessões longas: a cada intervalo registra no log estruturado
+    a memória do processo, widgets, comandos Tcl, objetos e inscrições do barramento.
+    Com 'trace' liga o tracemalloc e registra também os locais de alocação que mais cresceram desde o início.
+    """
+
+    def __init__(self, root, interval_s=MONITOR_INTERVAL_S, trace=False, top=10):
+        """
+        Configura o monitor (nada é medido até start()).
+        """
+
+        # Parâmetros
+        self.root = root
+        self.interval_ms = int(interval_s * 1000)
+        self.trace = trace
+        self.top = top
+
+        # Primeira amostra e snapshot da sessão, para calcular o crescimento
+        self.first = None
+        self.baseline = None
+        self.started = None
+        self._job = None
+        self._started_tracing = False
+
+    def start(self):
+        """
+        Registra a amostra inicial e agenda as próximas no loop do Tk.
+        """
+
+        # tracemalloc só se pedido: custa memória e tempo em cada alocação
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._started_tracing = True
+
+        if self.trace:
+            self.baseline = take_snapshot()
+
+        self.started = time.monotonic()
+        self.first = sample(self.root)
+        logger.info("Monitor de memória iniciado.", extra=dict(self.first, intervalo_s=self.interval_ms / 1000))
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        """
+        Registra uma amostra e agenda a próxima.
+        """
+
+        # O monitor não pode derrubar a interface
+        try:
+            self.log_sample()
+
+        except Exception as e:
+            logger.exception("Erro no monitor de memória: %s", e)
+
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def log_sample(self, message="Amostra de memória."):
+        """
+        Registra a amostra atual, a variação desde o início e (com 'trace') os maiores crescimentos.
+        """
+
+        # Variação de cada indicador desde start()
+        current = sample(self.root)
+        fields = dict(current, minutos=round((time.monotonic() - self.started) / 60, 1))
+
+        for key, value in current.items():
+            if value is not None and self.first.get(key) is not None:
+                fields[f"{key}_delta"] = round(value - self.first[key], 2)
+
+        if self.baseline is not None:
+            growth = top_growth(take_snapshot(), self.baseline, self.top)
+            fields["crescimento"] = [{"local": where, "kib": round(size / 1024, 1), "blocos": count} for where, size, count, _ in growth]
+
+        logger.info(message, extra=fields)
+        return fields
+
+    def stop(self):
+        """
+        Cancela as amostras, registra a última e desliga o tracemalloc se foi o monitor que o ligou.
+        """
+
+        # Chamado no fim da sessão (a janela pode já ter sido destruída)
+        if self._job is not None:
+            try:
+                self.root.after_cancel(self._job)
+                self.log_sample("Monitor de memória encerrado.")
+
+            except tk.TclError:
+                pass
+
+            self._job = None
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
@@ -0,0 +1,281 @@
+import sys
+import time
+import threading
+import traceback
+import collections
+import logging
+import logging.handlers
+import tkinter as tk
+from pathlib import Path
+
+# Handlers acima deste tempo são gravados no arquivo com a pilha de chamadas
+SLOW_MS = 50
+
+# Intervalo da sonda que mede o atraso do loop de eventos do Tk
+PROBE_MS = 100
+
+# Arquivo rotativo: tamanho máximo de cada arquivo e quantos antigos manter
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+# Somente callbacks definidos nestes módulos são medidos
+WATCHED_PREFIX = "vendas_daetec.gui."
+OWN_MODULE = __name__
+
+class UiProfiler:
+    """
+    Perfilador opcional da interface: mede o tempo de cada callback do Tk (command, bind e after)
+    definido em gui/ e o atraso do loop de eventos. Handlers lentos vão para um arquivo rotativo
+    com a pilha amostrada enquanto ainda estavam rodando.
+    """
+
+    def __init__(self, log_path, slow_ms=SLOW_MS, probe_ms=PROBE_MS):
+        """
+        Configura o perfilador (nada é alterado no Tk até install()).
+        """
+
+        # Parâmetros
+        self.log_path = Path(log_path)
+        self.slow_ms = slow_ms
+        self.probe_ms = probe_ms
+
+        # Estatísticas por handler: {nome: [chamadas, soma_s, maior_s, lentas]}
+        self.stats = {}
+
+        # Atrasos recentes do loop de eventos, em segundos
+        self.loop_delays = collections.deque(maxlen=10000)
+
+        # Handler em execução na thread da interface: (token, nome, início); amostras de pilha por token
+        self._current = None
+        self._next_token = 0
+        self._stacks = {}
+        self._main_ident = threading.main_thread().ident
+
+        self._originals = None
+        self._watchdog = None
+        self._stop = threading.Event()
+        self._logger = None
+
+    # ---------- Instalação ----------
+
+    def install(self):
+        """
+        Passa a envolver os callbacks registrados no Tk e inicia a amostragem de pilhas.
+        Deve ser chamado antes de construir a janela.
+        """
+
+        # Arquivo rotativo exclusivo do perfilador
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._logger = logging.getLogger(f"{OWN_MODULE}.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        handler = logging.handlers.RotatingFileHandler(self.log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self._logger.addHandler(handler)
+
+        # command= e bind passam por Misc._register; after usa um wrapper interno do tkinter
+        profiler = self
+        original_register = tk.Misc._register
+        original_after = tk.Misc.after
+        self._originals = (original_register, original_after)
+
+        def _register(widget, func, subst=None, needcleanup=1):
+            name = profiler._name_of(func)
+            if name is not None:
+                func = profiler.wrap(func, name)
+            return original_register(widget, func, subst, needcleanup)
+
+        def after(widget, ms, func=None, *args):
+            name = profiler._name_of(func) if func is not None else None
+            if name is not None:
+                func = profiler.wrap(func, name)
+            return original_after(widget, ms, func, *args)
+
+        tk.Misc._register = _register
+        tk.Misc.after = after
+
+        # Thread que amostra a pilha da interface quando um handler passa do limite
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="perfilador-ui", daemon=True)
+        self._watchdog.start()
+        self._logger.info("Sessão de perfilamento iniciada (limite: %d ms).", self.slow_ms)
+
+    def uninstall(self):
+        """
+        Restaura o Tk original e encerra a amostragem.
+        """
+
+        # Nada a fazer se não foi instalado
+        if self._originals is None:
+            return
+
+        tk.Misc._register, tk.Misc.after = self._originals
+        self._originals = None
+        self._stop.set()
+
+        for handler in list(self._logger.handlers):
+            handler.close()
+            self._logger.removeHandler(handler)
+
+    def start_probe(self, widget):
+        """
+        Inicia a sonda que mede o atraso do loop de eventos (tempo entre o agendado e o executado).
+        """
+
+        # Usa o after original para a sonda não aparecer entre os handlers
+        self._schedule_probe(widget)
+
+    def _schedule_probe(self, widget):
+        """
+        Agenda a próxima medição do loop de eventos.
+        """
+
+        # Horário em que a sonda deveria rodar
+        expected = time.perf_counter() + self.probe_ms / 1000
+        after = self._originals[1] if self._originals else tk.Misc.after
+        after(widget, self.probe_ms, self._probe, widget, expected)
+
+    def _probe(self, widget, expected):
+        """
+        Registra o atraso do loop e agenda a próxima medição.
+        """
+
+        # Atraso = quanto a sonda rodou depois do previsto
+        self.loop_delays.append(max(0.0, time.perf_counter() - expected))
+
+        try:
+            self._schedule_probe(widget)
+        except tk.TclError:
+            pass
+
+    # ---------- Medição ----------
+
+    def _name_of(self, func):
+        """
+        Nome legível do callback, ou None se ele não for da interface da aplicação.
+        """
+
+        # Métodos ligados e funções guardam o módulo e o nome qualificado
+        module = getattr(func, "__module__", None) or ""
+
+        if not module.startswith(WATCHED_PREFIX) or module == OWN_MODULE:
+            return None
+
+        return f"{module[len(WATCHED_PREFIX):]}.{getattr(func, '__qualname__', repr(func))}"
+
+    def wrap(self, func, name):
+        """
+        Envolve um callback medindo seu tempo de execução.
+        """
+
+        # O wrapper preserva os argumentos que o Tk repassa
+        profiler = self
+
+        def timed(*args):
+            token = profiler._next_token
+            profiler._next_token += 1
+            previous = profiler._current
+            start = time.perf_counter()
+            profiler._current = (token, name, start)
+
+            try:
+                return func(*args)
+
+            finally:
+                elapsed = time.perf_counter() - start
+                profiler._current = previous
+                profiler._record(token, name, elapsed)
+
+        timed.__name__ = getattr(func, "__name__", "callback")
+        return timed
+
+    def _record(self, token, name, elapsed):
+        """
+        Acumula o tempo do handler e grava no arquivo se ele foi lento.
+        """
+
+        # Estatística da sessão
+        entry = self.stats.setdefault(name, [0, 0.0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+        stack = self._stacks.pop(token, None)
+
+        if elapsed * 1000 < self.slow_ms:
+            return
+
+        entry[3] += 1
+
+        if self._logger is not None:
+            self._logger.warning("LENTO %s: %.1f ms\n%s", name, elapsed * 1000, stack or "  (pilha não amostrada)\n")
+
+    def _watch(self):
+        """
+        Thread de amostragem: guarda a pilha da interface quando o handler atual passa do limite.
+        """
+
+        # Verifica duas vezes por período do limite
+        interval = self.slow_ms / 2000
+
+        while not self._stop.wait(interval):
+            current = self._current
+
+            if current is None:
+                continue
+
+            token, name, start = current
+
+            if token in self._stacks or (time.perf_counter() - start) * 1000 < self.slow_ms:
+                continue
+
+            frame = sys._current_frames().get(self._main_ident)
+
+            if frame is not None:
+                self._stacks[token] = "".join(traceback.format_stack(frame))
+
+    # ---------- Resumo ----------
+
+    def summary(self, n=10):
+        """
+        Os 'n' piores handlers da sessão (pelo maior tempo) e as estatísticas do loop de eventos.
+        """
+
+        # Handlers ordenados pelo pior caso
+        handlers = [
+            {"handler": name, "chamadas": count, "total_ms": total * 1000, "media_ms": total / count * 1000,
+             "maior_ms": worst * 1000, "lentas": slow}
+            for name, (count, total, worst, slow) in self.stats.items()
+        ]
+        handlers.sort(key=lambda row: row["maior_ms"], reverse=True)
+
+        delays = sorted(self.loop_delays)
+        loop = {
+            "amostras": len(delays),
+            "media_ms": sum(delays) / len(delays) * 1000 if delays else 0.0,
+            "p95_ms": delays[int(len(delays) * 0.95)] * 1000 if delays else 0.0,
+            "maior_ms": delays[-1] * 1000 if delays else 0.0
+        }
+
+        return {"handlers": handlers[:n], "loop": loop}
+
+    def format_summary(self, n=10):
+        """
+        Texto do resumo da sessão, também gravado no arquivo de perfilamento.
+        """
+
+        # Tabela dos piores handlers seguida do atraso do loop
+        data = self.summary(n)
+        lines = [f"{'Handler':<60} {'Chamadas':>8} {'Média ms':>9} {'Maior ms':>9} {'Lentas':>6}"]
+
+        for row in data["handlers"]:
+            lines.append(f"{row['handler'][:60]:<60} {row['chamadas']:>8} {row['media_ms']:>9.1f} {row['maior_ms']:>9.1f} {row['lentas']:>6}")
+
+        loop = data["loop"]
+        lines.append(f"Atraso do loop de eventos: média {loop['media_ms']:.1f} ms, p95 {loop['p95_ms']:.1f} ms, "
+                     f"maior {loop['maior_ms']:.1f} ms ({loop['amostras']} amostras)")
+        text = "\n".join(lines)
+
+        if self._logger is not None and self._logger.handlers:
+            self._logger.info("Resumo da sessão:\n%s", text)
+
+        return text
@@ -0,0 +1,275 @@
+import sys
+import time
+import types
+import logging
+import argparse
+import tracemalloc
+import contextlib
+import tkinter as tk
+
+from . import views, memory
+from .views import ProductsView, DashboardView, AddProductDialog, SaleDialog
+from ..core import sales_logic, storage
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Prefixo dos produtos criados pelo diálogo de cadastro durante o teste (removidos no mesmo ciclo)
+SOAK_PRODUCT_PREFIX = "Produto de resistência"
+
+@contextlib.contextmanager
+def _silent_messageboxes(counts):
+    """
+    Troca as caixas de mensagem dos diálogos por funções que só contam as chamadas (elas bloqueariam o teste).
+    """
+
+    # As telas importam 'messagebox' do tkinter; o módulo original é restaurado na saída
+    def record(kind, answer=None):
+        def show(*args, **kwargs):
+            counts[kind] = counts.get(kind, 0) + 1
+            return answer
+        return show
+
+    original = views.messagebox
+    views.messagebox = types.SimpleNamespace(showinfo=record("info"), showwarning=record("aviso"),
+                                             showerror=record("erro"), askyesno=record("pergunta", True))
+
+    try:
+        yield counts
+
+    finally:
+        views.messagebox = original
+
+def _seed_catalog(sellers, products_per_seller):
+    """
+    Cadastra o catálogo de teste no armazenamento ativo (em memória).
+    """
+
+    # Pelos caminhos normais da aplicação
+    for seller_number in range(1, sellers + 1):
+        sales_logic.add_seller(f"Vendedor {seller_number:02d}")
+
+    for seller_id, _ in sales_logic.get_all_sellers():
+        for product_number in range(1, products_per_seller + 1):
+            sales_logic.add_product(f"Produto {seller_id}-{product_number}", 1.0 + product_number, seller_id)
+
+def _run_add_product_dialog(root, cycle):
+    """
+    Abre o diálogo de cadastro, preenche e confirma pelo próprio loop do Tk, cadastra o produto e o remove em seguida.
+    """
+
+    # O diálogo é modal (wait_window no construtor): o preenchimento precisa estar agendado antes
+    def fill_and_confirm():
+        dialog = next(widget for widget in root.winfo_children() if isinstance(widget, AddProductDialog))
+        dialog.seller_combo.current(cycle % len(dialog.vendedores))
+        dialog.name_entry.insert(0, f"{SOAK_PRODUCT_PREFIX} {cycle}")
+        dialog.price_entry.insert(0, "9,90")
+        dialog._on_ok()
+
+    root.after(0, fill_and_confirm)
+    dialog = AddProductDialog(root)
+
+    if dialog.result:
+        name, price, seller_id = dialog.result
+        sales_logic.add_product(name, price, seller_id)
+        sales_logic.delete_products(name_contains=name)
+
+def _run_sale_dialog(root, cycle, register_sales):
+    """
+    Abre o diálogo de venda, monta um carrinho com um item e finaliza (ou fecha, sem registrar a venda).
+    """
+
+    # Mesmos passos de quem usa o caixa
+    dialog = SaleDialog(root)
+    dialog.seller_combo.current(cycle % len(dialog.vendedores))
+    dialog._on_seller_selected(None)
+
+    if not register_sales or not dialog.products_cache:
+        dialog.destroy()
+        return
+
+    dialog.product_combo.current(cycle % len(dialog.products_cache))
+    dialog._add_item_to_cart()
+    dialog._show_payment_screen()
+    dialog._finish_sale()
+
+    # _finish_sale só fecha a janela se a venda foi gravada
+    if dialog.winfo_exists():
+        dialog.destroy()
+
+def _measure(root, cycles, sample_every, warmup, top, register_sales, frames, progress):
+    """
+    Monta as telas fixas, executa os ciclos e coleta as amostras e o crescimento desde a referência.
+    Retorna (série, crescimento, segundos).
+    """
+
+    # Telas que ficam abertas o evento inteiro e reagem às vendas e ao catálogo
+    products_view = ProductsView(root)
+    products_view.grid(row=0, column=0, sticky="nsew")
+    DashboardView(root).grid(row=0, column=1, sticky="nsew")
+    root.grid_rowconfigure(0, weight=1)
+    root.grid_columnconfigure(0, weight=1)
+    root.update()
+
+    def run_cycle(cycle):
+        _run_add_product_dialog(root, cycle)
+        _run_sale_dialog(root, cycle, register_sales)
+        products_view.load_products()
+        root.update()
+
+    tracemalloc.start(frames)
+
+    try:
+        for cycle in range(warmup):
+            run_cycle(cycle)
+
+        # Referência depois do aquecimento
+        baseline = memory.take_snapshot()
+        start = time.perf_counter()
+        series = [dict(memory.sample(root), ciclo=0)]
+
+        if progress:
+            progress(series[-1])
+
+        for cycle in range(1, cycles + 1):
+            run_cycle(warmup + cycle)
+
+            if cycle % sample_every == 0 or cycle == cycles:
+                series.append(dict(memory.sample(root), ciclo=cycle))
+
+                if progress:
+                    progress(series[-1])
+
+        elapsed = time.perf_counter() - start
+        return series, memory.top_growth(memory.take_snapshot(), baseline, top), elapsed
+
+    finally:
+        tracemalloc.stop()
+
+def run_soak(cycles=500, sample_every=50, warmup=20, top=15, register_sales=True, sellers=10, products_per_seller=30,
+             frames=memory.TRACE_FRAMES, progress=None):
+    """
+    Teste de resistência da interface: repete, em um banco em memória, o ciclo de uma sessão longa
+    (cadastro de produto, venda e recarga da tabela de produtos) e mede o crescimento de memória.
+    Precisa de um display (no Linux sem monitor: xvfb-run).
+
+    :param cycles: Ciclos medidos (depois do aquecimento).
+    :param sample_every: Ciclos entre amostras da série.
+    :param warmup: Ciclos executados antes da referência (caches e importações tardias se estabilizam).
+    :param register_sales: Finaliza as vendas (False apenas abre e fecha o diálogo de venda).
+    :param progress: Função chamada com cada amostra da série.
+    Retorna um dicionário com a série de amostras, o crescimento por ciclo e os locais de alocação que mais cresceram.
+    """
+
+    # Nada chega ao disco: catálogo e vendas de teste ficam em um banco em memória
+    backend = storage.MemoryBackend("resistencia")
+    counts = {}
+
+    try:
+        with storage.use_backend(backend), _silent_messageboxes(counts):
+            _seed_catalog(sellers, products_per_seller)
+            root = tk.Tk()
+            root.title("Teste de resistência")
+
+            # A janela é destruída antes de voltar ao armazenamento anterior (as telas não recarregam o banco real)
+            try:
+                series, growth, elapsed = _measure(root, cycles, sample_every, warmup, top, register_sales, frames, progress)
+
+            finally:
+                root.destroy()
+
+    finally:
+        backend.close()
+
+    # Crescimento médio por ciclo, da referência até o fim
+    first, last = series[0], series[-1]
+
+    return {
+        "ciclos": cycles,
+        "segundos": elapsed,
+        "serie": series,
+        "rastreada_kib_por_ciclo": (last["rastreada_mb"] - first["rastreada_mb"]) * 1024 / max(cycles, 1),
+        "memoria_kib_por_ciclo": ((last["memoria_mb"] - first["memoria_mb"]) * 1024 / max(cycles, 1)
+                                  if last["memoria_mb"] is not None else None),
+        "crescimento": growth,
+        "mensagens": counts
+    }
+
+def _format_sample(entry):
+    """
+    Linha da série de amostras.
+    """
+
+    # Memória do processo pode não estar disponível
+    rss = f"{entry['memoria_mb']:>9.1f}" if entry["memoria_mb"] is not None else f"{'-':>9}"
+    return (f"{entry['ciclo']:>6} {rss} {entry['rastreada_mb']:>10.2f} {entry['widgets']:>8} {entry['comandos_tcl']:>8} "
+            f"{entry['objetos']:>9} {entry['inscricoes']:>7}")
+
+def _print_header():
+    """
+    Cabeçalho da série de amostras.
+    """
+
+    # Mesmas larguras de _format_sample
+    print(f"{'Ciclo':>6} {'Proc. MB':>9} {'Rastr. MB':>10} {'Widgets':>8} {'Tcl':>8} {'Objetos':>9} {'Inscr.':>7}")
+
+def print_results(result, show_series=True):
+    """
+    Mostra a série de amostras, o crescimento por ciclo e os locais de alocação que mais cresceram.
+    """
+
+    # Indicadores que sobem a cada amostra apontam vazamento; os que estabilizam são cache
+    if show_series:
+        _print_header()
+
+        for entry in result["serie"]:
+            print(_format_sample(entry))
+
+        print()
+
+    print(f"{result['ciclos']} ciclos em {result['segundos']:.1f} s")
+    print(f"Crescimento rastreado: {result['rastreada_kib_por_ciclo']:.2f} KiB por ciclo")
+
+    if result["memoria_kib_por_ciclo"] is not None:
+        print(f"Crescimento do processo: {result['memoria_kib_por_ciclo']:.2f} KiB por ciclo")
+
+    if result["mensagens"].get("erro"):
+        print(f"Atenção: {result['mensagens']['erro']} mensagem(ns) de erro exibida(s) pelos diálogos.")
+
+    print()
+    print("Locais de alocação que mais cresceram:")
+    print(memory.format_growth(result["crescimento"]))
+
+def main(argv=None):
+    """
+    Linha de comando: teste de resistência de memória da interface.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Teste de resistência de memória da interface (banco em memória). "
+                                                 "Sem monitor, execute com: xvfb-run -a python -m vendas_daetec.gui.soak")
+    parser.add_argument("--ciclos", type=int, default=500, help="Ciclos medidos (padrão: 500).")
+    parser.add_argument("--amostras", type=int, default=50, help="Ciclos entre amostras (padrão: 50).")
+    parser.add_argument("--aquecimento", type=int, default=20, help="Ciclos antes da referência (padrão: 20).")
+    parser.add_argument("--top", type=int, default=15, help="Locais de alocação listados (padrão: 15).")
+    parser.add_argument("--quadros", type=int, default=memory.TRACE_FRAMES, help="Quadros de pilha por alocação.")
+    parser.add_argument("--sem-vendas", action="store_true", help="Apenas abre e fecha o diálogo de venda.")
+    args = parser.parse_args(argv)
+
+    # Série mostrada à medida que as amostras saem; sem display o Tk não abre
+    _print_header()
+
+    try:
+        result = run_soak(args.ciclos, args.amostras, args.aquecimento, args.top, not args.sem_vendas, frames=args.quadros,
+                          progress=lambda entry: print(_format_sample(entry), flush=True))
+
+    except tk.TclError as e:
+        print(f"Não foi possível abrir a interface ({e}). Sem monitor, execute com xvfb-run.", file=sys.stderr)
+        return 2
+
+    print()
+    print_results(result, show_series=False)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
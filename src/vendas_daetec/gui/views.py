@@ -1,9 +1,13 @@
+import uuid
+import bisect
+import datetime
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 
 # Tenta importar a lógica de negócios do módulo core, considerando a estrutura de pacotes
 try:
-    from ..core import sales_logic
+    from ..core import sales_logic, live_stats, events
 
 except ImportError:
     
@@ -13,23 +17,311 @@ except ImportError:
     
     # Adiciona o diretório 'src' ao sys.path
     sys.path.append(str(Path(__file__).parent.parent.parent))
-    from vendas_daetec.core import sales_logic
+    from vendas_daetec.core import sales_logic, live_stats, events
+
+def subscribe_widget(widget, callback, *kinds):
+    """
+    Inscreve 'callback(evento)' no barramento de eventos enquanto o widget existir.
+    Eventos publicados fora da thread da interface são repassados ao loop do Tk.
+    """
+
+    # Entrega direta na thread principal; nas demais, agenda no loop do Tk
+    def deliver(event):
+        if threading.current_thread() is threading.main_thread():
+            callback(event)
+        else:
+            widget.after(0, callback, event)
+
+    # Cancela a inscrição quando o widget for destruído
+    def on_destroy(event):
+        if event.widget is widget:
+            events.unsubscribe(deliver)
+
+    events.subscribe(deliver, *kinds)
+    widget.bind("<Destroy>", on_destroy, add="+")
+    return deliver
+
+def _product_id_key(prod_id):
+    """
+    Chave de ordenação numérica para IDs no formato PROD-0001 (outros formatos vão para o fim, em ordem alfabética).
+    """
+
+    # Compara o número, não o texto (PROD-10000 depois de PROD-9999)
+    prefix, _, number = str(prod_id).rpartition("-")
+
+    if number.isdigit():
+        return (0, prefix.casefold(), int(number))
+
+    return (1, str(prod_id).casefold(), 0)
+
+class TreeSorter:
+    """
+    Ordenação e filtro em memória para uma Treeview já carregada.
+    As chaves de ordenação são calculadas uma vez por linha; reordenar ou filtrar só move (Treeview.move)
+    as linhas que mudaram de posição, sem consultar o banco.
+    """
+
+    def __init__(self, tree, sort_keys, format_row, sort_column, tiebreak=None, stripe=False):
+        """
+        Liga o ordenador à tabela.
+
+        :param sort_keys: {coluna: função(linha) -> chave}, uma por coluna ordenável.
+        :param format_row: Função(linha) -> valores exibidos na tabela.
+        :param sort_column: Coluna da ordenação inicial (crescente).
+        :param tiebreak: Coluna usada para desempatar (padrão: a própria coluna ordenada).
+        :param stripe: Aplica as tags 'evenrow'/'oddrow' nas linhas visíveis.
+        """
+
+        # Configuração
+        self.tree = tree
+        self.sort_keys = sort_keys
+        self.format_row = format_row
+        self.tiebreak = tiebreak
+        self.stripe = stripe
+
+        # Estado: chaves por linha, texto de busca por linha e tags de cor já aplicadas
+        self.sort_column = sort_column
+        self.ascending = True
+        self.filter_text = ""
+        self._keys = {}
+        self._search = {}
+        self._tags = {}
+
+        # Cabeçalhos clicáveis; o texto original recebe a seta da ordenação atual
+        self._headings = {column: tree.heading(column, "text") for column in sort_keys}
+
+        for column in sort_keys:
+            tree.heading(column, command=lambda column=column: self.sort_by(column))
+
+        self._update_headings()
+
+    def _index_row(self, iid, row):
+        """
+        Calcula as chaves de ordenação e o texto de busca de uma linha.
+        """
+
+        # Uma chave por coluna, mais o texto em minúsculas para o filtro
+        self._keys[iid] = {column: key(row) for column, key in self.sort_keys.items()}
+        self._search[iid] = " ".join(str(value) for value in self.format_row(row)).casefold()
+
+    def load(self, rows):
+        """
+        Substitui todo o conteúdo da tabela. 'rows' é uma sequência de (iid, linha).
+        """
+
+        # Recarga completa: única situação em que todas as linhas são reinseridas
+        self.tree.delete(*self.tree.get_children())
+        self._keys.clear()
+        self._search.clear()
+        self._tags.clear()
+
+        for iid, row in rows:
+            self._index_row(iid, row)
+            self.tree.insert("", tk.END, iid=iid, values=self.format_row(row))
+
+        self.apply()
+
+    def add(self, rows):
+        """
+        Inclui linhas novas, cada uma na posição da ordenação atual.
+        """
+
+        # Insere no fim e deixa apply mover só as linhas novas
+        for iid, row in rows:
+            if iid in self._keys:
+                continue
+
+            self._index_row(iid, row)
+            self.tree.insert("", tk.END, iid=iid, values=self.format_row(row))
+
+        self.apply()
+
+    def update(self, rows):
+        """
+        Substitui os valores de linhas já exibidas (ex: preços alterados em lote) e reposiciona só as que mudaram de lugar.
+        """
+
+        # Linhas que não estão na tabela são ignoradas
+        for iid, row in rows:
+            if iid not in self._keys:
+                continue
+
+            self._index_row(iid, row)
+            self.tree.item(iid, values=self.format_row(row))
+
+        self.apply()
+
+    def remove(self, iids):
+        """
+        Remove linhas da tabela.
+        """
+
+        # Linhas escondidas pelo filtro também são apagadas
+        removed = [iid for iid in iids if iid in self._keys]
+
+        for iid in removed:
+            del self._keys[iid]
+            del self._search[iid]
+            self._tags.pop(iid, None)
+
+        if removed:
+            self.tree.delete(*removed)
+            self.apply()
+
+    def sort_by(self, column):
+        """
+        Ordena pela coluna (clicar de novo na mesma coluna inverte a ordem).
+        """
+
+        # Alterna a direção apenas na coluna já ordenada
+        self.ascending = not self.ascending if column == self.sort_column else True
+        self.sort_column = column
+        self._update_headings()
+        self.apply()
+
+    def set_filter(self, text):
+        """
+        Mostra apenas as linhas que contêm 'text' em alguma coluna (sem diferenciar maiúsculas).
+        """
+
+        # Filtro vazio mostra tudo
+        self.filter_text = text.strip().casefold()
+        self.apply()
+
+    def apply(self):
+        """
+        Reposiciona as linhas conforme a ordenação e o filtro atuais, movendo só o que mudou.
+        """
+
+        # Ordem desejada das linhas visíveis
+        column = self.sort_column
+        tiebreak = self.tiebreak or column
+        visible = [iid for iid in self._keys if self.filter_text in self._search[iid]] if self.filter_text else list(self._keys)
+        visible.sort(key=lambda iid: (self._keys[iid][column], self._keys[iid][tiebreak]), reverse=not self.ascending)
+
+        # Linhas que já estão na ordem certa entre si (maior subsequência crescente das posições atuais) não se movem
+        current = self.tree.get_children()
+        position = {iid: index for index, iid in enumerate(current)}
+        attached = [iid for iid in visible if iid in position]
+        kept = {attached[i] for i in _increasing_run([position[iid] for iid in attached])}
+        moved = [iid for iid in visible if iid not in kept]
+
+        # Muitas linhas fora do lugar (ex: ordem invertida): uma única chamada define a lista inteira,
+        # escondendo também as linhas que saíram do filtro
+        if len(moved) > len(visible) // 2:
+            self.tree.set_children("", *visible)
+
+        elif moved or len(current) != len(visible):
+
+            # Retira as linhas escondidas pelo filtro e as que vão mudar de lugar; as que ficam já estão em ordem
+            wanted = set(visible)
+            self.tree.detach(*[iid for iid in current if iid not in wanted], *[iid for iid in moved if iid in position])
+
+            # Reinsere na ordem desejada: antes da posição i estão exatamente as i primeiras linhas visíveis
+            for index, iid in enumerate(visible):
+                if iid not in kept:
+                    self.tree.move(iid, "", index)
+
+        # Cores alternadas: só atualiza as linhas cuja paridade mudou
+        if self.stripe:
+            for index, iid in enumerate(visible):
+                tag = "evenrow" if index % 2 == 0 else "oddrow"
+
+                if self._tags.get(iid) != tag:
+                    self.tree.item(iid, tags=(tag,))
+                    self._tags[iid] = tag
+
+    def _update_headings(self):
+        """
+        Mostra a seta da direção na coluna ordenada.
+        """
+
+        # As demais colunas voltam ao texto original
+        for column, text in self._headings.items():
+            arrow = (" ▲" if self.ascending else " ▼") if column == self.sort_column else ""
+            self.tree.heading(column, text=text + arrow)
+
+def _increasing_run(values):
+    """
+    Índices de uma maior subsequência crescente de 'values' (O(n log n)).
+    """
+
+    # tails[k]: menor valor final de uma subsequência de tamanho k + 1 (ends[k] é o índice dele);
+    # previous liga cada índice ao anterior da sua subsequência
+    tails = []
+    ends = []
+    previous = [None] * len(values)
+
+    for index, value in enumerate(values):
+        size = bisect.bisect_left(tails, value)
+
+        if size > 0:
+            previous[index] = ends[size - 1]
+
+        if size == len(tails):
+            tails.append(value)
+            ends.append(index)
+        else:
+            tails[size] = value
+            ends[size] = index
+
+    # Reconstrói a subsequência a partir do último final
+    run = []
+    index = ends[-1] if ends else None
+
+    while index is not None:
+        run.append(index)
+        index = previous[index]
+
+    return run[::-1]
+
+def add_filter_entry(parent, sorter, delay_ms=150):
+    """
+    Cria um campo "Filtrar" que aplica o texto digitado no ordenador (com um pequeno atraso entre teclas).
+    Retorna o frame com o rótulo e o campo, para o chamador posicionar.
+    """
+
+    # Uma única aplicação do filtro por pausa na digitação
+    frame = tk.Frame(parent)
+    tk.Label(frame, text="Filtrar:").pack(side="left", padx=(0, 5))
+    var = tk.StringVar()
+    entry = ttk.Entry(frame, textvariable=var)
+    entry.pack(side="left", fill="x", expand=True)
+    pending = [None]
+
+    def apply_filter():
+        pending[0] = None
+        sorter.set_filter(var.get())
+
+    def on_change(*args):
+        if pending[0] is not None:
+            frame.after_cancel(pending[0])
+        pending[0] = frame.after(delay_ms, apply_filter)
+
+    var.trace_add("write", on_change)
+    frame.filter_var = var
+    return frame
 
 class ProductsView(tk.Frame):
     """
     Tela de visualização de produtos cadastrados.
     """
 
-    def __init__(self, parent):
+    def __init__(self, parent, load=True):
         """
         Inicializa a tela de produtos, configurando a tabela e carregando os dados.
+        Com load=False a tabela começa vazia e load_products deve ser chamado depois (ex: após o aquecimento).
         """
 
         # Inicializa o frame e armazena a referência ao pai
         super().__init__(parent)
         self.parent = parent
         self._setup_widgets()
-        self.load_products()
+        subscribe_widget(self, self._on_product_event, events.PRODUCT_ADDED, events.PRODUCT_DELETED, events.PRODUCTS_UPDATED)
+        subscribe_widget(self, lambda event: self.load_products(), events.BACKEND_CHANGED)
+
+        if load:
+            self.load_products()
 
     def _setup_widgets(self):
         """
@@ -62,34 +354,428 @@ class ProductsView(tk.Frame):
         scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
         self.tree.configure(yscroll=scrollbar.set)
         
+        # Ordenação por cabeçalho e filtro em memória (vendedor, depois ID, como no banco)
+        self.sorter = TreeSorter(self.tree, {
+            "vendedor": lambda row: row[0].casefold(),
+            "id": lambda row: _product_id_key(row[1]),
+            "produto": lambda row: row[2].casefold(),
+            "preco": lambda row: row[3]
+        }, self._format_row, sort_column="vendedor", tiebreak="id", stripe=True)
+        filter_frame = add_filter_entry(self, self.sorter)
+
         # Posicionar os widgets
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        scrollbar.grid(row=0, column=1, sticky="ns")
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(5, 5))
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        scrollbar.grid(row=1, column=1, sticky="ns")
 
         # Configurar o redimensionamento
-        self.grid_rowconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
+    @staticmethod
+    def _format_row(product):
+        """
+        Valores exibidos para uma linha de get_all_products.
+        """
+
+        # Preço no formato brasileiro
+        vendedor, prod_id, prod_nome, prod_preco = product
+        return (vendedor, prod_id, prod_nome, _format_currency(prod_preco))
+
     def load_products(self):
         """
         Carrega os produtos do banco de dados e os exibe na Treeview.
         """
 
-        # Limpa a tabela antes de carregar novos dados
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Recarrega a tabela direto do iterador (o ID do produto identifica a linha); as chaves de ordenação são calculadas aqui
+        self.sorter.load((product[1], product) for product in sales_logic.iter_products())
 
-        # Busca os produtos do banco de dados
-        products = sales_logic.get_all_products()
+    def _on_product_event(self, event):
+        """
+        Aplica na tabela apenas os produtos adicionados, alterados ou removidos, sem recarregar o catálogo.
+        """
 
-        # Insere os dados na tabela
-        for i, product in enumerate(products):
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            vendedor, prod_id, prod_nome, prod_preco = product
-            
-            # Formata o preço para o formato R$ 0,00
-            preco_formatado = f"R$ {prod_preco:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            self.tree.insert("", tk.END, values=(vendedor, prod_id, prod_nome, preco_formatado), tags=(tag,))
+        # A ordenação e o filtro atuais são mantidos; só as linhas afetadas se movem
+        if event.kind == events.PRODUCT_DELETED:
+            self.sorter.remove([row[1] for row in event.rows])
+
+        elif event.kind == events.PRODUCTS_UPDATED:
+            self.sorter.update((row[1], row) for row in event.rows)
+
+        else:
+            self.sorter.add((row[1], row) for row in event.rows)
+
+class DashboardView(tk.Frame):
+    """
+    Painel com o ranking de vendedores (receita, unidades e métodos de pagamento).
+    Lê apenas os contadores em memória e só redesenha quando o barramento avisa de uma alteração.
+    """
+
+    # Métodos de pagamento exibidos como colunas
+    PAYMENT_METHODS = sales_logic.PAYMENT_METHODS
+
+    def __init__(self, parent):
+        """
+        Inicializa o painel e passa a ouvir vendas, novos vendedores e a limpeza do histórico.
+        """
+
+        # Inicializa o frame e obtém os contadores compartilhados (inscritos no barramento antes do painel)
+        super().__init__(parent)
+        self.parent = parent
+        self.counters = live_stats.get_counters()
+        self._shown_version = None
+        self._refresh_pending = False
+        self._setup_widgets()
+        subscribe_widget(self, self._on_change, events.SALE_REGISTERED, events.SELLER_ADDED, events.SALES_CLEARED, events.BACKEND_CHANGED)
+        self.refresh()
+
+    def _on_change(self, event):
+        """
+        Agenda um único redesenho para vários eventos seguidos (ex: venda com vários vendedores).
+        """
+
+        # Os contadores já aplicaram o evento; basta redesenhar quando a interface estiver ociosa
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def _setup_widgets(self):
+        """
+        Configura os widgets do painel.
+        """
+
+        # Título
+        title = tk.Label(self, text="Painel de Vendedores", font=("Calibri", 14, "bold"))
+        title.grid(row=0, column=0, columnspan=2, sticky="w", padx=10, pady=(10, 5))
+
+        # Definir colunas
+        columns = ("posicao", "vendedor", "vendas", "unidades", "receita") + self.PAYMENT_METHODS
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        self.tree.tag_configure('evenrow', background='#E8E8E8')
+        self.tree.tag_configure('oddrow', background='#FFFFFF')
+
+        # Configurar cabeçalhos e larguras
+        self.tree.heading("posicao", text="#")
+        self.tree.heading("vendedor", text="Vendedor")
+        self.tree.heading("vendas", text="Vendas")
+        self.tree.heading("unidades", text="Unidades")
+        self.tree.heading("receita", text="Receita")
+        self.tree.column("posicao", width=40, anchor=tk.CENTER)
+        self.tree.column("vendedor", width=200, anchor=tk.W)
+        self.tree.column("vendas", width=80, anchor=tk.CENTER)
+        self.tree.column("unidades", width=80, anchor=tk.CENTER)
+        self.tree.column("receita", width=120, anchor=tk.E)
+
+        for method in self.PAYMENT_METHODS:
+            self.tree.heading(method, text=method)
+            self.tree.column(method, width=110, anchor=tk.E)
+
+        # Scrollbar
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=scrollbar.set)
+
+        # Posicionar os widgets
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        scrollbar.grid(row=1, column=1, sticky="ns")
+
+        # Configurar o redimensionamento
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+    def refresh(self):
+        """
+        Atualiza a tabela se os contadores mudaram desde a última exibição.
+        """
+
+        # Só redesenha quando houve alguma venda nova
+        self._refresh_pending = False
+
+        if self.counters.version != self._shown_version:
+            self._shown_version = self.counters.version
+            rows = self.counters.leaderboard()
+            existing = set(self.tree.get_children())
+
+            # Atualiza (ou cria) uma linha por vendedor, reaproveitando os itens da Treeview
+            for i, row in enumerate(rows):
+                iid = str(row["vendedor_id"])
+                tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+                values = (
+                    i + 1,
+                    row["nome"],
+                    row["vendas"],
+                    row["unidades"],
+                    _format_currency(row["receita"]),
+                    *(_format_currency(row["pagamentos"].get(method, 0.0)) for method in self.PAYMENT_METHODS)
+                )
+
+                if iid in existing:
+                    self.tree.item(iid, values=values, tags=(tag,))
+                    self.tree.move(iid, "", i)
+                    existing.discard(iid)
+
+                else:
+                    self.tree.insert("", i, iid=iid, values=values, tags=(tag,))
+
+            # Remove vendedores que não aparecem mais (ex: histórico apagado)
+            for iid in existing:
+                self.tree.delete(iid)
+
+class SalesHistoryView(tk.Frame):
+    """
+    Tela de histórico de vendas, paginada e com os detalhes de cada venda carregados sob demanda.
+    """
+
+    # Quantidade de vendas buscadas por página
+    PAGE_SIZE = 100
+
+    def __init__(self, parent):
+        """
+        Inicializa a tela e carrega a primeira página.
+        """
+
+        # Inicializa o frame e o estado da paginação
+        super().__init__(parent)
+        self.parent = parent
+        self.next_cursor = None
+        self.loading = False
+        self._page_pending = False
+        self.filters = {"seller_id": None, "date_from": None, "date_to": None}
+        self.loaded_details = set()
+        self._setup_widgets()
+        subscribe_widget(self, self._on_change, events.SALE_REGISTERED, events.SALES_CLEARED, events.SELLER_ADDED, events.SELLER_DELETED,
+                         events.BACKEND_CHANGED)
+        self.reload()
+
+    def _setup_widgets(self):
+        """
+        Configura os filtros, a tabela e o botão de paginação.
+        """
+
+        # Filtros
+        filter_frame = ttk.Frame(self, padding="5")
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew")
+
+        ttk.Label(filter_frame, text="Vendedor:").pack(side="left")
+        self.seller_var = tk.StringVar(value="Todos")
+        self.seller_combo = ttk.Combobox(filter_frame, textvariable=self.seller_var, state="readonly", width=25)
+        self.seller_combo.pack(side="left", padx=(5, 15))
+
+        ttk.Label(filter_frame, text="De (AAAA-MM-DD):").pack(side="left")
+        self.date_from_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.date_from_var, width=12).pack(side="left", padx=(5, 15))
+
+        ttk.Label(filter_frame, text="Até:").pack(side="left")
+        self.date_to_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.date_to_var, width=12).pack(side="left", padx=(5, 15))
+
+        ttk.Button(filter_frame, text="Filtrar", command=self.reload).pack(side="left")
+
+        # Tabela em árvore: cada venda pode ser expandida para mostrar itens e pagamentos
+        columns = ("data", "vendedor", "total")
+        self.tree = ttk.Treeview(self, columns=columns, show="tree headings")
+        self.tree.heading("#0", text="Venda")
+        self.tree.heading("data", text="Data")
+        self.tree.heading("vendedor", text="Vendedor")
+        self.tree.heading("total", text="Total")
+        self.tree.column("#0", width=260)
+        self.tree.column("data", width=160, anchor=tk.CENTER)
+        self.tree.column("vendedor", width=200, anchor=tk.W)
+        self.tree.column("total", width=120, anchor=tk.E)
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+
+        # Scrollbar; ao chegar perto do fim, a próxima página é buscada
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=lambda first, last: self._on_scroll(scrollbar, first, last))
+
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        scrollbar.grid(row=1, column=1, sticky="ns")
+
+        # Botão para carregar mais vendas
+        self.more_button = ttk.Button(self, text="Carregar mais", command=self.load_next_page)
+        self.more_button.grid(row=2, column=0, columnspan=2, pady=5)
+
+        # Configurar o redimensionamento
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+    def _selected_seller_id(self):
+        """
+        Retorna o ID do vendedor escolhido no filtro, ou None para todos.
+        """
+
+        # Procura o nome selecionado na lista carregada
+        selected = self.seller_var.get()
+
+        for seller_id, seller_name in self.vendedores:
+            if seller_name == selected:
+                return seller_id
+
+        return None
+
+    def reload(self):
+        """
+        Limpa a tabela e busca a primeira página com os filtros atuais.
+        """
+
+        # Atualiza a lista de vendedores do filtro (catálogo em memória)
+        self.vendedores = sales_logic.get_all_sellers()
+        self.seller_combo["values"] = ["Todos"] + [nome for _, nome in self.vendedores]
+
+        # Valida as datas antes de consultar; os filtros em uso (e o cursor) só mudam se forem válidas
+        filters = {
+            "seller_id": self._selected_seller_id(),
+            "date_from": self.date_from_var.get().strip() or None,
+            "date_to": self.date_to_var.get().strip() or None
+        }
+
+        for key in ("date_from", "date_to"):
+            if filters[key]:
+                try:
+                    datetime.date.fromisoformat(filters[key])
+                except ValueError:
+                    messagebox.showerror("Erro de Entrada", "Use datas no formato AAAA-MM-DD.", parent=self)
+                    return
+
+        self.filters = filters
+
+        self.tree.delete(*self.tree.get_children())
+        self.loaded_details.clear()
+        self.next_cursor = None
+        self.load_next_page(first=True)
+
+    def load_next_page(self, first=False):
+        """
+        Busca a próxima página a partir do cursor da última venda exibida.
+        """
+
+        # Evita buscas simultâneas e buscas depois da última página
+        if self.loading or (not first and self.next_cursor is None):
+            return
+
+        self.loading = True
+
+        try:
+            rows, self.next_cursor = sales_logic.get_sales_page(limit=self.PAGE_SIZE, after=self.next_cursor, **self.filters)
+
+            # Cada venda recebe um filho provisório para aparecer como expansível
+            for venda_id, data_venda, vendedor, valor_total in rows:
+                iid = f"venda:{venda_id}"
+                self.tree.insert("", tk.END, iid=iid, text=f"Venda #{venda_id}", values=(data_venda, vendedor, _format_currency(valor_total)))
+                self.tree.insert(iid, tk.END, text="Carregando...")
+
+            self.more_button["state"] = "normal" if self.next_cursor else "disabled"
+
+        finally:
+            self.loading = False
+
+    def _on_change(self, event):
+        """
+        Aplica vendas novas, a limpeza do histórico e alterações de vendedores sem refazer a consulta
+        (a troca de armazenamento recarrega tudo).
+        """
+
+        # Venda nova: entra no topo se passar pelos filtros atuais
+        if event.kind == events.SALE_REGISTERED:
+            for venda_id, data_venda, vendedor, valor_total in event.rows:
+                if self._matches_filters(event.data["vendedor_id"], data_venda):
+                    iid = f"venda:{venda_id}"
+                    self.tree.insert("", 0, iid=iid, text=f"Venda #{venda_id}", values=(data_venda, vendedor, _format_currency(valor_total)))
+                    self.tree.insert(iid, tk.END, text="Carregando...")
+
+        # Histórico apagado: nada mais a mostrar ou paginar
+        elif event.kind == events.SALES_CLEARED:
+            self.tree.delete(*self.tree.get_children())
+            self.loaded_details.clear()
+            self.next_cursor = None
+            self.more_button["state"] = "disabled"
+
+        # Outro armazenamento (ex: modo de treinamento): refaz a consulta inteira
+        elif event.kind == events.BACKEND_CHANGED:
+            self.reload()
+
+        # Vendedores: só a lista do filtro muda
+        elif event.kind == events.SELLER_ADDED:
+            self.vendedores = self.vendedores + event.rows
+            self.seller_combo["values"] = ["Todos"] + [nome for _, nome in self.vendedores]
+
+        elif event.kind == events.SELLER_DELETED:
+            removed = {seller_id for seller_id, _ in event.rows}
+            self.vendedores = [seller for seller in self.vendedores if seller[0] not in removed]
+            self.seller_combo["values"] = ["Todos"] + [nome for _, nome in self.vendedores]
+
+    def _matches_filters(self, seller_id, data_venda):
+        """
+        Verifica se uma venda passa pelos filtros usados na última consulta.
+        """
+
+        # Mesmas regras de get_sales_page (datas inclusivas)
+        if self.filters["seller_id"] is not None and seller_id != self.filters["seller_id"]:
+            return False
+
+        if self.filters["date_from"] and data_venda[:10] < self.filters["date_from"]:
+            return False
+
+        if self.filters["date_to"] and data_venda[:10] > self.filters["date_to"]:
+            return False
+
+        return True
+
+    def _on_scroll(self, scrollbar, first, last):
+        """
+        Repassa a posição para a scrollbar e busca a próxima página perto do fim da lista.
+        """
+
+        # Atualiza a scrollbar normalmente
+        scrollbar.set(first, last)
+
+        # Carrega mais quando 90% da lista já está visível ou foi rolada (uma única busca agendada por vez)
+        if self.next_cursor is not None and float(last) >= 0.9 and not self._page_pending:
+            self._page_pending = True
+            self.after_idle(self._load_pending_page)
+
+    def _load_pending_page(self):
+        """
+        Busca a página agendada pela rolagem e libera o próximo agendamento.
+        """
+
+        # Liberado mesmo se a busca falhar
+        try:
+            self.load_next_page()
+
+        finally:
+            self._page_pending = False
+
+    def _on_open(self, event):
+        """
+        Carrega os itens e pagamentos de uma venda somente quando ela é expandida.
+        """
+
+        # Identifica a venda expandida
+        iid = self.tree.focus()
+
+        if not iid.startswith("venda:") or iid in self.loaded_details:
+            return
+
+        self.loaded_details.add(iid)
+        venda_id = int(iid.split(":")[1])
+        itens, pagamentos = sales_logic.get_sale_details(venda_id)
+
+        # Troca o filho provisório pelos detalhes reais
+        self.tree.delete(*self.tree.get_children(iid))
+
+        for produto_id, produto_nome, quantidade, preco_unitario in itens:
+            self.tree.insert(iid, tk.END, text=f"{quantidade}x [{produto_id}] {produto_nome}", values=("", "", _format_currency(quantidade * preco_unitario)))
+
+        for metodo, valor in pagamentos:
+            self.tree.insert(iid, tk.END, text=f"Pagamento: {metodo}", values=("", "", _format_currency(valor)))
+
+def _format_currency(valor):
+    """
+    Formata um valor no padrão R$ 0.000,00.
+    """
+
+    # Troca os separadores do formato americano pelo brasileiro
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 class AddProductDialog(tk.Toplevel):
     """
@@ -214,6 +900,97 @@ class AddProductDialog(tk.Toplevel):
         self.result = (name, price_float, seller_id)
         self.destroy()
 
+class SettlementDialog(tk.Toplevel):
+    """
+    Diálogo do acerto com os vendedores: período (opcional) e taxa de cada método de pagamento.
+    """
+
+    def __init__(self, parent, fees):
+        """
+        Inicializa o diálogo com as taxas atuais ({metodo: percentual}).
+        """
+
+        # Configurações da janela
+        super().__init__(parent)
+        self.title("Acerto dos Vendedores")
+        self.transient(parent)
+        self.grab_set()
+        self.resizable(False, False)
+        self.result = None
+
+        # Estrutura da janela
+        form_frame = tk.Frame(self, padx=10, pady=10)
+        form_frame.pack(fill="both", expand=True)
+
+        # Período: vazio considera todo o histórico; períodos já encerrados são guardados e reaproveitados
+        tk.Label(form_frame, text="De (AAAA-MM-DD):").grid(row=0, column=0, sticky="w", padx=5, pady=5)
+        self.date_from_entry = tk.Entry(form_frame, width=12)
+        self.date_from_entry.grid(row=0, column=1, sticky="w", padx=5, pady=5)
+
+        tk.Label(form_frame, text="Até (AAAA-MM-DD):").grid(row=1, column=0, sticky="w", padx=5, pady=5)
+        self.date_to_entry = tk.Entry(form_frame, width=12)
+        self.date_to_entry.grid(row=1, column=1, sticky="w", padx=5, pady=5)
+
+        # Uma taxa por método de pagamento do caixa (vazio = sem taxa)
+        self.fee_entries = {}
+
+        for row, method in enumerate(sales_logic.PAYMENT_METHODS, start=2):
+            tk.Label(form_frame, text=f"Taxa {method} (%):").grid(row=row, column=0, sticky="w", padx=5, pady=5)
+            entry = tk.Entry(form_frame, width=12)
+            entry.grid(row=row, column=1, sticky="w", padx=5, pady=5)
+
+            if method in fees:
+                entry.insert(0, f"{fees[method]:g}".replace(".", ","))
+
+            self.fee_entries[method] = entry
+
+        # Botões de ação
+        button_frame = tk.Frame(form_frame)
+        button_frame.grid(row=len(self.fee_entries) + 2, column=1, sticky="e", pady=10)
+        tk.Button(button_frame, text="OK", command=self._on_ok).pack(side="left", padx=5)
+        tk.Button(button_frame, text="Cancelar", command=self.destroy).pack(side="left")
+
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+        self.wait_window(self)
+
+    def _on_ok(self):
+        """
+        Valida datas e taxas e armazena o resultado: (date_from, date_to, {metodo: percentual ou None}).
+        """
+
+        # Datas no mesmo formato do histórico de vendas
+        date_from = self.date_from_entry.get().strip() or None
+        date_to = self.date_to_entry.get().strip() or None
+
+        try:
+            for value in (date_from, date_to):
+                if value:
+                    datetime.date.fromisoformat(value)
+
+        except ValueError:
+            messagebox.showerror("Erro de Entrada", "Use datas no formato AAAA-MM-DD.", parent=self)
+            return
+
+        # Taxas aceitam vírgula decimal; vazio remove a taxa do método
+        fees = {}
+
+        for method, entry in self.fee_entries.items():
+            text = entry.get().strip().replace(",", ".")
+
+            try:
+                fees[method] = float(text) if text else None
+
+                if fees[method] is not None and fees[method] < 0:
+                    raise ValueError("A taxa não pode ser negativa.")
+
+            except ValueError:
+                messagebox.showerror("Erro de Entrada", f"Taxa inválida para {method}.", parent=self)
+                return
+
+        # Armazena o resultado e fecha a janela
+        self.result = (date_from, date_to, fees)
+        self.destroy()
+
 class SaleDialog(tk.Toplevel):
     """
     Janela para registrar uma nova venda (carrinho de compras).
@@ -466,7 +1243,7 @@ class SaleDialog(tk.Toplevel):
         self.integral_mode_frame = ttk.Frame(self.payment_frame)
 
         # Opções de método de pagamento para o modo integral
-        payment_methods = ["Pix", "Dinheiro", "Débito", "Crédito"]
+        payment_methods = list(sales_logic.PAYMENT_METHODS)
         ttk.Label(self.integral_mode_frame, text="Método de Pagamento:").pack(side="left", padx=(0, 10))
         self.integral_method_var = tk.StringVar()
         self.integral_method_combo = ttk.Combobox(self.integral_mode_frame, textvariable=self.integral_method_var, values=payment_methods, state="readonly")
@@ -482,7 +1259,7 @@ class SaleDialog(tk.Toplevel):
 
         # Dicionário para armazenar os widgets de pagamento fracionado
         self.payment_widgets = {}
-        payment_methods_split = ["Pix", "Dinheiro", "Débito", "Crédito"]
+        payment_methods_split = list(sales_logic.PAYMENT_METHODS)
         
         # Cria os checkboxes e campos de entrada para cada método de pagamento no modo fracionado
         for i, method in enumerate(payment_methods_split):
@@ -612,7 +1389,8 @@ class SaleDialog(tk.Toplevel):
             sales_by_seller[vendedor_id]['cart_items'].append(item)
             sales_by_seller[vendedor_id]['valor_total'] += item['preco_total']
 
-        # Processa as vendas para cada vendedor
+        # Processa as vendas para cada vendedor; todas ficam ligadas ao mesmo atendimento
+        atendimento = uuid.uuid4().hex
         all_success = True
         for vendedor_id, sale_data in sales_by_seller.items():
             # Define os pagamentos para esta venda específica
@@ -633,7 +1411,8 @@ class SaleDialog(tk.Toplevel):
                 vendedor_id=vendedor_id,
                 valor_total=sale_data['valor_total'],
                 cart_items=sale_data['cart_items'],
-                payments=final_payments_for_seller
+                payments=final_payments_for_seller,
+                atendimento=atendimento
             )
             if not success:
                 all_success = False
@@ -644,4 +1423,57 @@ class SaleDialog(tk.Toplevel):
             self.destroy()
 
         else:
-            messagebox.showerror("Erro no Banco de Dados", "Ocorreu um erro ao salvar uma ou mais vendas. A transação foi revertida.", parent=self)
\ No newline at end of file
+            messagebox.showerror("Erro no Banco de Dados", "Ocorreu um erro ao salvar uma ou mais vendas. A transação foi revertida.", parent=self)
+
+class ReportProgressDialog(tk.Toplevel):
+    """
+    Janela de progresso da geração do relatório, com botão de cancelamento.
+    """
+
+    def __init__(self, parent, cancel_event):
+        """
+        Inicializa a janela com a barra de progresso.
+        """
+
+        # Configurações da janela
+        super().__init__(parent)
+        self.title("Gerando Relatório")
+        self.geometry("360x130")
+        self.transient(parent)
+        self.resizable(False, False)
+        self.cancel_event = cancel_event
+
+        # Texto de situação
+        self.status_label = ttk.Label(self, text="Preparando relatório...")
+        self.status_label.pack(fill="x", padx=10, pady=(15, 5))
+
+        # Barra de progresso (vendedores processados / total)
+        self.progress_bar = ttk.Progressbar(self, mode="determinate", maximum=1)
+        self.progress_bar.pack(fill="x", padx=10, pady=5)
+
+        # Botão de cancelar
+        self.cancel_button = ttk.Button(self, text="Cancelar", command=self._on_cancel)
+        self.cancel_button.pack(pady=(5, 10))
+
+        # Fechar a janela equivale a cancelar
+        self.protocol("WM_DELETE_WINDOW", self._on_cancel)
+
+    def update_progress(self, processados, total):
+        """
+        Atualiza a barra e o texto com o progresso (vendedores no relatório completo, vendas novas no relatório em cache).
+        """
+
+        # Evita barra vazia quando ainda não se sabe o total
+        self.progress_bar["maximum"] = max(total, 1)
+        self.progress_bar["value"] = processados
+        self.status_label["text"] = f"Processados: {processados} de {total}"
+
+    def _on_cancel(self):
+        """
+        Pede o cancelamento da geração; a janela é fechada pela janela principal.
+        """
+
+        # Sinaliza a thread do relatório e impede cliques repetidos
+        self.cancel_event.set()
+        self.status_label["text"] = "Cancelando..."
+        self.cancel_button["state"] = "disabled"
@@ -1,10 +1,147 @@
+import time
+
+# Marca o início do processo, antes das importações pesadas (tkinter e interface)
+_START = time.perf_counter()
+
+import os
+import sys
+import logging
+import datetime
+import threading
+import multiprocessing
 from vendas_daetec.gui.app_window import AppWindow
-from vendas_daetec.core import sales_logic
+from vendas_daetec.gui.profiler import UiProfiler
+from vendas_daetec.gui.memory import MemoryMonitor
+from vendas_daetec.core import sales_logic, storage, log_setup
+from vendas_daetec.core.replay import SessionRecorder
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Tempo gasto importando os módulos da aplicação
+_IMPORTS_DONE = time.perf_counter()
 
-def run_app():
+def _warm_up(timings):
+    """
+    Abre o banco e carrega o catálogo em segundo plano, enquanto o Tk desenha a janela.
+    """
+
+    # Inicialização do banco (DDL apenas quando o esquema estiver desatualizado)
+    start = time.perf_counter()
     sales_logic.initialize_database()
-    app = AppWindow()
-    app.mainloop()
+    timings["banco"] = time.perf_counter() - start
+
+    # Catálogo em memória para a primeira venda
+    start = time.perf_counter()
+    sales_logic.warm_catalog()
+    timings["catalogo"] = time.perf_counter() - start
+
+def _print_startup_report(timings):
+    """
+    Registra quanto tempo cada etapa da inicialização levou.
+    """
+
+    # Valores em milissegundos; as etapas também vão como campos do registro
+    lines = [
+        "Tempo de inicialização:",
+        f"  Importações:       {timings['importacoes'] * 1000:8.1f} ms",
+        f"  Banco de dados:    {timings.get('banco', 0) * 1000:8.1f} ms (em segundo plano)",
+        f"  Catálogo:          {timings.get('catalogo', 0) * 1000:8.1f} ms (em segundo plano)",
+        f"  Interface:         {timings['interface'] * 1000:8.1f} ms",
+        f"  Total até a janela:{timings['total'] * 1000:8.1f} ms"
+    ]
+    logger.info("\n".join(lines), extra={f"{step}_ms": round(value * 1000, 1) for step, value in timings.items()})
+
+def run_app(profile_ui=False, training=False, memory_monitor=None, record_session=False):
+    timings = {"importacoes": _IMPORTS_DONE - _START}
+
+    # Registro em segundo plano: arquivos rotativos em logs/ (e console, se houver)
+    log_setup.configure_logging()
+
+    # Modo de treinamento: catálogo copiado para a memória, nada é gravado no banco de produção
+    if training:
+        storage.start_training_mode()
+
+    # Gravação opcional da sessão para reprodução (ver core/replay): parte de uma cópia do banco atual
+    recorder = None
+
+    if record_session:
+        sales_logic.initialize_database()
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        recorder = SessionRecorder(sales_logic.DB_PATH.parent / "sessoes" / f"sessao_{stamp}.jsonl.gz")
+        recorder.start()
+
+    # Perfilador opcional da interface: precisa ser instalado antes de a janela registrar os callbacks
+    profiler = None
+
+    if profile_ui:
+        profiler = UiProfiler(sales_logic.DB_PATH.parent / "perfil_ui.log")
+        profiler.install()
+
+    # Banco e catálogo em paralelo com a construção da janela
+    warmup = threading.Thread(target=_warm_up, args=(timings,), name="aquecimento", daemon=True)
+    warmup.start()
+
+    ui_start = time.perf_counter()
+    app = AppWindow(warmup_thread=warmup)
+
+    def on_first_idle():
+        now = time.perf_counter()
+        timings["interface"] = now - ui_start
+        timings["total"] = now - _START
+        report_when_ready()
+
+    def report_when_ready():
+        # Aguarda o aquecimento sem bloquear a janela
+        if warmup.is_alive():
+            app.after(50, report_when_ready)
+        else:
+            _print_startup_report(timings)
+
+    # O relatório é emitido quando a janela termina de ser desenhada
+    app.after_idle(on_first_idle)
+
+    if profiler:
+        profiler.start_probe(app)
+
+    # Monitor de memória opcional para sessões longas: amostras periódicas no log ('rastrear' liga o tracemalloc)
+    monitor = None
+
+    if memory_monitor:
+        monitor = MemoryMonitor(app, trace=memory_monitor == "rastrear")
+        monitor.start()
+
+    try:
+        app.mainloop()
+
+    finally:
+        if monitor:
+            monitor.stop()
+
+        if recorder:
+            recorder.stop()
+
+        # Resumo dos piores handlers da sessão (também gravado no arquivo)
+        if profiler:
+            print("Perfil da interface:")
+            print(profiler.format_summary())
+            profiler.uninstall()
 
 if __name__ == "__main__":
-    run_app()
\ No newline at end of file
+    # Necessário para o relatório paralelo no executável do PyInstaller
+    multiprocessing.freeze_support()
+
+    # --perfilar-ui ou VENDAS_PERFIL_UI=1 ativam o perfilador de latência da interface; --treinamento abre em memória;
+    # --monitorar-memoria (ou VENDAS_MONITOR_MEMORIA=1) registra a memória no log e --rastrear-memoria
+    # (ou VENDAS_MONITOR_MEMORIA=rastrear) inclui os locais de alocação que mais cresceram;
+    # --gravar-sessao grava as operações em data/sessoes para reprodução com 'python -m vendas_daetec.core.replay'
+    memory_monitor = os.environ.get("VENDAS_MONITOR_MEMORIA") if os.environ.get("VENDAS_MONITOR_MEMORIA") in ("1", "rastrear") else None
+
+    if "--rastrear-memoria" in sys.argv[1:]:
+        memory_monitor = "rastrear"
+    elif "--monitorar-memoria" in sys.argv[1:]:
+        memory_monitor = memory_monitor or "1"
+
+    run_app(profile_ui="--perfilar-ui" in sys.argv[1:] or os.environ.get("VENDAS_PERFIL_UI") == "1",
+            training="--treinamento" in sys.argv[1:], memory_monitor=memory_monitor,
+            record_session="--gravar-sessao" in sys.argv[1:])
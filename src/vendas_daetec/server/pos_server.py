@@ -0,0 +1,662 @@
+import sqlite3
+import asyncio
+import json
+import time
+import uuid
+import queue
+import hashlib
+import logging
+import argparse
+import threading
+import concurrent.futures
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+from ..core import sales_logic, report_cache, events, log_setup, basket
+
+# Registro estruturado (ver log_setup)
+logger = logging.getLogger(__name__)
+
+# Limites das requisições (o corpo e os cabeçalhos precisam chegar dentro de REQUEST_TIMEOUT)
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 30.0
+REQUEST_TIMEOUT = 10.0
+
+# Quantas vendas da fila de escrita podem ser confirmadas em um único COMMIT
+WRITE_BATCH = 64
+
+class HttpError(Exception):
+    """
+    Erro que vira uma resposta JSON {"erro": mensagem} com o status informado.
+    """
+
+    def __init__(self, status, message):
+        """
+        Guarda o status HTTP e a mensagem.
+        """
+
+        # Mensagem também disponível como texto da exceção
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def _checkout(cursor, pending_events, itens, pagamentos):
+    """
+    Executado na thread de escrita: precifica o carrinho pelo cadastro e grava uma venda por vendedor.
+    Os eventos de venda vão para 'pending_events' e só são publicados após o COMMIT.
+    Retorna {"vendas": [ids], "valor_total": total}.
+    """
+
+    # Preços e vendedores vêm do banco, nunca do cliente
+    product_ids = sorted({item["produto_id"] for item in itens})
+    cursor.execute(
+        f"SELECT id, nome, preco, vendedor_id FROM produtos WHERE id IN ({', '.join('?' * len(product_ids))})",
+        product_ids
+    )
+    products = {row[0]: row for row in cursor.fetchall()}
+    missing = [product_id for product_id in product_ids if product_id not in products]
+
+    if missing:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Produto(s) inexistente(s): {', '.join(missing)}")
+
+    # Agrupa os itens por vendedor, como o diálogo de venda
+    sales_by_seller = {}
+
+    for item in itens:
+        produto_id, nome, preco, vendedor_id = products[item["produto_id"]]
+        sale = sales_by_seller.setdefault(vendedor_id, {"cart_items": [], "valor_total": 0.0})
+        sale["cart_items"].append({"produto_id": produto_id, "nome": nome, "quantidade": item["quantidade"], "preco_unitario": preco})
+        sale["valor_total"] += item["quantidade"] * preco
+
+    # Os pagamentos precisam cobrir o total
+    total = sum(sale["valor_total"] for sale in sales_by_seller.values())
+    total_pago = sum(pagamento["valor"] for pagamento in pagamentos)
+
+    if not (total - 0.01 < total_pago < total + 0.01):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"A soma dos pagamentos (R$ {total_pago:.2f}) não corresponde ao total (R$ {total:.2f}).")
+
+    # Uma venda por vendedor, com os pagamentos divididos proporcionalmente e o mesmo atendimento
+    venda_ids = []
+    atendimento = uuid.uuid4().hex
+
+    for vendedor_id, sale in sales_by_seller.items():
+        payments = [
+            {"metodo": pagamento["metodo"], "valor": sale["valor_total"] / total * pagamento["valor"]}
+            for pagamento in pagamentos
+        ]
+        venda_id = sales_logic._insert_sale(cursor, vendedor_id, sale["valor_total"], sale["cart_items"], payments, atendimento=atendimento)
+        venda_ids.append(venda_id)
+        pending_events.append((
+            events.SALE_REGISTERED,
+            [sales_logic._sale_row(cursor, venda_id)],
+            {"vendedor_id": vendedor_id, "cart_items": sale["cart_items"], "payments": payments, "atendimento": atendimento}
+        ))
+
+    return {"vendas": venda_ids, "valor_total": total}
+
+def _validate_checkout(body):
+    """
+    Valida o formato do corpo de POST /vendas e retorna (itens, pagamentos).
+    """
+
+    # Estrutura esperada: {"itens": [{"produto_id", "quantidade"}], "pagamentos": [{"metodo", "valor"}]}
+    if not isinstance(body, dict):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "O corpo deve ser um objeto JSON.")
+
+    itens = body.get("itens")
+    pagamentos = body.get("pagamentos")
+
+    if not isinstance(itens, list) or not itens:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Informe ao menos um item em 'itens'.")
+
+    if not isinstance(pagamentos, list) or not pagamentos:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Informe ao menos um pagamento em 'pagamentos'.")
+
+    try:
+        itens = [{"produto_id": str(item["produto_id"]), "quantidade": int(item["quantidade"])} for item in itens]
+        pagamentos = [{"metodo": str(pagamento["metodo"]), "valor": float(pagamento["valor"])} for pagamento in pagamentos]
+
+    except (KeyError, TypeError, ValueError):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Itens ou pagamentos em formato inválido.")
+
+    if any(item["quantidade"] <= 0 for item in itens) or any(pagamento["valor"] <= 0 for pagamento in pagamentos):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Quantidades e valores devem ser positivos.")
+
+    return itens, pagamentos
+
+class PosServer:
+    """
+    Servidor HTTP/JSON (somente biblioteca padrão) para registrar vendas a partir de tablets e celulares.
+
+    Rotas:
+      GET  /vendedores                 lista de vendedores
+      GET  /produtos[?vendedor_id=N]   catálogo (todos ou de um vendedor)
+      GET  /produtos/<id>              detalhes de um produto
+      GET  /produtos/<id>/comprados-juntos  produtos mais comprados no mesmo atendimento
+      POST /vendas                     checkout: {"itens": [...], "pagamentos": [...]}
+      GET  /relatorio                  relatório de vendas (texto, via cache de relatório)
+      GET  /estatisticas               tempos de resposta por rota
+
+    Todas as escritas passam por uma única conexão, em uma thread própria alimentada por uma fila;
+    as leituras usam um grupo compartilhado de conexões em threads auxiliares.
+    """
+
+    def __init__(self, db_path=None, host="127.0.0.1", port=8765, read_connections=4, catalog_ttl=5.0, verbose=False):
+        """
+        Configura o servidor (nada é aberto até start()).
+        """
+
+        # Parâmetros do servidor
+        self.db_path = Path(db_path) if db_path else sales_logic.DB_PATH
+        self.host = host
+        self.port = port
+        self.read_connections = read_connections
+        self.catalog_ttl = catalog_ttl
+        self.verbose = verbose
+
+        # Estado criado em start()
+        self._server = None
+        self._loop = None
+        self._write_queue = queue.Queue()
+        self._writer_thread = None
+        self._read_pool = queue.Queue()
+        self._read_executor = None
+
+        # Relatório em cache deste banco (o DB_PATH global do processo não é alterado)
+        self.report_cache = report_cache.ReportCache(self.db_path)
+
+        # Análise de cesta deste banco, atualizada pelas vendas publicadas no barramento
+        self.basket = basket.CoOccurrenceIndex()
+
+        # Respostas de catálogo em cache: {rota: (expira_em, etag, corpo)}
+        self._catalog_cache = {}
+
+        # Tempos por rota: {rota: [quantidade, soma_segundos, maior_segundos]}
+        self.timings = {}
+
+    async def start(self):
+        """
+        Abre as conexões, inicia a thread de escrita e começa a aceitar conexões.
+        """
+
+        # Todas as conexões do servidor recebem o caminho explicitamente
+        sales_logic.initialize_database(self.db_path)
+        self._loop = asyncio.get_running_loop()
+
+        # Grupo de leitura: conexões compartilhadas entre as threads auxiliares
+        for _ in range(self.read_connections):
+            self._read_pool.put(sales_logic._connect(self.db_path, check_same_thread=False))
+        self._read_executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.read_connections, thread_name_prefix="leitura")
+
+        # Alterações de catálogo feitas neste processo descartam as respostas em cache na hora
+        events.subscribe(self._on_catalog_event, events.SELLER_ADDED, events.SELLER_DELETED, events.PRODUCT_ADDED, events.PRODUCT_DELETED,
+                         events.PRODUCTS_UPDATED)
+
+        # Cestas do histórico; as vendas seguintes chegam pelo barramento após cada COMMIT
+        self.basket.rebuild(self.db_path)
+        events.subscribe(self.basket.handle_event, events.SALE_REGISTERED, events.SALES_CLEARED)
+
+        # Escritor único
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="escrita", daemon=True)
+        self._writer_thread.start()
+
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Servidor de vendas em http://%s:%s (banco: %s)", self.host, self.port, self.db_path)
+
+    async def serve_forever(self):
+        """
+        Atende requisições até ser cancelado.
+        """
+
+        # Inicia se ainda não foi iniciado
+        if self._server is None:
+            await self.start()
+
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Para de aceitar conexões e fecha a thread de escrita e o grupo de leitura.
+        """
+
+        # Encerra na ordem inversa da abertura
+        events.unsubscribe(self._on_catalog_event)
+        events.unsubscribe(self.basket.handle_event)
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+        if self._writer_thread is not None:
+            self._write_queue.put(None)
+            await asyncio.to_thread(self._writer_thread.join)
+
+        if self._read_executor is not None:
+            self._read_executor.shutdown(wait=True)
+
+        while not self._read_pool.empty():
+            self._read_pool.get_nowait().close()
+
+        self.report_cache.close()
+
+    # ---------- Escrita ----------
+
+    def _writer_loop(self):
+        """
+        Thread de escrita: consome a fila e confirma as operações acumuladas em um único COMMIT.
+        Cada operação roda em um SAVEPOINT, então a falha de uma não desfaz as outras.
+    As operações recebem (cursor, eventos_pendentes, *args) e retornam o resultado da requisição.
+        """
+
+        # Conexão exclusiva da thread, com transações controladas manualmente
+        conn = sales_logic._connect(self.db_path)
+        conn.isolation_level = None
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        running = True
+
+        try:
+            while running:
+                jobs = [self._write_queue.get()]
+
+                # Junta o que mais estiver esperando na fila
+                while len(jobs) < WRITE_BATCH:
+                    try:
+                        jobs.append(self._write_queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if None in jobs:
+                    running = False
+                    jobs = [job for job in jobs if job is not None]
+
+                # Pedidos cujo cliente já desistiu não são executados
+                jobs = [job for job in jobs if job[2].set_running_or_notify_cancel()]
+
+                if not jobs:
+                    continue
+
+                results = []
+                published = []
+
+                try:
+                    cursor.execute("BEGIN IMMEDIATE")
+
+                    for function, args, future in jobs:
+                        cursor.execute("SAVEPOINT pedido")
+                        try:
+                            pending = []
+                            value = function(cursor, pending, *args)
+                            cursor.execute("RELEASE pedido")
+                            results.append((future, value, None))
+                            published.extend(pending)
+
+                        # Qualquer falha desfaz só esta operação; a thread de escrita nunca para
+                        except Exception as e:
+                            cursor.execute("ROLLBACK TO pedido")
+                            cursor.execute("RELEASE pedido")
+                            results.append((future, None, e))
+
+                    cursor.execute("COMMIT")
+
+                # Falha no BEGIN ou no COMMIT: nenhuma operação do lote foi gravada
+                except sqlite3.Error as e:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    results = [(future, None, e) for _, _, future in jobs]
+                    published = []
+
+                # Eventos somente do que foi confirmado
+                for kind, rows, data in published:
+                    events.publish(kind, rows, **data)
+
+                for future, value, error in results:
+                    if error is None:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(error)
+
+        finally:
+            conn.close()
+
+    async def _write(self, function, *args):
+        """
+        Enfileira uma operação de escrita e aguarda o resultado sem bloquear o loop.
+        """
+
+        # A thread de escrita resolve o future depois do COMMIT
+        future = concurrent.futures.Future()
+        self._write_queue.put((function, args, future))
+        return await asyncio.wrap_future(future)
+
+    # ---------- Leitura ----------
+
+    def _with_read_connection(self, function, *args):
+        """
+        Executado em uma thread auxiliar: empresta uma conexão do grupo de leitura.
+        """
+
+        # Devolve a conexão mesmo em caso de erro
+        conn = self._read_pool.get()
+
+        try:
+            return function(conn.cursor(), *args)
+
+        finally:
+            self._read_pool.put(conn)
+
+    async def _read(self, function, *args):
+        """
+        Executa uma consulta no grupo de leitura sem bloquear o loop.
+        """
+
+        # As threads auxiliares fazem o acesso ao banco
+        return await self._loop.run_in_executor(self._read_executor, self._with_read_connection, function, *args)
+
+    async def _cached_catalog(self, key, function, *args):
+        """
+        Retorna (etag, corpo) de uma resposta de catálogo, consultando o banco só quando o cache expira.
+        """
+
+        # Respostas prontas (JSON já serializado) valem por 'catalog_ttl' segundos
+        cached = self._catalog_cache.get(key)
+
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+
+        body = json.dumps(await self._read(function, *args), ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self._catalog_cache[key] = (time.monotonic() + self.catalog_ttl, etag, body)
+        return etag, body
+
+    def invalidate_catalog(self):
+        """
+        Descarta as respostas de catálogo em cache.
+        """
+
+        # A próxima requisição consulta o banco
+        self._catalog_cache.clear()
+
+    def _on_catalog_event(self, event):
+        """
+        Inscrito no barramento: qualquer alteração de vendedores ou produtos invalida o catálogo.
+        """
+
+        # As linhas do evento não são necessárias; a próxima leitura consulta o banco
+        self.invalidate_catalog()
+
+    # ---------- Rotas ----------
+
+    async def _route(self, method, path, query, body):
+        """
+        Encaminha a requisição e retorna (status, corpo_em_bytes, cabeçalhos_extras).
+        """
+
+        # Rotas de catálogo: cache de resposta com ETag
+        if path == "/vendedores" and method == "GET":
+            etag, payload = await self._cached_catalog(path, _query_sellers)
+            return HTTPStatus.OK, payload, {"ETag": etag}
+
+        if path == "/produtos" and method == "GET":
+            seller_id = query.get("vendedor_id", [None])[0]
+
+            try:
+                seller_id = int(seller_id) if seller_id is not None else None
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "vendedor_id inválido.")
+
+            etag, payload = await self._cached_catalog((path, seller_id), _query_products, seller_id)
+            return HTTPStatus.OK, payload, {"ETag": etag}
+
+        # Produtos comprados juntos: índice em memória, sem consulta ao banco
+        if path.startswith("/produtos/") and path.endswith("/comprados-juntos") and method == "GET":
+            product_id = path[len("/produtos/"):-len("/comprados-juntos")]
+            return HTTPStatus.OK, _json({"produto_id": product_id, "cestas": self.basket.baskets,
+                                         "comprados_juntos": self.basket.frequently_bought_with(product_id)}), {}
+
+        if path.startswith("/produtos/") and method == "GET":
+            product = await self._read(_query_product, path[len("/produtos/"):])
+
+            if product is None:
+                raise HttpError(HTTPStatus.NOT_FOUND, "Produto não encontrado.")
+            return HTTPStatus.OK, _json(product), {}
+
+        # Checkout pela fila de escrita
+        if path == "/vendas" and method == "POST":
+            try:
+                data = json.loads(body or b"null")
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "JSON inválido.")
+
+            itens, pagamentos = _validate_checkout(data)
+            return HTTPStatus.CREATED, _json(await self._write(_checkout, itens, pagamentos)), {}
+
+        # Relatório: o cache de relatório tem conexão própria
+        if path == "/relatorio" and method == "GET":
+            report = await self._loop.run_in_executor(self._read_executor, self.report_cache.get_report)
+            return HTTPStatus.OK, _json({"relatorio": report}), {}
+
+        if path == "/estatisticas" and method == "GET":
+            return HTTPStatus.OK, _json(self.get_statistics()), {}
+
+        if path in ("/vendedores", "/produtos", "/vendas", "/relatorio", "/estatisticas") or path.startswith("/produtos/"):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Método não permitido.")
+
+        raise HttpError(HTTPStatus.NOT_FOUND, "Rota não encontrada.")
+
+    def get_statistics(self):
+        """
+        Tempos de resposta por rota, em milissegundos.
+        """
+
+        # Média e maior tempo de cada rota
+        return {
+            route: {"requisicoes": count, "media_ms": total / count * 1000, "maior_ms": worst * 1000}
+            for route, (count, total, worst) in sorted(self.timings.items())
+        }
+
+    def _record_timing(self, route, elapsed):
+        """
+        Acumula o tempo de uma requisição.
+        """
+
+        # Uma entrada por método e rota (produtos individuais agrupados)
+        entry = self.timings.setdefault(route, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+
+    # ---------- HTTP ----------
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Atende uma conexão HTTP/1.1 (com keep-alive) até o cliente fechar ou ficar ocioso.
+        """
+
+        try:
+            while True:
+                # Linha de requisição e cabeçalhos
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+
+                if not request_line.strip():
+                    break
+
+                start = time.perf_counter()
+                headers = {}
+
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, _json({"erro": "Requisição inválida."}), {}, False)
+                    break
+
+                url = urlsplit(target)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                # Corpo da requisição
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+
+                if length < 0 or length > MAX_BODY_BYTES:
+                    await self._send(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, _json({"erro": "Corpo inválido ou grande demais."}), {}, False)
+                    break
+
+                # Cliente que anuncia um corpo e não o envia não prende a conexão
+                try:
+                    body = await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT) if length else b""
+                except asyncio.TimeoutError:
+                    await self._send(writer, HTTPStatus.REQUEST_TIMEOUT, _json({"erro": "Tempo esgotado aguardando o corpo da requisição."}), {}, False)
+                    break
+
+                # Executa a rota e converte erros em respostas JSON
+                try:
+                    status, payload, extra_headers = await self._route(method, url.path, parse_qs(url.query), body)
+
+                except HttpError as e:
+                    status, payload, extra_headers = e.status, _json({"erro": e.message}), {}
+
+                except sqlite3.Error as e:
+                    logger.error("Erro de banco de dados em %s %s: %s", method, url.path, e, extra={"metodo": method, "rota": url.path})
+                    status, payload, extra_headers = HTTPStatus.SERVICE_UNAVAILABLE, _json({"erro": f"Erro no banco de dados: {e}"}), {}
+
+                # Cliente já tem a versão atual do catálogo
+                if "ETag" in extra_headers and headers.get("if-none-match") == extra_headers["ETag"]:
+                    status, payload = HTTPStatus.NOT_MODIFIED, b""
+
+                elapsed = time.perf_counter() - start
+                route = f"{method} {'/produtos/<id>' if url.path.startswith('/produtos/') else url.path}"
+                self._record_timing(route, elapsed)
+                extra_headers["Server-Timing"] = f"app;dur={elapsed * 1000:.2f}"
+
+                if self.verbose:
+                    logger.info("%s %s -> %d (%.1f ms)", method, target, int(status), elapsed * 1000, extra={
+                        "metodo": method, "rota": route, "status": int(status), "duracao_ms": round(elapsed * 1000, 2)
+                    })
+
+                await self._send(writer, status, payload, extra_headers, keep_alive)
+
+                if not keep_alive:
+                    break
+
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, payload, extra_headers, keep_alive):
+        """
+        Escreve a resposta HTTP.
+        """
+
+        # Cabeçalhos fixos mais os da rota
+        status = HTTPStatus(status)
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Length: {len(payload)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+
+        if payload:
+            lines.append("Content-Type: application/json; charset=utf-8")
+
+        lines.extend(f"{name}: {value}" for name, value in extra_headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+
+def _json(data):
+    """
+    Serializa a resposta em JSON UTF-8.
+    """
+
+    # Mantém os acentos legíveis
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+def _query_sellers(cursor):
+    """
+    Lista de vendedores: [{"id", "nome"}].
+    """
+
+    # Mesma ordem da tela de vendedores
+    cursor.execute("SELECT id, nome FROM vendedores ORDER BY nome")
+    return [{"id": seller_id, "nome": nome} for seller_id, nome in cursor.fetchall()]
+
+def _query_products(cursor, seller_id=None):
+    """
+    Catálogo de produtos, de todos os vendedores ou de um só.
+    """
+
+    # Um vendedor: mesma ordem de get_products_by_seller
+    if seller_id is not None:
+        cursor.execute("SELECT id, nome, preco, vendedor_id FROM produtos WHERE vendedor_id = ? ORDER BY nome", (seller_id,))
+
+    else:
+        cursor.execute("SELECT id, nome, preco, vendedor_id FROM produtos ORDER BY vendedor_id, nome")
+
+    return [
+        {"id": product_id, "nome": nome, "preco": preco, "vendedor_id": vendedor_id}
+        for product_id, nome, preco, vendedor_id in cursor.fetchall()
+    ]
+
+def _query_product(cursor, product_id):
+    """
+    Detalhes de um produto, ou None.
+    """
+
+    # Busca pelo ID
+    cursor.execute("""
+        SELECT p.id, p.nome, p.preco, p.vendedor_id, v.nome
+        FROM produtos p
+        JOIN vendedores v ON v.id = p.vendedor_id
+        WHERE p.id = ?
+    """, (product_id,))
+    row = cursor.fetchone()
+
+    if row is None:
+        return None
+
+    return {"id": row[0], "nome": row[1], "preco": row[2], "vendedor_id": row[3], "vendedor_nome": row[4]}
+
+def main(argv=None):
+    """
+    Linha de comando: inicia o servidor de vendas.
+    """
+
+    # Argumentos da linha de comando
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON de vendas para tablets e celulares.")
+    parser.add_argument("--db", help="Banco de dados (padrão: data/planilhas.db).")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço (padrão: 127.0.0.1; use 0.0.0.0 para a rede local).")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--leitores", type=int, default=4, help="Conexões de leitura (padrão: 4).")
+    parser.add_argument("--cache-catalogo", type=float, default=5.0, help="Validade do cache de catálogo em segundos (padrão: 5).")
+    parser.add_argument("--verbose", action="store_true", help="Mostra cada requisição com seu tempo.")
+    args = parser.parse_args(argv)
+
+    # Registro em logs/ e no console (o log de acesso do --verbose também vai para o arquivo)
+    log_setup.configure_logging()
+
+    server = PosServer(args.db, args.host, args.porta, args.leitores, args.cache_catalogo, args.verbose)
+
+    try:
+        asyncio.run(server.serve_forever())
+
+    except KeyboardInterrupt:
+        logger.info("Servidor encerrado.")
+
+if __name__ == "__main__":
+    main()
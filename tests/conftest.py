@@ -0,0 +1,59 @@
+import sys
+import logging
+from pathlib import Path
+
+import pytest
+
+# O pacote fica em src/ (sem instalação): os testes importam vendas_daetec a partir dele
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from vendas_daetec.core import sales_logic, db_profiles
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """
+    Banco novo em um diretório temporário, usado como DB_PATH durante o teste.
+    """
+
+    # Nada do teste toca o banco real; as conexões ociosas do WAL são fechadas no fim
+    path = tmp_path / "planilhas.db"
+    monkeypatch.setattr(sales_logic, "DB_PATH", path)
+    logging.getLogger("vendas_daetec").setLevel(logging.WARNING)
+    sales_logic.invalidate_catalog_cache()
+    sales_logic.initialize_database(path)
+
+    yield path
+
+    sales_logic.invalidate_catalog_cache()
+    db_profiles.release_connections()
+
+def seed_catalog(db_path, sellers=("Ana", "Bruno"), products_per_seller=2):
+    """
+    Cadastra vendedores e produtos de teste diretamente no banco. Retorna {vendedor_id: [produto_id, ...]}.
+    """
+
+    # Preços 5, 10, ... para facilitar as contas dos testes
+    conn = sales_logic._connect(db_path)
+    catalog = {}
+
+    try:
+        cursor = conn.cursor()
+
+        for nome in sellers:
+            cursor.execute("INSERT INTO vendedores (nome) VALUES (?)", (nome,))
+            seller_id = cursor.lastrowid
+            catalog[seller_id] = []
+
+            for number in range(1, products_per_seller + 1):
+                product_id = sales_logic._next_product_id(cursor)
+                cursor.execute("INSERT INTO produtos (id, nome, preco, vendedor_id) VALUES (?, ?, ?, ?)",
+                               (product_id, f"{nome} {number}", 5.0 * number, seller_id))
+                catalog[seller_id].append(product_id)
+
+        conn.commit()
+
+    finally:
+        conn.close()
+
+    sales_logic.invalidate_catalog_cache()
+    return catalog
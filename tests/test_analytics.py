@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from vendas_daetec.core import analytics, sales_logic
+
+from conftest import seed_catalog
+
+pytest.importorskip("numpy")
+
+def _sell(seller_id, items, metodo="Pix"):
+    """
+    Registra uma venda de [(produto_id, quantidade, preco)] pago com um único método.
+    """
+
+    # Mesmo formato do carrinho do diálogo de venda
+    total = sum(quantidade * preco for _, quantidade, preco in items)
+    cart = [{"produto_id": produto_id, "quantidade": quantidade, "preco_unitario": preco} for produto_id, quantidade, preco in items]
+    assert sales_logic.register_sale(seller_id, total, cart, [{"metodo": metodo, "valor": total}])
+
+@pytest.fixture
+def seeded(db_path):
+    """
+    Três vendas: Ana vende 3 x A1 (5,00) + 1 x A2 (10,00) e 1 x A1; Bruno vende 4 x B2 (10,00).
+    """
+
+    # Receitas: Ana 30,00 em 2 vendas, Bruno 40,00 em 1 venda
+    (ana, (a1, a2)), (bruno, (_, b2)) = seed_catalog(db_path).items()
+    _sell(ana, [(a1, 3, 5.0), (a2, 1, 10.0)])
+    _sell(ana, [(a1, 1, 5.0)], metodo="Dinheiro")
+    _sell(bruno, [(b2, 4, 10.0)])
+    return {"ana": ana, "bruno": bruno, "a1": a1, "a2": a2, "b2": b2}
+
+def test_top_products(db_path, seeded):
+    data = analytics.SalesData(db_path)
+
+    by_quantity = analytics.top_products(data, n=2)
+    assert [(row["produto_id"], row["quantidade"]) for row in by_quantity] == [(seeded["a1"], 4), (seeded["b2"], 4)]
+
+    by_revenue = analytics.top_products(data, n=3, by="receita")
+    assert [row["produto_id"] for row in by_revenue] == [seeded["b2"], seeded["a1"], seeded["a2"]]
+    assert by_revenue[0]["receita"] == pytest.approx(40.0)
+
+def test_basket_stats_and_seller_comparison(db_path, seeded):
+    data = analytics.SalesData(db_path)
+
+    assert analytics.basket_stats(data) == pytest.approx({"vendas": 3, "itens_medio": 4 / 3, "unidades_medio": 3.0, "valor_medio": 70 / 3})
+
+    sellers = analytics.seller_comparison(data)
+    assert [seller["vendedor_id"] for seller in sellers] == [seeded["bruno"], seeded["ana"]]
+    assert sellers[1]["vendas"] == 2 and sellers[1]["unidades"] == 5
+    assert sellers[1]["ticket_medio"] == pytest.approx(15.0)
+    assert sum(seller["participacao"] for seller in sellers) == pytest.approx(1.0)
+
+def test_empty_database(db_path):
+    data = analytics.SalesData(db_path)
+    results = analytics.compute_all(data)
+
+    assert results["top_produtos"] == []
+    assert results["vendedores"] == []
+    assert results["pagamentos_no_tempo"] == []
+    assert results["cesta"]["vendas"] == 0
+    assert sum(hour["vendas"] for hour in results["vendas_por_hora"]) == 0
+
+def test_cli_exports_json(db_path, seeded, tmp_path, capsys):
+    output = tmp_path / "analises" / "resultado.json"
+    assert analytics.main(["--db", str(db_path), "--saida", str(output), "--top", "1"]) == 0
+
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert len(results["top_produtos"]) == 1
+    assert results["cesta"]["vendas"] == 3
+    assert "Vendas: 3" in capsys.readouterr().out
@@ -0,0 +1,50 @@
+import pytest
+
+from vendas_daetec.core import events, sales_logic
+
+from conftest import seed_catalog
+
+@pytest.fixture
+def published():
+    """
+    Eventos PRODUCTS_UPDATED publicados durante o teste.
+    """
+
+    # Inscrição cancelada no fim, para não vazar entre testes
+    received = []
+    callback = events.subscribe(received.append, events.PRODUCTS_UPDATED)
+    yield received
+    events.unsubscribe(callback)
+
+def test_percent_update_filters_on_the_current_price(db_path, published):
+    catalog = seed_catalog(db_path)
+    cheap = sorted(products[0] for products in catalog.values())
+    assert sales_logic.warm_catalog()
+
+    # Preço 5.0 está na faixa; depois do reajuste (7.5) não estaria mais
+    updated = sales_logic.update_products(percent=50, max_price=6)
+    assert sorted(row[1] for row in updated) == cheap
+    assert all(row[3] == pytest.approx(7.5) for row in updated)
+
+    assert len(published) == 1
+    assert sorted(row[1] for row in published[0].rows) == cheap
+    assert published[0].data["vendedor_id"] is None
+
+    # O cache foi descartado: a próxima leitura vê o preço novo
+    assert sales_logic._catalog_cache is None
+    assert sales_logic.get_product_details(cheap[0])[2] == pytest.approx(7.5)
+
+def test_update_of_one_seller_and_empty_selection(db_path, published):
+    catalog = seed_catalog(db_path)
+    seller_id, products = next(iter(catalog.items()))
+
+    updated = sales_logic.update_products(price=3.0, seller_id=seller_id, min_price=8)
+    assert [row[1] for row in updated] == products[1:]
+    assert published[-1].data["vendedor_id"] == seller_id
+
+    # Nenhum produto na faixa: nada alterado, nenhum evento
+    assert sales_logic.update_products(percent=10, min_price=100) == []
+    assert len(published) == 1
+
+    with pytest.raises(ValueError):
+        sales_logic.update_products(percent=10)
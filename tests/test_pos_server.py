@@ -0,0 +1,139 @@
+import json
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+from vendas_daetec.core import sales_logic
+from vendas_daetec.server import pos_server
+
+from conftest import seed_catalog
+
+async def _request(port, method, path, body=None, headers=None, raw_body=None):
+    """
+    Envia uma requisição HTTP/1.1 (Connection: close) e retorna (status, cabeçalhos, corpo JSON ou None).
+    """
+
+    # Cliente mínimo sobre asyncio, como o de um tablet
+    payload = raw_body if raw_body is not None else (json.dumps(body).encode() if body is not None else b"")
+    lines = [f"{method} {path} HTTP/1.1", "Host: teste", "Connection: close", f"Content-Length: {len(payload)}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, content = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    response_headers = {name.lower(): value.strip() for name, _, value in (line.partition(":") for line in header_lines)}
+    return int(status_line.split()[1]), response_headers, json.loads(content) if content else None
+
+def _run(db_path, scenario):
+    """
+    Sobe o servidor em uma porta livre, executa 'scenario(server)' e encerra.
+    """
+
+    # Cada teste tem o próprio laço de eventos
+    async def main():
+        server = pos_server.PosServer(db_path, port=0, read_connections=2)
+        await server.start()
+
+        try:
+            return await scenario(server)
+
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+@pytest.fixture
+def server_db(tmp_path, db_path):
+    """
+    Banco do servidor, diferente do DB_PATH do processo, com um catálogo de teste.
+    """
+
+    # O servidor não pode depender (nem alterar) o banco global
+    path = tmp_path / "servidor.db"
+    sales_logic.initialize_database(path)
+    return path, seed_catalog(path)
+
+def test_catalog_routes(server_db):
+    path, catalog = server_db
+
+    async def scenario(server):
+        status, headers, sellers = await _request(server.port, "GET", "/vendedores")
+        assert status == HTTPStatus.OK
+        assert [seller["nome"] for seller in sellers] == ["Ana", "Bruno"]
+
+        # Cliente com o catálogo atual recebe 304
+        status, _, _ = await _request(server.port, "GET", "/vendedores", headers={"If-None-Match": headers["etag"]})
+        assert status == HTTPStatus.NOT_MODIFIED
+
+        seller_id = next(iter(catalog))
+        status, _, products = await _request(server.port, "GET", f"/produtos?vendedor_id={seller_id}")
+        assert status == HTTPStatus.OK
+        assert [product["id"] for product in products] == catalog[seller_id]
+
+        assert (await _request(server.port, "GET", "/produtos?vendedor_id=abc"))[0] == HTTPStatus.BAD_REQUEST
+        assert (await _request(server.port, "GET", f"/produtos/{catalog[seller_id][0]}"))[0] == HTTPStatus.OK
+        assert (await _request(server.port, "GET", "/produtos/PROD-9999"))[0] == HTTPStatus.NOT_FOUND
+
+    _run(path, scenario)
+
+def test_checkout_status_codes(server_db, db_path):
+    path, catalog = server_db
+    (ana, ana_products), (bruno, bruno_products) = catalog.items()
+
+    async def scenario(server):
+        # Carrinho com dois vendedores: uma venda por vendedor, no mesmo atendimento
+        cart = {"itens": [{"produto_id": ana_products[0], "quantidade": 2}, {"produto_id": bruno_products[0], "quantidade": 1}],
+                "pagamentos": [{"metodo": "Pix", "valor": 15.0}]}
+        status, _, result = await _request(server.port, "POST", "/vendas", cart)
+        assert status == HTTPStatus.CREATED
+        assert len(result["vendas"]) == 2
+        assert result["valor_total"] == pytest.approx(15.0)
+
+        # Erros do cliente
+        wrong_total = dict(cart, pagamentos=[{"metodo": "Pix", "valor": 1.0}])
+        unknown = {"itens": [{"produto_id": "PROD-9999", "quantidade": 1}], "pagamentos": [{"metodo": "Pix", "valor": 5.0}]}
+        assert (await _request(server.port, "POST", "/vendas", wrong_total))[0] == HTTPStatus.BAD_REQUEST
+        assert (await _request(server.port, "POST", "/vendas", unknown))[0] == HTTPStatus.BAD_REQUEST
+        assert (await _request(server.port, "POST", "/vendas", raw_body=b"{"))[0] == HTTPStatus.BAD_REQUEST
+        assert (await _request(server.port, "GET", "/vendas"))[0] == HTTPStatus.METHOD_NOT_ALLOWED
+        assert (await _request(server.port, "GET", "/inexistente"))[0] == HTTPStatus.NOT_FOUND
+
+        # Relatório e análise de cesta refletem a venda
+        status, _, report = await _request(server.port, "GET", "/relatorio")
+        assert status == HTTPStatus.OK
+        assert "Ana" in report["relatorio"] and "Bruno" in report["relatorio"]
+
+        status, _, together = await _request(server.port, "GET", f"/produtos/{ana_products[0]}/comprados-juntos")
+        assert status == HTTPStatus.OK
+        assert [entry["produto_id"] for entry in together["comprados_juntos"]] == [bruno_products[0]]
+
+    _run(path, scenario)
+
+    # O banco global do processo não foi trocado nem recebeu vendas
+    assert sales_logic.DB_PATH == db_path
+    assert sales_logic.get_sales_page()[0] == []
+
+def test_oversized_and_stalled_bodies(server_db, monkeypatch):
+    path, _ = server_db
+    monkeypatch.setattr(pos_server, "REQUEST_TIMEOUT", 0.2)
+
+    async def scenario(server):
+        # Content-Length acima do limite
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(f"POST /vendas HTTP/1.1\r\nContent-Length: {pos_server.MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+        assert (await reader.read()).startswith(b"HTTP/1.1 413")
+        writer.close()
+
+        # Corpo anunciado e nunca enviado: a conexão não fica presa
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"POST /vendas HTTP/1.1\r\nContent-Length: 50\r\n\r\n{}")
+        assert (await asyncio.wait_for(reader.read(), 5)).startswith(b"HTTP/1.1 408")
+        writer.close()
+
+    _run(path, scenario)
@@ -0,0 +1,76 @@
+import itertools
+
+import pytest
+
+from vendas_daetec.core import replay, sales_logic
+
+from conftest import seed_catalog
+
+def _record_session(trace_path, catalog):
+    """
+    Grava uma sessão curta com cadastros, vendas, consultas e iteradores (um deles consumido só em parte).
+    """
+
+    # As chamadas passam pelos módulos, como na interface
+    recorder = replay.SessionRecorder(trace_path)
+    recorder.start()
+
+    try:
+        seller_id, products = next(iter(catalog.items()))
+        assert sales_logic.add_seller("Carla")
+        sales_logic.get_all_sellers()
+
+        for product_id in products:
+            price = sales_logic.get_product_details(product_id)[2]
+            assert sales_logic.register_sale(seller_id, 2 * price,
+                                             [{"produto_id": product_id, "quantidade": 2, "preco_unitario": price}],
+                                             [{"metodo": "Pix", "valor": 2 * price}])
+
+        sales_logic.get_sales_page()
+        assert len(list(sales_logic.iter_sellers())) == 3
+        assert len(list(sales_logic.iter_products_by_seller(seller_id))) == len(products)
+
+        partial = sales_logic.iter_products()
+        assert len(list(itertools.islice(partial, 1))) == 1
+        partial.close()
+
+        # Falha registrada como falha: vendedor duplicado
+        assert not sales_logic.add_seller("Carla")
+
+    finally:
+        recorder.stop()
+
+def test_record_and_replay_without_divergences(db_path, tmp_path):
+    catalog = seed_catalog(db_path)
+    trace_path = tmp_path / "sessoes" / "sessao.jsonl.gz"
+    _record_session(trace_path, catalog)
+
+    header, operations = replay.load_trace(trace_path)
+    assert header["banco"] == "sessao.db"
+    assert {entry["op"] for entry in operations} >= replay.ITERATOR_OPERATIONS
+    assert [entry.get("parcial", False) for entry in operations if entry["op"] == "sales_logic.iter_products"] == [True]
+
+    result = replay.replay_session(trace_path)
+    assert result["operacoes"] == len(operations)
+    assert all(stats["divergencias"] == 0 for stats in result["por_operacao"].values())
+
+    # A reprodução usa uma cópia: o banco ativo continua com o estado da gravação
+    assert sales_logic.DB_PATH == db_path
+    assert len(sales_logic.get_all_sellers()) == 3
+
+def test_replay_in_memory(db_path, tmp_path):
+    trace_path = tmp_path / "sessao.jsonl"
+    _record_session(trace_path, seed_catalog(db_path))
+
+    result = replay.replay_session(trace_path, in_memory=True)
+    assert all(stats["divergencias"] == 0 for stats in result["por_operacao"].values())
+
+def test_snapshot_cannot_be_the_live_database(db_path):
+    # planilhas.jsonl ao lado do banco teria a cópia em planilhas.db, o próprio banco em uso
+    recorder = replay.SessionRecorder(db_path.with_name("planilhas.jsonl"))
+
+    with pytest.raises(ValueError):
+        recorder.start()
+
+    assert db_path.exists()
+    assert sales_logic.get_all_sellers() == []
@@ -0,0 +1,93 @@
+import sqlite3
+
+from vendas_daetec.core import sales_logic, sync
+
+from conftest import seed_catalog
+
+def _sell(seller_id, product_id, quantidade=1, preco=5.0, atendimento=None):
+    """
+    Registra uma venda de um item pago em Pix no banco ativo.
+    """
+
+    # Mesmo caminho do diálogo de venda
+    assert sales_logic.register_sale(seller_id, quantidade * preco,
+                                     [{"produto_id": product_id, "quantidade": quantidade, "preco_unitario": preco}],
+                                     [{"metodo": "Pix", "valor": quantidade * preco}], atendimento=atendimento)
+
+def _sales_summary(path):
+    """
+    Vendas do banco como (uuid, vendedor, total, data, atendimento, itens, pagamentos), independente dos IDs locais.
+    """
+
+    # Nomes no lugar dos IDs: cada banco numera vendedores e produtos do seu jeito
+    conn = sqlite3.connect(path)
+
+    try:
+        return sorted(conn.execute("""
+            SELECT v.uuid, s.nome, v.valor_total, v.data_venda, v.atendimento,
+                   (SELECT group_concat(produto_nome || 'x' || quantidade, ',') FROM venda_itens WHERE venda_id = v.id),
+                   (SELECT group_concat(metodo || '=' || valor, ',') FROM venda_pagamentos WHERE venda_id = v.id)
+            FROM vendas v
+            JOIN vendedores s ON s.id = v.vendedor_id
+        """).fetchall())
+
+    finally:
+        conn.close()
+
+def test_round_trip_copies_every_sale(db_path, tmp_path):
+    # Um carrinho com dois vendedores (mesmo atendimento) e uma venda avulsa
+    catalog = seed_catalog(db_path)
+    (ana, ana_products), (bruno, bruno_products) = catalog.items()
+    _sell(ana, ana_products[0], atendimento="checkout-1")
+    _sell(bruno, bruno_products[1], quantidade=2, preco=10.0, atendimento="checkout-1")
+    _sell(ana, ana_products[1], preco=10.0)
+
+    central = tmp_path / "central.db"
+    assert sync.export_changeset(tmp_path / "t1.json.gz", db_path=db_path) == 3
+    stats = sync.import_changeset(tmp_path / "t1.json.gz", db_path=central)
+
+    assert stats == {"importadas": 3, "ignoradas": 0, "vendedores_criados": 2, "produtos_criados": 3}
+    assert _sales_summary(central) == _sales_summary(db_path)
+
+def test_reimport_is_idempotent(db_path, tmp_path):
+    # O mesmo arquivo importado duas vezes não duplica vendas
+    catalog = seed_catalog(db_path)
+    seller_id, products = next(iter(catalog.items()))
+    _sell(seller_id, products[0])
+    _sell(seller_id, products[1])
+
+    central = tmp_path / "central.db"
+    sync.export_changeset(tmp_path / "t1.json.gz", db_path=db_path)
+    sync.import_changeset(tmp_path / "t1.json.gz", db_path=central)
+    stats = sync.import_changeset(tmp_path / "t1.json.gz", db_path=central)
+
+    assert stats["importadas"] == 0
+    assert stats["ignoradas"] == 2
+    assert len(_sales_summary(central)) == 2
+
+def test_export_only_sends_new_sales(db_path, tmp_path):
+    # A marca d'água de exportação avança a cada arquivo
+    catalog = seed_catalog(db_path)
+    seller_id, products = next(iter(catalog.items()))
+    _sell(seller_id, products[0])
+    assert sync.export_changeset(tmp_path / "t1.json.gz", db_path=db_path) == 1
+
+    _sell(seller_id, products[1])
+    _sell(seller_id, products[1])
+    assert sync.export_changeset(tmp_path / "t2.json.gz", db_path=db_path) == 2
+    assert sync.export_changeset(tmp_path / "t3.json.gz", db_path=db_path) == 0
+
+def test_out_of_order_import_keeps_every_sale(db_path, tmp_path):
+    # O segundo arquivo chega antes do primeiro: a marca d'água de importação não pode pular o intervalo que faltava
+    catalog = seed_catalog(db_path)
+    seller_id, products = next(iter(catalog.items()))
+    _sell(seller_id, products[0])
+    sync.export_changeset(tmp_path / "t1.json.gz", db_path=db_path)
+    _sell(seller_id, products[1])
+    sync.export_changeset(tmp_path / "t2.json.gz", db_path=db_path)
+
+    central = tmp_path / "central.db"
+    assert sync.import_changeset(tmp_path / "t2.json.gz", db_path=central)["importadas"] == 1
+    assert sync.import_changeset(tmp_path / "t1.json.gz", db_path=central)["importadas"] == 1
+    assert sync.import_changeset(tmp_path / "t1.json.gz", db_path=central)["ignoradas"] == 1
+    assert _sales_summary(central) == _sales_summary(db_path)